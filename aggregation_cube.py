@@ -0,0 +1,217 @@
+"""Per-group statistics of a comparison, computed in one pass over its rows.
+
+The cube splits the result rows into cells by Customer Group, Promo Type,
+start month and quantity range and keeps, for every cell that has rows,
+the row count and the count, sum and squared deviations of the change
+plus the original and updated Balance Qty totals. Any coarser grouping
+is rolled up from the cells (``rollup``), pooling means and standard
+deviations exactly, so charts and the drill-down never group the rows
+again. Each cell also keeps its ``top_n`` largest absolute changes,
+picked with ``np.partition`` rather than a sort, from which the movers
+of any group are selected the same way (``top_movers``).
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['Customer Group', 'Promo Type', 'Start Month', 'Quantity Range']
+# Movers kept per cell; the largest Top N the chart window offers
+CUBE_TOP_N = 50
+
+STAT_COLUMNS = ['rows', 'count', 'changed', 'sum', 'mean', 'std', 'orig_qty', 'updated_qty']
+
+
+def _dimension(df, name):
+    """``(labels, codes)`` of one dimension; code -1 where the value is missing."""
+    if name == 'Start Month':
+        if 'Start Date' not in df.columns:
+            return pd.Index([]), np.full(len(df), -1, dtype=np.int64)
+        codes, labels = pd.factorize(df['Start Date'].dt.to_period('M'), sort=True)
+        return pd.Index(labels), codes.astype(np.int64)
+    column = 'qty_range' if name == 'Quantity Range' else name
+    if column not in df.columns:
+        return pd.Index([]), np.full(len(df), -1, dtype=np.int64)
+    values = df[column]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    return pd.Index(values.cat.categories), values.cat.codes.to_numpy(dtype=np.int64)
+
+
+class AggregationCube:
+    """Cell statistics and top movers of one comparison; see the module docstring.
+
+    ``keys[i]`` holds the label code per dimension of cell ``i`` (-1 for
+    a missing value) and ``row_cells`` the cell of every result row.
+    """
+
+    def __init__(self, labels, keys, row_cells, stats, top_rows, top_bounds, magnitude,
+                 top_n=CUBE_TOP_N):
+        self.labels = labels
+        self.keys = keys
+        self.row_cells = row_cells
+        self.stats = stats
+        self.top_rows = top_rows
+        self.top_bounds = top_bounds
+        self.magnitude = magnitude
+        self.top_n = top_n
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_frame(cls, df, top_n=CUBE_TOP_N):
+        """Build the cube from an enriched result frame (``ComparisonOutcome.enriched``)."""
+        labels = {}
+        cell_key = np.zeros(len(df), dtype=np.int64)
+        radixes = []
+        for name in DIMENSIONS:
+            labels[name], codes = _dimension(df, name)
+            # Missing values get the slot after the last label
+            radix = len(labels[name]) + 1
+            cell_key = cell_key * radix + np.where(codes < 0, radix - 1, codes)
+            radixes.append(radix)
+        cells, row_cells = np.unique(cell_key, return_inverse=True)
+        row_cells = row_cells.astype(np.intp).reshape(-1)
+
+        keys = np.empty((len(cells), len(DIMENSIONS)), dtype=np.int64)
+        remainder = cells
+        for position in range(len(DIMENSIONS) - 1, -1, -1):
+            codes = remainder % radixes[position]
+            keys[:, position] = np.where(codes == radixes[position] - 1, -1, codes)
+            remainder = remainder // radixes[position]
+
+        change = df['change'].to_numpy(dtype=np.float64)
+        finite = np.isfinite(change)
+        n_cells = len(cells)
+
+        def total(values):
+            return np.bincount(row_cells, weights=np.nan_to_num(values), minlength=n_cells)
+
+        count = np.bincount(row_cells, weights=finite, minlength=n_cells)
+        change_sum = total(change)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cell_mean = change_sum / count
+        deviation = np.where(finite, change - cell_mean[row_cells], 0.0)
+        stats = {
+            'rows': np.bincount(row_cells, minlength=n_cells).astype(np.int64),
+            'count': count.astype(np.int64),
+            'changed': np.bincount(row_cells, weights=finite & (change != 0),
+                                   minlength=n_cells).astype(np.int64),
+            'sum': change_sum,
+            'm2': np.bincount(row_cells, weights=deviation * deviation, minlength=n_cells),
+            'orig_qty': total(df['orig_qty'].to_numpy(dtype=np.float64)),
+            'updated_qty': total(df['updated_qty'].to_numpy(dtype=np.float64))
+        }
+
+        # Missing changes rank below every real one
+        magnitude = np.where(finite, np.abs(change), -1.0)
+        order = np.argsort(row_cells, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(stats['rows'])])
+        top_rows = []
+        top_bounds = np.zeros(n_cells + 1, dtype=np.intp)
+        for cell in range(n_cells):
+            rows = order[bounds[cell]:bounds[cell + 1]]
+            rows = _largest(rows[finite[rows]], magnitude, top_n)
+            top_rows.append(rows)
+            top_bounds[cell + 1] = top_bounds[cell] + len(rows)
+        top_rows = np.concatenate(top_rows) if top_rows else np.empty(0, dtype=np.intp)
+        return cls(labels, keys, row_cells, stats, top_rows, top_bounds, magnitude, top_n)
+
+    def _cells(self, where):
+        """Mask of the cells matching ``{dimension: label}``."""
+        selected = np.ones(len(self), dtype=bool)
+        for name, label in (where or {}).items():
+            position = DIMENSIONS.index(name)
+            try:
+                code = self.labels[name].get_loc(label)
+            except KeyError:
+                return np.zeros(len(self), dtype=bool)
+            selected &= self.keys[:, position] == code
+        return selected
+
+    def rollup(self, dimensions, where=None, relabel=None):
+        """``STAT_COLUMNS`` per group of ``dimensions``, in label order.
+
+        ``where`` restricts the cells to ``{dimension: label}``; rows with
+        a missing value in any of ``dimensions`` are left out, as by
+        ``groupby``. ``relabel`` maps a dimension to a function of its
+        labels, e.g. the month of year of ``Start Month``, to group by the
+        new labels instead. ``std`` has one degree of freedom, as in pandas.
+        """
+        selected = self._cells(where)
+        positions = [DIMENSIONS.index(name) for name in dimensions]
+        keys = self.keys[:, positions]
+        selected &= (keys >= 0).all(axis=1)
+        keys = keys[selected]
+
+        labels = []
+        for column, name in enumerate(dimensions):
+            names = self.labels[name]
+            if relabel and name in relabel:
+                # Cells whose new labels coincide are pooled
+                mapped, names = pd.factorize(relabel[name](names), sort=True)
+                keys[:, column] = mapped[keys[:, column]]
+                names = pd.Index(names)
+            labels.append(names)
+        groups, cell_groups = np.unique(keys, axis=0, return_inverse=True)
+        cell_groups = cell_groups.reshape(-1)
+        n_groups = len(groups)
+
+        def pooled(values):
+            return np.bincount(cell_groups, weights=values[selected], minlength=n_groups)
+
+        count = pooled(self.stats['count'])
+        change_sum = pooled(self.stats['sum'])
+        cell_count = self.stats['count'][selected]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = change_sum / count
+            cell_mean = np.where(cell_count > 0, self.stats['sum'][selected] / cell_count, 0.0)
+            spread = np.where(cell_count > 0, cell_count * (cell_mean - mean[cell_groups]) ** 2, 0.0)
+            m2 = pooled(self.stats['m2']) + np.bincount(cell_groups, weights=spread,
+                                                         minlength=n_groups)
+            std = np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+        if len(dimensions) == 1:
+            index = pd.Index(labels[0][groups[:, 0]], name=dimensions[0])
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [labels[column][groups[:, column]] for column in range(len(dimensions))],
+                names=dimensions)
+        return pd.DataFrame({
+            'rows': pooled(self.stats['rows']).astype(np.int64),
+            'count': count.astype(np.int64),
+            'changed': pooled(self.stats['changed']).astype(np.int64),
+            'sum': change_sum,
+            'mean': mean,
+            'std': std,
+            'orig_qty': pooled(self.stats['orig_qty']),
+            'updated_qty': pooled(self.stats['updated_qty'])
+        }, index=index)
+
+    def top_movers(self, n, where=None):
+        """Result rows of the ``n`` largest absolute changes within ``where``.
+
+        Largest first, ties in result order. ``n`` may not exceed ``top_n``.
+        """
+        if n > self.top_n:
+            raise ValueError(f"The cube keeps the top {self.top_n} movers per cell, not {n}")
+        cells = np.flatnonzero(self._cells(where))
+        candidates = [self.top_rows[self.top_bounds[cell]:self.top_bounds[cell + 1]]
+                      for cell in cells]
+        if not candidates:
+            return np.empty(0, dtype=np.intp)
+        return _largest(np.concatenate(candidates), self.magnitude, n)
+
+    def rows(self, where=None):
+        """Every result row within ``where``, in result order."""
+        return np.flatnonzero(self._cells(where)[self.row_cells])
+
+
+def _largest(rows, magnitude, n):
+    """The ``n`` of ``rows`` with the largest ``magnitude``, largest first."""
+    if len(rows) > n:
+        values = magnitude[rows]
+        cutoff = -np.partition(-values, n - 1)[n - 1]
+        # Ties at the cutoff are kept in result order
+        tied = np.sort(rows[values == cutoff])
+        rows = np.concatenate([rows[values > cutoff], tied[:n - np.count_nonzero(values > cutoff)]])
+    return rows[np.lexsort((rows, -magnitude[rows]))]
@@ -0,0 +1,84 @@
+"""Time the full chart report against the number of worker processes.
+
+Run from the repository root:
+
+    python benchmarks/bench_chart_report.py [rows] [--workers 1 2 4]
+
+"serial" builds and saves every chart one after another in this process,
+as clicking through the chart window and saving each one would. The
+other rows render the same PDF plus PNGs through ``export_chart_report``
+with 1, 2, 4, ... worker processes, up to the number of cores by default.
+Wall time should fall with the worker count until it reaches the cores or
+the number of charts. "parent cpu" is the CPU time the calling process
+spent itself (sending the frame, collecting results, assembling the PDF):
+the part that does not shrink with more workers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_pdf import PdfPages
+
+import chart_report
+import charts
+from bench_rendering import make_comparison
+
+
+def serial_report(comparison, directory, density):
+    charts.apply_theme()
+    df = comparison.enriched()
+    with PdfPages(os.path.join(directory, 'serial.pdf')) as pdf:
+        for chart_type, slug in chart_report.available_charts():
+            fig = charts.build_chart_from_frame(df, chart_type, charts.chart_params(chart_type, density=density))
+            fig.savefig(os.path.join(directory, f"{slug}.png"), bbox_inches='tight',
+                        dpi=chart_report.DEFAULT_DPI)
+            pdf.savefig(fig, dpi=chart_report.DEFAULT_DPI)
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int, nargs='?', default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers())
+    parser.add_argument('--full-detail', action='store_true',
+                        help="draw every point instead of the density views")
+    args = parser.parse_args()
+
+    comparison = make_comparison(args.rows)
+    comparison.enriched()
+    print(f"{args.rows:,} rows, {len(chart_report.available_charts())} charts, "
+          f"{os.cpu_count()} cores")
+    print(f"{'mode':>10} {'seconds':>9} {'speedup':>8} {'parent cpu':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        serial_report(comparison, tmp, not args.full_detail)
+        serial = time.perf_counter() - start
+        print(f"{'serial':>10} {serial:9.2f} {1.0:8.2f}")
+
+        for workers in args.workers:
+            start, cpu = time.perf_counter(), time.process_time()
+            chart_report.export_chart_report(
+                comparison, os.path.join(tmp, 'report.pdf'), os.path.join(tmp, 'png'),
+                density=not args.full_detail, workers=workers)
+            elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+            print(f"{f'{workers} proc':>10} {elapsed:9.2f} {serial / elapsed:8.2f} {cpu:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark the keyed comparison engine against the legacy iterrows loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_compare.py
+
+The engine is timed at doubling row counts; a roughly constant time per
+row shows it scales linearly. The legacy loop is only timed at small sizes
+because it is O(n*m), and its output is used to check the engine matches.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comparison_engine import compare_snapshots
+
+
+def make_snapshots(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    td_no = np.array([f"TD{i:08d}" for i in range(n_rows)], dtype=object)
+    original = pd.DataFrame({
+        'Td No': td_no,
+        'Td Desc': [f"Promotion {i}" for i in range(n_rows)],
+        'Balance Qty': rng.integers(0, 10000, n_rows).astype(float)
+    })
+    updated = original.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    changed = rng.random(n_rows) < 0.3
+    updated.loc[changed, 'Balance Qty'] += rng.integers(-500, 500, int(changed.sum()))
+    # Drop a few promotions and add a few new ones so both sides are exercised
+    updated = updated.iloc[n_rows // 100:]
+    extra = pd.DataFrame({
+        'Td No': [f"NEW{i:08d}" for i in range(n_rows // 100)],
+        'Td Desc': 'New promotion',
+        'Balance Qty': 1.0
+    })
+    return original, pd.concat([updated, extra], ignore_index=True)
+
+
+def legacy_compare(original_df, updated_df):
+    results = []
+    for _, orig_row in original_df.iterrows():
+        td_no = orig_row['Td No']
+        updated_row = updated_df[updated_df['Td No'] == td_no]
+        if not updated_row.empty:
+            orig_qty = float(orig_row['Balance Qty'])
+            updated_qty = float(updated_row.iloc[0]['Balance Qty'])
+            results.append({
+                'td_no': td_no,
+                'td_desc': orig_row['Td Desc'],
+                'orig_qty': orig_qty,
+                'updated_qty': updated_qty,
+                'change': updated_qty - orig_qty
+            })
+    return results
+
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    original, updated = make_snapshots(2000)
+    expected = legacy_compare(original, updated)
+    assert compare_snapshots(original, updated).to_records() == expected
+    print("engine output matches legacy loop on 2,000 rows")
+
+    print(f"{'rows':>10} {'legacy s':>10} {'engine s':>10} {'engine ns/row':>14}")
+    for n_rows in (2000, 4000, 25000, 50000, 100000, 200000, 400000):
+        original, updated = make_snapshots(n_rows)
+        legacy = time_call(legacy_compare, original, updated, repeat=1) if n_rows <= 4000 else None
+        engine = time_call(compare_snapshots, original, updated)
+        legacy_text = f"{legacy:10.3f}" if legacy is not None else f"{'-':>10}"
+        print(f"{n_rows:>10,} {legacy_text} {engine:10.3f} {engine / n_rows * 1e9:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
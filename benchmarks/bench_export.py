@@ -0,0 +1,99 @@
+"""Measure export time and peak memory for every output format.
+
+Run from the repository root:
+
+    python benchmarks/bench_export.py [rows]
+
+Each export runs in its own child process on a fresh comparison of
+``rows`` synthetic promotions (1,000,000 by default). "legacy" is the
+previous Excel export: the whole result frame written through
+``pd.ExcelWriter``. "xlsx" streams the same two sheets into a write-only
+workbook, "xlsx+sheets" adds every optional sheet, and "csv"/"parquet"
+write the result rows only (parquet is skipped without pyarrow). The
+peak RSS column is the growth over the process peak after comparing, i.e.
+what the export itself costs.
+"""
+import importlib.util
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import report
+from bench_compare import make_snapshots
+from comparison_engine import compare_snapshots
+
+MODES = ['legacy', 'xlsx', 'xlsx+sheets', 'csv', 'parquet']
+
+
+def legacy_export(comparison, filename):
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        comparison.to_frame().set_axis(report.RESULT_HEADERS, axis=1).to_excel(
+            writer, sheet_name='Comparison Results', index=False)
+        summary = pd.DataFrame(report.summary_table(comparison.summary()),
+                               columns=['Metric', 'Value'])
+        summary.to_excel(writer, sheet_name='Summary Statistics', index=False)
+
+
+def make_comparison(n_rows):
+    original, updated = make_snapshots(n_rows)
+    rng = np.random.default_rng(0)
+    original['Customer Group'] = rng.choice(['Retail', 'Wholesale', 'Convenience', 'Online'], n_rows)
+    original['Promo Type'] = rng.choice(['Discount', 'BOGO', 'Bundle'], n_rows)
+    return compare_snapshots(original, updated)
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode, n_rows, directory):
+    comparison = make_comparison(n_rows)
+    if mode == 'xlsx+sheets':
+        # Group labels come from the enriched frame; build it before measuring
+        comparison.enriched()
+    before = peak_mb()
+
+    extension = {'legacy': 'xlsx', 'xlsx+sheets': 'xlsx'}.get(mode, mode)
+    filename = os.path.join(directory, f"{mode}.{extension}")
+    start = time.perf_counter()
+    if mode == 'legacy':
+        legacy_export(comparison, filename)
+    elif mode == 'xlsx+sheets':
+        report.export_results(comparison, filename, report.EXTRA_SHEETS)
+    else:
+        report.export_results(comparison, filename)
+    elapsed = time.perf_counter() - start
+
+    size_mb = os.path.getsize(filename) / 1e6
+    print(f"{mode:>12} {len(comparison):>10,} {elapsed:9.2f} {peak_mb() - before:14.0f} {size_mb:9.1f}")
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        return
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'mode':>12} {'rows':>10} {'seconds':>9} {'extra peak MB':>14} {'file MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            if mode == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+                print(f"{mode:>12} skipped: pyarrow is not installed")
+                continue
+            # Fresh processes keep each mode's peak RSS separate
+            subprocess.run([sys.executable, __file__, '--child', mode, str(n_rows), tmp],
+                           check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time incremental re-comparison against a full one as the edit grows.
+
+Run from the repository root:
+
+    python benchmarks/bench_incremental.py [rows]
+
+The updated snapshot is edited in two ways: "qty" changes the Balance Qty
+of ``edit`` random rows in place, "rows" replaces ``edit`` rows in the
+middle with new promotions, which moves every row after them. "full" is
+``compare_snapshots`` plus the summary; "incremental" is
+``IncrementalComparison.update`` from the previous result with its key
+indexes already built. Besides the row diff, which compares the two
+snapshots position by position, the incremental time should grow with
+the edit rather than with the rows.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_compare import make_snapshots
+from comparison_engine import compare_snapshots
+from incremental import IncrementalComparison
+
+EDIT_SIZES = [10, 1_000, 100_000]
+
+
+def edit_quantities(updated, n_edit, rng):
+    edited = updated.copy()
+    rows = rng.choice(len(edited), n_edit, replace=False)
+    edited.loc[rows, 'Balance Qty'] += rng.integers(1, 100, n_edit)
+    return edited
+
+
+def edit_rows(updated, n_edit, rng):
+    middle = len(updated) // 2
+    inserted = pd.DataFrame({
+        'Td No': [f"EDIT{i:08d}" for i in range(n_edit)],
+        'Td Desc': 'Edited promotion',
+        'Balance Qty': rng.integers(0, 10000, n_edit).astype(float)
+    })
+    # Drops one row fewer than it inserts, so everything after moves
+    return pd.concat([updated.iloc[:middle], inserted,
+                      updated.iloc[middle + n_edit - 1:]], ignore_index=True)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    original, updated = make_snapshots(n_rows)
+    outcome = compare_snapshots(original, updated)
+    outcome.summary()
+    base = IncrementalComparison(outcome, updated).prepare()
+    rng = np.random.default_rng(0)
+
+    print(f"{n_rows:,} rows")
+    print(f"{'edit':>6} {'rows':>8} {'full':>8} {'incremental':>12}")
+    for kind, make_edit in (('qty', edit_quantities), ('rows', edit_rows)):
+        for n_edit in EDIT_SIZES:
+            edited = make_edit(updated, n_edit, rng)
+
+            start = time.perf_counter()
+            full = compare_snapshots(original, edited)
+            full.summary()
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            update = base.update(edited)
+            incremental_time = time.perf_counter() - start
+
+            if update is None:
+                print(f"{kind:>6} {n_edit:>8,} {full_time:8.3f} {'full redo':>12}")
+                continue
+            assert update[0].outcome.summary().changed == full.summary().changed
+            print(f"{kind:>6} {n_edit:>8,} {full_time:8.3f} {incremental_time:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
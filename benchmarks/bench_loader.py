@@ -0,0 +1,84 @@
+"""Measure load time and peak memory of the chunked file loader.
+
+Run from the repository root:
+
+    python benchmarks/bench_loader.py [rows]
+
+A synthetic export with every README column is written to a temporary TSV
+(1,000,000 rows by default). Each loader runs in its own child process so
+the reported peak RSS is not polluted by the other one. ``paste`` mimics
+the Text widget path: the whole file as one string fed to ``parse_text``.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from snapshot_loader import load_snapshot, parse_text
+
+
+def write_export(path, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    end = start + pd.to_timedelta(rng.integers(7, 90, n_rows), unit='D')
+    plan = rng.integers(100, 10000, n_rows)
+    issue = (plan * rng.random(n_rows)).astype(int)
+    df = pd.DataFrame({
+        'Td No': [f"TD{i:08d}" for i in range(n_rows)],
+        'Td Desc': [f"Promotion description {i % 5000}" for i in range(n_rows)],
+        'Customer Group': rng.choice(['Retail', 'Wholesale', 'Convenience', 'Online'], n_rows),
+        'Start Date': start.strftime('%Y-%m-%d'),
+        'End Date': end.strftime('%Y-%m-%d'),
+        'Qualify Group': rng.choice(['QG1', 'QG2', 'QG3'], n_rows),
+        'Assign Group': rng.choice(['AG1', 'AG2', 'AG3'], n_rows),
+        'Promo Type': rng.choice(['Discount', 'BOGO', 'Bundle'], n_rows),
+        'Plan Qty': plan,
+        'Issue Qty': issue,
+        'Balance Qty': plan - issue
+    })
+    df.to_csv(path, sep='\t', index=False)
+
+
+def run_child(mode, path):
+    start = time.perf_counter()
+    if mode == 'file':
+        df = load_snapshot(path)
+    else:
+        with open(path) as handle:
+            df = parse_text(handle.read())
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{mode:>6} {len(df):>10,} {elapsed:9.2f} {peak_mb:12.0f} {frame_mb:10.0f}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--write':
+        write_export(sys.argv[2], int(sys.argv[3]))
+        return
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.tsv')
+        # Every step runs in a fresh process: on Linux a child inherits the
+        # parent's peak RSS, so generating the data here would skew it.
+        subprocess.run([sys.executable, __file__, '--write', path, str(n_rows)], check=True)
+        print(f"file size: {os.path.getsize(path) / 1e6:.0f} MB")
+        print(f"{'mode':>6} {'rows':>10} {'seconds':>9} {'peak RSS MB':>12} {'frame MB':>10}")
+        for mode in ('paste', 'file'):
+            subprocess.run([sys.executable, __file__, '--child', mode, path], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare peak memory of the in-memory and the out-of-core comparison.
+
+Run from the repository root:
+
+    python benchmarks/bench_out_of_core.py [rows ...]
+
+For each size a snapshot pair from ``generate_snapshots`` is written as
+TSV and compared, then exported to CSV, once with ``load_snapshot`` plus
+``compare_snapshots`` and once with ``compare_partitioned``. Each mode
+runs in its own child process, so the peak RSS it reports is its own.
+The in-memory peak grows with the rows; the out-of-core peak should
+stay roughly flat.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ['in-memory', 'out-of-core']
+DEFAULT_SIZES = [250_000, 1_000_000, 2_000_000]
+
+
+def peak_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode, directory):
+    import report
+    original = os.path.join(directory, 'original.tsv')
+    updated = os.path.join(directory, 'updated.tsv')
+    out = os.path.join(directory, f"{mode}.csv")
+    before = peak_mb()
+
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        from comparison_engine import compare_snapshots
+        from snapshot_loader import load_snapshot
+        outcome = compare_snapshots(load_snapshot(original), load_snapshot(updated))
+        outcome.summary()
+        report.export_results(outcome, out)
+        total = len(outcome)
+    else:
+        from out_of_core import compare_partitioned
+        with compare_partitioned(original, updated, spill_dir=directory) as outcome:
+            report.export_partitioned(outcome, out)
+            total = len(outcome)
+    elapsed = time.perf_counter() - start
+    print(f"{mode:>12} {total:>10,} {elapsed:9.2f} {peak_mb() - before:12.0f}", flush=True)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'mode':>12} {'results':>10} {'seconds':>9} {'peak MB':>12}")
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Generated in a child too: a forked child inherits the parent's peak RSS
+            subprocess.run([sys.executable, os.path.join(os.path.dirname(__file__),
+                                                         'generate_snapshots.py'),
+                            tmp, '--rows', str(n_rows)], check=True, stdout=subprocess.DEVNULL)
+            for mode in MODES:
+                subprocess.run([sys.executable, __file__, '--child', mode, tmp], check=True)
+
+
+if __name__ == "__main__":
+    main()
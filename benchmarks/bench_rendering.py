@@ -0,0 +1,82 @@
+"""Time the point-heavy charts with density views on and off.
+
+Run from the repository root:
+
+    python benchmarks/bench_rendering.py [rows ...]
+
+Each chart is built, rasterized with Agg at screen resolution (what the
+Tk canvas shows) and saved as a 300 dpi PNG (what "Save Chart" writes).
+"full" is the previous output, one marker per promotion; "density"
+switches to hexbins, precomputed box statistics and LTTB-downsampled
+lines once the row count passes ``DENSITY_THRESHOLD``.
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import charts
+from bench_compare import make_snapshots
+from chart_rendering import DENSITY_THRESHOLD, RenderPolicy
+from comparison_engine import compare_snapshots
+
+CHARTS = [
+    ("Top Changes", charts.create_top_changes_chart),
+    ("Customer Group Analysis", charts.create_customer_group_analysis),
+    ("Timeline Analysis", charts.create_timeline_analysis),
+    ("Quantity Range Analysis", charts.create_quantity_range_analysis),
+    ("Change Patterns", charts.create_change_patterns),
+]
+
+
+def make_comparison(n_rows, seed=0):
+    original, updated = make_snapshots(n_rows, seed)
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01') + rng.integers(0, 365, n_rows)
+    original['Customer Group'] = rng.choice(['Retail', 'Wholesale', 'Online', 'Export'], n_rows)
+    original['Start Date'] = start.astype(str)
+    original['End Date'] = (start + rng.integers(7, 90, n_rows)).astype(str)
+    return compare_snapshots(original, updated)
+
+
+def render(create, df, policy):
+    timings = []
+    start = time.perf_counter()
+    fig = create(df, policy=policy)
+    fig.tight_layout()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    FigureCanvasAgg(fig).draw()
+    timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    fig.savefig(io.BytesIO(), format='png', dpi=300, bbox_inches='tight')
+    timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 200_000]
+    print(f"density threshold: {DENSITY_THRESHOLD:,} rows")
+    print(f"{'rows':>8} {'chart':<24} {'mode':<8} {'build s':>8} {'draw s':>8} {'save s':>8} {'total s':>8}")
+    for n_rows in sizes:
+        df = make_comparison(n_rows).enriched()
+        for name, create in CHARTS:
+            for mode, policy in (("full", RenderPolicy(enabled=False)), ("density", RenderPolicy())):
+                build, draw, save = render(create, df, policy)
+                print(f"{n_rows:>8,} {name:<24} {mode:<8} {build:8.2f} {draw:8.2f} {save:8.2f}"
+                      f" {build + draw + save:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare memory per row of list-of-dicts results against ComparisonOutcome.
+
+Run from the repository root:
+
+    python benchmarks/bench_results_memory.py [rows]
+
+"dicts" is what the dashboard used to hold in ``comparison_results`` and
+rebuilt into a DataFrame for every chart; "columnar" is the
+``ComparisonOutcome`` it holds now. Strings are shared with the source
+snapshot in both layouts and are not counted. It is run once with unique
+descriptions and once with descriptions that repeat.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_compare import make_snapshots
+from comparison_engine import compare_snapshots
+
+
+def traced_bytes(func):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def column_bytes(outcome):
+    td_desc = outcome.td_desc
+    desc_bytes = td_desc.nbytes if isinstance(td_desc, np.ndarray) else td_desc.memory_usage(deep=False)
+    return outcome.quantities.nbytes + outcome.td_no.nbytes + desc_bytes
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(label, original, updated):
+    outcome = compare_snapshots(original, updated)
+    n_rows = len(outcome)
+    records, record_bytes = traced_bytes(outcome.to_records)
+    columnar_bytes = column_bytes(outcome)
+
+    rebuild_ms = timed(lambda: pd.DataFrame(records))
+    first_view_ms = timed(outcome.to_frame)
+    view_ms = timed(lambda: outcome.to_frame().copy(deep=False))
+
+    print(f"{label}: {n_rows:,} result rows, td_desc stored as {type(outcome.td_desc).__name__}")
+    print(f"  dicts     {record_bytes / n_rows:8.1f} bytes/row   DataFrame rebuild {rebuild_ms:8.1f} ms")
+    print(f"  columnar  {columnar_bytes / n_rows:8.1f} bytes/row   first to_frame {first_view_ms:8.1f} ms,"
+          f" later views {view_ms:.2f} ms")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    original, updated = make_snapshots(n_rows)
+    run("unique descriptions", original, updated)
+
+    repeated = [f"Promotion {i % 5000}" for i in range(len(original))]
+    original = original.assign(**{'Td Desc': repeated})
+    run("5,000 distinct descriptions", original, updated)
+
+
+if __name__ == "__main__":
+    main()
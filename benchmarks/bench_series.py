@@ -0,0 +1,64 @@
+"""Time the snapshot series against repeated pairwise comparisons.
+
+Run from the repository root:
+
+    python benchmarks/bench_series.py [rows] [snapshots]
+
+"pairwise" is what tracking N snapshots cost before: one
+``compare_snapshots`` call per consecutive pair, leaving the per-promotion
+history to be stitched together afterwards. "series" aligns all snapshots
+once with ``build_series`` and computes deltas, burn rates and movers for
+every promotion in one pass. The net change of each promotion is checked
+against the sum of the pairwise changes.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_compare import make_snapshots
+from comparison_engine import compare_snapshots
+from snapshot_series import build_series
+
+
+def make_series(n_rows, n_snapshots):
+    original, _ = make_snapshots(n_rows)
+    rng = np.random.default_rng(1)
+    snapshots = [original]
+    for _ in range(n_snapshots - 1):
+        step = snapshots[-1].copy()
+        step['Balance Qty'] = step['Balance Qty'] - rng.integers(0, 20, n_rows)
+        snapshots.append(step)
+    return snapshots
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    n_snapshots = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    snapshots = make_series(n_rows, n_snapshots)
+
+    start = time.perf_counter()
+    outcomes = [compare_snapshots(a, b) for a, b in zip(snapshots, snapshots[1:])]
+    pairwise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    series = build_series(snapshots)
+    summary = series.summary()
+    series.largest_movers(20)
+    vectorized = time.perf_counter() - start
+
+    net = sum(outcome.change.sum() for outcome in outcomes)
+    assert np.isclose(summary['net_change'].sum(), net)
+
+    print(f"{n_rows:,} promotions x {n_snapshots} snapshots")
+    print(f"{'mode':>10} {'seconds':>9}")
+    print(f"{'pairwise':>10} {pairwise:9.2f}")
+    print(f"{'series':>10} {vectorized:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
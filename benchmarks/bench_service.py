@@ -0,0 +1,130 @@
+"""Load-test the comparison service with concurrent local clients.
+
+Run from the repository root:
+
+    python benchmarks/bench_service.py [--rows 100000] [--clients 1 4 16]
+                                       [--seconds 10]
+
+Starts ``promotion_analysis.py serve`` on a free port, uploads a snapshot
+pair from ``generate_snapshots`` and times the first (cold) comparison
+against a repeated one served from the cache, and the first rendering of
+a chart against a cached one. Then every client count runs the mix a
+dashboard produces while scrolling and switching views: labels for a
+screenful of rows, the summary and a cached chart, once over keep-alive
+connections and once with a new connection per request. Prints
+requests per second and p50/p95 latency.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_snapshots import write_snapshots
+from service_client import ServiceClient
+
+DEFAULT_CLIENTS = [1, 4, 16]
+# Rows the results grid shows at once
+SCREEN_ROWS = 40
+
+
+def start_server():
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'promotion_analysis.py'), 'serve', '--port', '0'],
+        stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith('Serving on'):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line}")
+    return process, line.split()[2]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def client_loop(url, comparison_id, n_rows, keep_alive, deadline, latencies):
+    client = ServiceClient(url)
+    headers = None if keep_alive else {'Connection': 'close'}
+    rng = random.Random()
+    requests = [
+        lambda: client.request('POST', f"/comparisons/{comparison_id}/labels",
+                               {'indices': list(range(start, min(start + SCREEN_ROWS, n_rows)))},
+                               headers),
+        lambda: client.request('GET', f"/comparisons/{comparison_id}/summary", headers=headers),
+        lambda: client.request('GET', f"/comparisons/{comparison_id}/charts/distribution",
+                               headers=headers)
+    ]
+    while time.perf_counter() < deadline:
+        start = rng.randrange(max(n_rows - SCREEN_ROWS, 1))
+        begin = time.perf_counter()
+        rng.choice(requests)()
+        latencies.append(time.perf_counter() - begin)
+
+
+def run_load(url, comparison_id, n_rows, clients, keep_alive, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client_loop,
+                                args=(url, comparison_id, n_rows, keep_alive, deadline, latencies))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    milliseconds = np.array(latencies) * 1000
+    mode = 'keep-alive' if keep_alive else 'new conn'
+    print(f"{clients:>8} {mode:<11} {len(latencies) / seconds:9.0f} "
+          f"{np.percentile(milliseconds, 50):9.1f} {np.percentile(milliseconds, 95):9.1f}",
+          flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the comparison service.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--clients', type=int, nargs='+', default=DEFAULT_CLIENTS)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    process, url = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            original_path, updated_path = write_snapshots(tmp, args.rows)
+            client = ServiceClient(url)
+            original, upload = timed(client.upload_file, original_path)
+            updated, _ = timed(client.upload_file, updated_path)
+            _, cached_upload = timed(client.upload_file, original_path)
+
+        comparison, cold = timed(client.compare, original, updated)
+        _, warm = timed(client.compare, original, updated)
+        params = {'density': True}
+        _, chart_cold = timed(comparison.chart_png, "Distribution of Changes", params)
+        _, chart_warm = timed(comparison.chart_png, "Distribution of Changes", params)
+        print(f"{args.rows:,} rows")
+        print(f"{'upload':<16} {upload:8.3f} s, {cached_upload:8.3f} s when cached")
+        print(f"{'compare':<16} {cold:8.3f} s, {warm:8.3f} s when cached")
+        print(f"{'chart':<16} {chart_cold:8.3f} s, {chart_warm:8.3f} s when cached")
+
+        print(f"\n{'clients':>8} {'connection':<11} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for clients in args.clients:
+            for keep_alive in (True, False):
+                run_load(url, comparison.id, len(comparison), clients, keep_alive, args.seconds)
+        print(f"\n{client.stats()}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Check that importing the dashboard stays fast.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--budget MS] [--runs N]
+
+Each run imports ``dashboard`` in a fresh interpreter with
+``-X importtime`` and reads the cumulative import time. The best of the
+runs is compared against the budget, and the run fails if any of the
+heavy modules the dashboard defers (pandas, matplotlib, seaborn,
+openpyxl) was imported at startup. The eager import set the dashboard
+used to load is timed the same way for reference.
+
+Then ``PromotionAnalysisGUI`` is built on a withdrawn ``Tk()`` root, again
+in a fresh interpreter and before the event loop runs the background
+prefetch, and the deferred modules must still be missing from
+``sys.modules``. This step is skipped when there is no display.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 200
+DEFERRED_MODULES = ['pandas', 'matplotlib', 'seaborn', 'openpyxl']
+EAGER_IMPORTS = ("import tkinter.ttk, pandas, numpy, matplotlib.pyplot, seaborn, "
+                 "matplotlib.backends.backend_tkagg")
+# Builds the window without a server, prints JSON: ms and deferred modules loaded
+CONSTRUCT_GUI = """
+import json, sys, time, tkinter
+try:
+    root = tkinter.Tk()
+except tkinter.TclError as e:
+    print(json.dumps({'skipped': str(e)}))
+    sys.exit()
+root.withdraw()
+start = time.perf_counter()
+import dashboard
+dashboard.PromotionAnalysisGUI(root)
+ms = (time.perf_counter() - start) * 1000
+print(json.dumps({'ms': ms, 'loaded': [name for name in %r if name in sys.modules]}))
+root.destroy()
+""" % (DEFERRED_MODULES,)
+
+
+def import_profile(statement):
+    """Return (total ms, {module: cumulative ms}) for one cold import."""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    total = 0.0
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        ms = int(cumulative) / 1000
+        # Nested imports are indented; only top-level ones add to the total
+        if not name[1:].startswith(' '):
+            total += ms
+        modules[name.strip()] = ms
+    return total, modules
+
+
+def best_of(statement, runs):
+    return min((import_profile(statement) for _ in range(runs)), key=lambda result: result[0])
+
+
+def construct_gui():
+    """Result of ``CONSTRUCT_GUI`` in a fresh interpreter."""
+    env = {key: value for key, value in os.environ.items() if key != 'PROMOTION_SERVER'}
+    output = subprocess.run([sys.executable, '-c', CONSTRUCT_GUI], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"maximum import time in ms (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # Interpreter startup imports (site, encodings) show up in every profile
+    baseline, _ = best_of('pass', args.runs)
+    total, modules = best_of('import dashboard', args.runs)
+    eager_total, _ = best_of(EAGER_IMPORTS, args.runs)
+    total -= baseline
+    eager_total -= baseline
+
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:8]
+    print(f"import dashboard: {total:7.1f} ms (budget {args.budget:.0f} ms)")
+    print(f"previous eager imports: {eager_total:7.1f} ms")
+    print("slowest modules (cumulative ms):")
+    for name, ms in slowest:
+        print(f"  {name:<40} {ms:7.1f}")
+
+    failures = []
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    gui = construct_gui()
+    if 'skipped' in gui:
+        print(f"construct PromotionAnalysisGUI: skipped ({gui['skipped']})")
+    else:
+        print(f"construct PromotionAnalysisGUI: {gui['ms']:7.1f} ms")
+        if gui['loaded']:
+            failures.append("deferred modules imported building the window: "
+                            + ', '.join(gui['loaded']))
+    if total > args.budget:
+        failures.append(f"import time {total:.1f} ms is over the {args.budget:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Time reopening snapshots and comparisons from the snapshot store.
+
+Run from the repository root:
+
+    python benchmarks/bench_store.py [rows]
+
+Two synthetic TSV exports of ``rows`` promotions are written to a
+temporary directory. "parse" is a fresh session: both files parsed and
+compared. "first store" is the same through an empty ``SnapshotStore``,
+which also pays for saving. "reopen" loads both snapshots again from the
+store and replays the stored join, as any later session does, and
+"recompare" compares two snapshots already in memory again. "new pair"
+compares the two stored snapshots the other way round, a pair with no
+stored join, by merging their stored ``Td No`` orders; "hash join" is the
+same comparison without the store.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_compare import make_snapshots
+from comparison_engine import compare_snapshots
+from snapshot_loader import load_snapshot
+from snapshot_store import SnapshotStore
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        original_path = os.path.join(tmp, 'original.tsv')
+        updated_path = os.path.join(tmp, 'updated.tsv')
+        original, updated = make_snapshots(n_rows)
+        original.to_csv(original_path, sep='\t', index=False)
+        updated.to_csv(updated_path, sep='\t', index=False)
+        del original, updated
+
+        store = SnapshotStore(os.path.join(tmp, 'store.db'))
+
+        def parse():
+            return compare_snapshots(load_snapshot(original_path), load_snapshot(updated_path))
+
+        def through_store():
+            return store.compare(store.load_file(original_path), store.load_file(updated_path))
+
+        expected, parse_time = timed(parse)
+        _, first_time = timed(through_store)
+        reopened, reopen_time = timed(through_store)
+        original_df, updated_df = reopened.original_df, store.load_file(updated_path)
+        _, recompare_time = timed(lambda: store.compare(original_df, updated_df))
+        assert reopened.summary() == expected.summary()
+        merged, new_pair_time = timed(lambda: store.compare(updated_df, original_df))
+        hashed, hash_time = timed(lambda: compare_snapshots(updated_df, original_df))
+        assert merged.summary() == hashed.summary()
+
+        print(f"{n_rows:,} rows, store {store.total_bytes() / 1e6:.0f} MB")
+        print(f"{'mode':>12} {'seconds':>9}")
+        for mode, seconds in (('parse', parse_time), ('first store', first_time),
+                              ('reopen', reopen_time), ('recompare', recompare_time),
+                              ('new pair', new_pair_time), ('hash join', hash_time)):
+            print(f"{mode:>12} {seconds:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Time every stage of a comparison headlessly and write the results as JSON.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py [--sizes 10000 100000 1000000] [--out results.json]
+                                     [--baseline previous.json]
+
+For every size a snapshot pair from ``generate_snapshots`` is written as
+TSV, then each stage the GUI runs is timed on it: loading both files and
+parsing the same exports as pasted text, comparing, building the filter
+views, the search and sort indexes and a few lookups, the analysis
+tables, the enriched chart frame and its aggregation cube, every chart
+(built and rasterized with Agg) and each export format. Every stage then
+runs a second time under ``tracemalloc`` for its peak memory, so the
+timings do not include the tracing overhead; ``--no-memory`` skips that
+pass.
+
+The JSON holds one record per size and stage plus the commit, Python,
+NumPy and pandas versions. ``--baseline`` prints each stage's time as a
+ratio of an earlier run, which makes a regression stand out.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import charts
+import report
+from chart_report import available_charts
+from comparison_engine import compare_snapshots
+from generate_snapshots import write_snapshots
+from snapshot_loader import load_snapshot, parse_text
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+EXPORT_FORMATS = ['xlsx', 'csv']
+# Rows the results grid shows at once
+SCREEN_ROWS = 40
+
+
+def stages(original_path, updated_path, directory):
+    """``(name, func)`` pairs in pipeline order; each func takes the shared state dict."""
+    def load(state):
+        state['original_df'] = load_snapshot(original_path)
+        state['updated_df'] = load_snapshot(updated_path)
+
+    def paste(state):
+        parse_text(state['original_text'])
+        parse_text(state['updated_text'])
+
+    def compare(state):
+        outcome = compare_snapshots(state['original_df'], state['updated_df'])
+        outcome.summary()
+        state['outcome'] = outcome
+
+    def filter_views(state):
+        # What "Compare Data" and the filters compute, then the first screenful
+        outcome = state['outcome']
+        changes = outcome.changes()
+        views = [np.flatnonzero(outcome.change != 0), changes.rows()]
+        views += [changes.rows([column]) for column in changes.columns]
+        for view in views:
+            outcome.rows(view[:SCREEN_ROWS])
+            changes.names(view[:SCREEN_ROWS])
+
+    def index(state):
+        state['outcome']._search_index = None
+        state['outcome'].search_index().prepare()
+
+    def search(state):
+        # A Td No prefix, a description fragment and a re-sort of the changes
+        outcome = state['outcome']
+        index = outcome.search_index()
+        index.search(outcome.td_no[len(outcome) // 2][:-2])
+        index.search('motion 1')
+        index.sorted_view(np.flatnonzero(outcome.change != 0), 'change', descending=True)
+
+    def analysis(state):
+        outcome = state['outcome']
+        outcome._summary = None
+        summary = outcome.summary()
+        report.summary_lines(summary)
+        report.analysis_items(summary)
+        report.column_change_items(outcome.changes().counts())
+
+    def enrich(state):
+        state['outcome']._enriched = None
+        state['outcome'].enriched()
+
+    def cube(state):
+        state['outcome']._cube = None
+        state['outcome'].cube()
+
+    def chart(chart_type):
+        def run(state):
+            fig = charts.build_chart(state['outcome'], chart_type, charts.chart_params(chart_type))
+            FigureCanvasAgg(fig).draw()
+        return run
+
+    def export(extension):
+        def run(state):
+            report.export_results(state['outcome'], os.path.join(directory, f"results.{extension}"))
+        return run
+
+    return ([('load', load), ('paste', paste), ('compare', compare),
+             ('filter', filter_views), ('index', index), ('search', search),
+             ('analysis', analysis), ('enrich', enrich),
+             ('cube', cube)]
+            + [(f"chart:{slug}", chart(chart_type)) for chart_type, slug in available_charts()]
+            + [(f"export:{extension}", export(extension)) for extension in EXPORT_FORMATS])
+
+
+def run_size(n_rows, memory=True, seed=0):
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        original_path, updated_path = write_snapshots(tmp, n_rows, seed=seed)
+        generate_time = time.perf_counter() - start
+        state = {}
+        with open(original_path) as f:
+            state['original_text'] = f.read()
+        with open(updated_path) as f:
+            state['updated_text'] = f.read()
+
+        records = []
+        for name, func in stages(original_path, updated_path, tmp):
+            gc.collect()
+            start = time.perf_counter()
+            func(state)
+            seconds = time.perf_counter() - start
+
+            peak_mb = None
+            if memory:
+                gc.collect()
+                tracemalloc.start()
+                func(state)
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+
+            records.append({'rows': n_rows, 'stage': name, 'seconds': round(seconds, 4),
+                            'peak_mb': None if peak_mb is None else round(peak_mb, 1)})
+            print(f"{n_rows:>10,} {name:<24} {seconds:9.3f} "
+                  f"{'-' if peak_mb is None else f'{peak_mb:.0f}':>9}", flush=True)
+        print(f"{n_rows:>10,} {'(generate)':<24} {generate_time:9.3f}", flush=True)
+        return records
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['rows'], r['stage']): r['seconds'] for r in baseline['results']}
+    print(f"\nAgainst {baseline_path} ({baseline['environment'].get('commit')}):")
+    print(f"{'rows':>10} {'stage':<24} {'before':>9} {'now':>9} {'ratio':>7}")
+    for record in results:
+        before = previous.get((record['rows'], record['stage']))
+        if before is None:
+            continue
+        ratio = record['seconds'] / before if before else float('inf')
+        print(f"{record['rows']:>10,} {record['stage']:<24} {before:9.3f} "
+              f"{record['seconds']:9.3f} {ratio:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of a comparison.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--out', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file of an earlier run to compare with")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory pass")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    charts.apply_theme()
+    # The tick label warnings of some charts would bury the table
+    warnings.filterwarnings('ignore', category=UserWarning, module='charts')
+    print(f"{'rows':>10} {'stage':<24} {'seconds':>9} {'peak MB':>9}")
+    results = []
+    for n_rows in args.sizes:
+        results += run_size(n_rows, not args.no_memory, args.seed)
+
+    output = {'environment': environment(), 'seed': args.seed, 'results': results}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(output, f, indent=1)
+        print(f"Results written to {args.out}", file=sys.stderr)
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
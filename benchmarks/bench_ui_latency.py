@@ -0,0 +1,124 @@
+"""Measure UI event latency while a large comparison runs in the background.
+
+Run from the repository root:
+
+    python benchmarks/bench_ui_latency.py [rows]
+
+A 10 ms ``after`` ticker runs on the event loop while the dashboard's
+comparison job (parse, join, records, summary) processes ``rows`` rows
+(500,000 by default) through ``JobRunner``. The lateness of each tick is
+the time an event would have waited for the UI thread; the budget is
+50 ms. Without a display a sleep-driven loop stands in for Tk: the only
+way a worker thread can delay the Tk loop is by holding the GIL, and that
+shows up the same way.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tkinter as tk
+
+from bench_compare import make_snapshots
+from job_runner import JobRunner
+from dashboard import PromotionAnalysisGUI
+
+TICK_MS = 10
+BUDGET_MS = 50
+
+
+class SleepLoop:
+    """Minimal stand-in for ``tk.Tk`` supporting ``after``/``mainloop``."""
+
+    def __init__(self):
+        self._pending = {}
+        self._next_id = 0
+        self._running = False
+
+    def after(self, ms, func):
+        self._next_id += 1
+        self._pending[self._next_id] = (time.perf_counter() + ms / 1000, func)
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self._pending.pop(after_id, None)
+
+    def quit(self):
+        self._running = False
+
+    def mainloop(self):
+        self._running = True
+        while self._running:
+            if not self._pending:
+                time.sleep(0.001)
+                continue
+            after_id = min(self._pending, key=lambda key: self._pending[key][0])
+            due, func = self._pending.pop(after_id)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            func()
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    original, updated = make_snapshots(n_rows)
+
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        loop = "tk"
+    except tk.TclError:
+        root = SleepLoop()
+        loop = "sleep (no display)"
+
+    # run_comparison only needs the instance, not the widgets
+    gui = object.__new__(PromotionAnalysisGUI)
+    jobs = JobRunner(root)
+    lateness = []
+    state = {'done': False, 'expected': None}
+
+    def tick():
+        if state['expected'] is not None:
+            lateness.append((time.perf_counter() - state['expected']) * 1000)
+        if state['done']:
+            root.quit()
+            return
+        state['expected'] = time.perf_counter() + TICK_MS / 1000
+        root.after(TICK_MS, tick)
+
+    def finished(result):
+        state['done'] = True
+        state['elapsed'] = time.perf_counter() - state['start']
+
+    def failed(error):
+        state['done'] = True
+        state['error'] = error
+
+    state['start'] = time.perf_counter()
+    jobs.submit('compare', gui.run_comparison, '', '',
+                {'original': original, 'updated': updated},
+                on_done=finished, on_error=failed)
+    tick()
+    root.mainloop()
+    jobs.shutdown()
+
+    if 'error' in state:
+        raise state['error']
+
+    lateness.sort()
+    p99 = lateness[int(len(lateness) * 0.99) - 1] if lateness else 0.0
+    print(f"event loop: {loop}")
+    print(f"rows: {n_rows:,}  comparison wall time: {state['elapsed']:.2f} s")
+    print(f"ticks: {len(lateness)}  median late: {lateness[len(lateness) // 2]:.1f} ms"
+          f"  p99: {p99:.1f} ms  max: {lateness[-1]:.1f} ms  (budget {BUDGET_MS} ms)")
+    if lateness[-1] > BUDGET_MS:
+        print("OVER BUDGET")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Deterministic synthetic promotion exports for benchmarks.
+
+Run from the repository root to write a pair of TSV snapshots:
+
+    python benchmarks/generate_snapshots.py out_dir --rows 100000 [--seed 0]
+
+``generate_snapshots`` returns the same two DataFrames for the same
+arguments and seed, with every column of a real export as text. The
+updated snapshot issues stock against ``change_rate`` of the promotions
+(Issue Qty up, Balance Qty down by the same amount), reassigns a few
+promo types and extends a few end dates, drops ``churn`` of the
+promotions and adds as many new ones. ``duplicate_rate`` of the rows
+repeat an earlier ``Td No`` and ``missing_key_rate`` have none, as the
+exports sometimes do.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Td No', 'Td Desc', 'Customer Group', 'Start Date', 'End Date',
+           'Qualify Group', 'Assign Group', 'Promo Type', 'Plan Qty', 'Issue Qty',
+           'Balance Qty']
+
+PROMO_TYPES = ['Discount', 'Bundle', 'Free Gift', 'Cashback', 'Voucher', 'Clearance',
+               'Loyalty', 'Seasonal']
+FIRST_DATE = np.datetime64('2024-01-01')
+
+
+def generate_snapshots(n_rows, change_rate=0.3, customer_groups=12, promo_types=5,
+                       date_span_days=365, duplicate_rate=0.01, missing_key_rate=0.002,
+                       churn=0.01, shuffle=False, seed=0):
+    """``(original, updated)`` DataFrames of ``n_rows`` synthetic promotions."""
+    rng = np.random.default_rng(seed)
+    original = _promotions(rng, n_rows, 0, customer_groups, promo_types, date_span_days)
+
+    td_no = original['Td No'].to_numpy()
+    duplicates = np.flatnonzero(rng.random(n_rows) < duplicate_rate)
+    duplicates = duplicates[duplicates > 0]
+    td_no[duplicates] = td_no[rng.integers(0, duplicates)]
+    td_no[rng.random(n_rows) < missing_key_rate] = ''
+    original['Td No'] = td_no
+
+    updated = original.copy()
+    plan = updated['Plan Qty'].to_numpy()
+    issue = updated['Issue Qty'].to_numpy().copy()
+    issued = rng.random(n_rows) < change_rate
+    balance = plan - issue
+    issue[issued] += (balance[issued] * rng.random(int(issued.sum())) * 0.5).astype(np.int64)
+    # A few corrections return stock, so decreases and increases both occur
+    returned = issued & (rng.random(n_rows) < 0.1)
+    issue[returned] = np.maximum(issue[returned] - rng.integers(1, 50, int(returned.sum())), 0)
+    updated['Issue Qty'] = issue
+    updated['Balance Qty'] = plan - issue
+
+    retyped = np.flatnonzero(rng.random(n_rows) < change_rate / 20)
+    updated.loc[retyped, 'Promo Type'] = rng.choice(PROMO_TYPES[:promo_types], len(retyped))
+    extended = np.flatnonzero(rng.random(n_rows) < change_rate / 10)
+    updated.loc[extended, 'End Date'] += pd.to_timedelta(rng.integers(7, 60, len(extended)),
+                                                         unit='D')
+
+    n_churn = int(n_rows * churn)
+    kept = np.sort(rng.choice(n_rows, n_rows - n_churn, replace=False))
+    added = _promotions(rng, n_churn, n_rows, customer_groups, promo_types, date_span_days)
+    updated = pd.concat([updated.iloc[kept], added], ignore_index=True)
+    if shuffle:
+        updated = updated.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    return _as_text(original), _as_text(updated)
+
+
+def write_snapshots(directory, n_rows, **options):
+    """Write ``original.tsv`` and ``updated.tsv`` to ``directory``; returns both paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, df in zip(('original', 'updated'), generate_snapshots(n_rows, **options)):
+        path = os.path.join(directory, f"{name}.tsv")
+        df.to_csv(path, sep='\t', index=False)
+        paths.append(path)
+    return paths
+
+
+def _promotions(rng, n_rows, first_id, customer_groups, promo_types, date_span_days):
+    ids = np.arange(first_id, first_id + n_rows)
+    start = FIRST_DATE + rng.integers(0, date_span_days, n_rows)
+    plan = rng.integers(100, 10_000, n_rows)
+    groups = np.array([f"CG{i:02d}" for i in range(customer_groups)], dtype=object)
+    return pd.DataFrame({
+        'Td No': np.array([f"TD{i:08d}" for i in ids], dtype=object),
+        'Td Desc': np.array([f"Promotion {i % 5000}" for i in ids], dtype=object),
+        # Skewed like real data: a few customer groups hold most promotions
+        'Customer Group': groups[np.minimum(rng.zipf(1.5, n_rows) - 1, customer_groups - 1)],
+        'Start Date': start,
+        'End Date': start + rng.integers(7, 120, n_rows),
+        'Qualify Group': rng.choice(['All', 'Members', 'Staff', 'VIP'], n_rows),
+        'Assign Group': rng.choice(['Store', 'Online', 'Region'], n_rows),
+        'Promo Type': rng.choice(PROMO_TYPES[:promo_types], n_rows),
+        'Plan Qty': plan,
+        'Issue Qty': (plan * rng.random(n_rows) * 0.5).astype(np.int64)
+    }).assign(**{'Balance Qty': lambda df: df['Plan Qty'] - df['Issue Qty']})
+
+
+def _as_text(df):
+    df = df.copy()
+    for col in ('Start Date', 'End Date'):
+        if df[col].dtype.kind == 'M':
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return df[COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic pair of promotion exports.")
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--change-rate', type=float, default=0.3)
+    parser.add_argument('--customer-groups', type=int, default=12)
+    parser.add_argument('--promo-types', type=int, default=5, choices=range(1, len(PROMO_TYPES) + 1),
+                        metavar=f"1-{len(PROMO_TYPES)}")
+    parser.add_argument('--date-span-days', type=int, default=365)
+    parser.add_argument('--duplicate-rate', type=float, default=0.01)
+    parser.add_argument('--missing-key-rate', type=float, default=0.002)
+    parser.add_argument('--churn', type=float, default=0.01)
+    parser.add_argument('--shuffle', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    options = vars(args)
+    directory, n_rows = options.pop('directory'), options.pop('rows')
+    for path in write_snapshots(directory, n_rows, **options):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
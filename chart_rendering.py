@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib import cbook
+
+# Above this many points scatter and box plots switch to aggregated views
+DENSITY_THRESHOLD = 20_000
+# Line plots are downsampled to roughly this many points
+MAX_LINE_POINTS = 2_000
+HEXBIN_GRIDSIZE = 60
+
+
+class RenderPolicy:
+    """Decide how much of a large result set a chart draws point by point.
+
+    With ``enabled`` off every chart draws every point, exactly as before.
+    """
+
+    def __init__(self, enabled=True, threshold=DENSITY_THRESHOLD,
+                 max_line_points=MAX_LINE_POINTS):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_line_points = max_line_points
+
+    def dense(self, n_points):
+        return self.enabled and n_points > self.threshold
+
+
+FULL_DETAIL = RenderPolicy(enabled=False)
+
+
+def scatter(ax, x, y, policy=FULL_DETAIL):
+    """Scatter ``y`` against ``x``, or a log-scaled hexbin when dense."""
+    if not policy.dense(len(x)):
+        return ax.scatter(x, y)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    # Rasterized so vector outputs (PDF, SVG) hold one image, not every hexagon
+    return ax.hexbin(x[finite], y[finite], gridsize=HEXBIN_GRIDSIZE,
+                     bins='log', mincnt=1, cmap='viridis', rasterized=True)
+
+
+def boxplot(ax, data, x, y, order=None, policy=FULL_DETAIL):
+    """Box plot of ``y`` per ``x`` group.
+
+    When dense the quartiles and whiskers are computed up front and drawn
+    with ``Axes.bxp`` without fliers, instead of seaborn drawing an
+    outlier marker for every point.
+    """
+    if not policy.dense(len(data)):
+        return sns.boxplot(data=data, x=x, y=y, order=order, ax=ax)
+
+    groups = data[x]
+    if order is None:
+        if isinstance(groups.dtype, pd.CategoricalDtype):
+            order = groups.cat.categories
+        else:
+            order = np.sort(groups.dropna().unique())
+    values = {label: part.to_numpy(dtype=np.float64)
+              for label, part in data[y].groupby(groups, observed=True)}
+
+    stats = []
+    for label in order:
+        part = values.get(label)
+        if part is None:
+            continue
+        part = part[np.isfinite(part)]
+        if len(part):
+            stats.extend(cbook.boxplot_stats(part, labels=[str(label)]))
+    ax.bxp(stats, showfliers=False, patch_artist=True,
+           boxprops={'facecolor': sns.color_palette()[0]},
+           medianprops={'color': 'black'})
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    return ax
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; each bucket in between
+    contributes the point forming the largest triangle with the previous
+    pick and the next bucket's average, which preserves peaks and steps
+    that plain striding would skip.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    widths = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / widths
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / widths
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    n_buckets = n_out - 2
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_buckets:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def line(ax, x, y, policy=FULL_DETAIL):
+    """Line plot of ``y`` against ``x``, LTTB-downsampled when long.
+
+    ``x`` may be numeric or datetime64; points where either value is
+    missing are left out, as matplotlib would not draw them anyway.
+    """
+    if not policy.enabled or len(x) <= policy.max_line_points:
+        return ax.plot(x, y)
+
+    x = pd.Series(x).reset_index(drop=True)
+    y = pd.Series(y).reset_index(drop=True)
+    valid = (x.notna() & y.notna()).to_numpy()
+    x, y = x[valid], y[valid]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x_num = x.to_numpy().view(np.int64).astype(np.float64)
+    else:
+        x_num = x.to_numpy(dtype=np.float64)
+    keep = lttb_indices(x_num, y.to_numpy(dtype=np.float64), policy.max_line_points)
+    return ax.plot(x.iloc[keep], y.iloc[keep])
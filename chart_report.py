@@ -0,0 +1,110 @@
+"""Render every chart of a comparison in parallel into one PDF report.
+
+Charts are built in a pool of worker processes, each with the Agg backend
+and its own copy of the enriched result frame. Every worker also renders
+its chart as a one-page PDF, which takes as long as building it and far
+longer for full-detail scatter plots, so building and rendering both scale
+with the number of cores instead of sharing one GIL. The parent only
+appends the finished pages, in ``CHART_TYPES`` order, with ``pypdf``;
+without it the figures are sent back and rendered into the PDF there.
+"""
+import importlib.util
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import charts
+
+DEFAULT_DPI = 150
+
+_frame = None
+_cube = None
+
+
+def available_charts():
+    return [(chart_type, slug) for chart_type, slug in charts.CHART_TYPES
+            if chart_type in charts.CHART_BUILDERS]
+
+
+def export_chart_report(comparison, pdf_path=None, image_dir=None, image_format='png',
+                        dpi=DEFAULT_DPI, n_changes=charts.DEFAULT_TOP_N, density=True,
+                        workers=None, progress=None):
+    """Write every available chart to ``pdf_path`` and/or ``image_dir``.
+
+    ``image_dir`` gets one ``<slug>.<image_format>`` file per chart.
+    ``progress(done, total)`` is called on the calling thread as charts
+    finish; it may raise to cancel the remaining ones. Returns the paths
+    written.
+    """
+    pages = available_charts()
+    if image_dir:
+        os.makedirs(image_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pages)))
+    page_format = None
+    if pdf_path:
+        page_format = 'pdf' if importlib.util.find_spec('pypdf') else 'figure'
+
+    rendered = {}
+    # Spawned workers do not inherit the GUI's Tk state or threads
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=_init_worker,
+                                   initargs=(comparison.enriched(), comparison.cube()))
+    try:
+        futures = {}
+        for chart_type, slug in pages:
+            image_path = (os.path.join(image_dir, f"{slug}.{image_format}")
+                          if image_dir else None)
+            params = charts.chart_params(chart_type, n_changes, density)
+            future = executor.submit(_render_chart, chart_type, params, image_path, dpi,
+                                     page_format)
+            futures[future] = chart_type
+        for done, future in enumerate(as_completed(futures), 1):
+            rendered[futures[future]] = future.result()
+            if progress:
+                progress(done, len(pages))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    paths = []
+    if image_dir:
+        paths.extend(os.path.join(image_dir, f"{slug}.{image_format}") for _, slug in pages)
+    if page_format == 'pdf':
+        from pypdf import PdfReader, PdfWriter
+        writer = PdfWriter()
+        for chart_type, _ in pages:
+            writer.add_page(PdfReader(io.BytesIO(rendered[chart_type])).pages[0])
+        with open(pdf_path, 'wb') as handle:
+            writer.write(handle)
+        paths.append(pdf_path)
+    elif page_format == 'figure':
+        from matplotlib.backends.backend_pdf import PdfPages
+        with PdfPages(pdf_path) as pdf:
+            for chart_type, _ in pages:
+                pdf.savefig(rendered[chart_type], dpi=dpi)
+        paths.append(pdf_path)
+    return paths
+
+
+def _init_worker(frame, cube):
+    global _frame, _cube
+    import matplotlib
+    matplotlib.use('Agg')
+    charts.apply_theme()
+    _frame = frame
+    _cube = cube
+
+
+def _render_chart(chart_type, params, image_path, dpi, page_format):
+    """Build one chart; return it as PDF page bytes, the figure or nothing."""
+    fig = charts.build_chart_from_frame(_frame, chart_type, params, cube=_cube)
+    if image_path:
+        fig.savefig(image_path, bbox_inches='tight', dpi=dpi)
+    if page_format == 'pdf':
+        from matplotlib.backends.backend_pdf import PdfPages
+        buffer = io.BytesIO()
+        with PdfPages(buffer) as pdf:
+            pdf.savefig(fig, dpi=dpi)
+        return buffer.getvalue()
+    return fig if page_format == 'figure' else None
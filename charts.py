@@ -0,0 +1,331 @@
+"""Chart builders shared by the chart window and the command line.
+
+Every builder takes the enriched result frame
+(``ComparisonOutcome.enriched``) and returns a standalone matplotlib
+``Figure``; nothing here touches pyplot state or Tk, so charts can be
+built on a worker thread or with a non-interactive backend. The group
+charts read their averages, totals and counts from the comparison's
+``AggregationCube`` instead of grouping the rows again.
+"""
+import numpy as np
+import seaborn as sns
+from matplotlib import style
+from matplotlib.figure import Figure
+
+from aggregation_cube import AggregationCube
+from chart_rendering import FULL_DETAIL, RenderPolicy, boxplot, line, scatter
+
+# (title, file name slug) in the order they are offered
+CHART_TYPES = [
+    ("Distribution of Changes", "distribution"),
+    ("Top Changes", "top_changes"),
+    ("Promotion Type Analysis", "promo_type"),
+    ("Customer Group Analysis", "customer_group"),
+    ("Timeline Analysis", "timeline"),
+    ("Quantity Range Analysis", "qty_range"),
+    ("Change Patterns", "patterns")
+]
+
+DEFAULT_TOP_N = 5
+
+# Charts drawn from the aggregation cube
+CUBE_CHARTS = {"Promotion Type Analysis", "Customer Group Analysis", "Timeline Analysis",
+               "Quantity Range Analysis"}
+
+
+def apply_theme():
+    style.use('default')
+    sns.set_theme(style="whitegrid")
+
+
+def chart_params(chart_type, n_changes=DEFAULT_TOP_N, density=True):
+    """The non-interactive parameters ``build_chart`` takes for ``chart_type``."""
+    params = {'density': density}
+    if chart_type == "Top Changes":
+        params['n_changes'] = n_changes
+    return params
+
+
+def build_chart(comparison, chart_type, params=None, check=None):
+    """Build the figure for ``chart_type`` from a ``ComparisonOutcome``.
+
+    ``params`` may hold ``density`` (use the large-N render policy,
+    default on) and ``n_changes`` for "Top Changes". ``check`` is called
+    between the expensive steps so a background job can cancel.
+    """
+    df = comparison.enriched()
+    if check:
+        check()
+    cube = comparison.cube() if chart_type in CUBE_CHARTS else None
+    return build_chart_from_frame(df, chart_type, params, check, cube)
+
+
+def build_chart_from_frame(df, chart_type, params=None, check=None, cube=None):
+    """``build_chart`` for an already enriched result frame.
+
+    ``cube`` is the frame's ``AggregationCube``; the charts that need it
+    build one when it is not given.
+    """
+    params = dict(params or {})
+    policy = RenderPolicy(enabled=params.pop('density', True))
+    builder = CHART_BUILDERS.get(chart_type)
+    if builder is None:
+        raise ValueError(f"Chart type not available: {chart_type}")
+    if chart_type in CUBE_CHARTS:
+        params['cube'] = cube
+    
+    fig = builder(df, policy=policy, **params)
+    if check:
+        check()
+    fig.tight_layout()
+    return fig
+
+
+def create_distribution_chart(df, policy=FULL_DETAIL):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    # Overall distribution
+    sns.histplot(data=df, x='change', bins=30, ax=ax1)
+    ax1.axvline(x=0, color='r', linestyle='--')
+    ax1.set_title('Distribution of Changes')
+    
+    # Top increases
+    top_inc = df[df['change'] > 0].nlargest(5, 'change')
+    ax2.barh(range(len(top_inc)), top_inc['change'], color='g')
+    ax2.set_yticks(range(len(top_inc)))
+    ax2.set_yticklabels(top_inc['td_desc'].str[:20])
+    ax2.set_title('Top 5 Increases')
+    
+    # Top decreases
+    top_dec = df[df['change'] < 0].nsmallest(5, 'change')
+    ax3.barh(range(len(top_dec)), top_dec['change'], color='r')
+    ax3.set_yticks(range(len(top_dec)))
+    ax3.set_yticklabels(top_dec['td_desc'].str[:20])
+    ax3.set_title('Top 5 Decreases')
+    
+    # Change summary
+    changes = [
+        len(df[df['change'] > 0]),
+        len(df[df['change'] < 0]),
+        len(df[df['change'] == 0])
+    ]
+    ax4.pie(changes, labels=['Increases', 'Decreases', 'No Change'],
+            autopct='%1.1f%%', colors=['g', 'r', 'gray'])
+    ax4.set_title('Change Distribution')
+    
+    return fig
+
+
+def create_top_changes_chart(df, n_changes=5, policy=FULL_DETAIL):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    # Absolute changes (fixing nlargest error)
+    abs_changes = df.loc[df['change'].abs().nlargest(n_changes).index]
+    colors = ['g' if x > 0 else 'r' for x in abs_changes['change']]
+    
+    ax1.barh(range(len(abs_changes)), abs_changes['change'], color=colors)
+    ax1.set_yticks(range(len(abs_changes)))
+    ax1.set_yticklabels(abs_changes['td_desc'].str[:20])
+    ax1.set_title(f'Top {n_changes} Absolute Changes')
+    
+    # Percentage changes
+    top_pct = df.loc[df['pct_change'].abs().nlargest(n_changes).index]
+    colors = ['g' if x > 0 else 'r' for x in top_pct['pct_change']]
+    
+    ax2.barh(range(len(top_pct)), top_pct['pct_change'], color=colors)
+    ax2.set_yticks(range(len(top_pct)))
+    ax2.set_yticklabels(top_pct['td_desc'].str[:20])
+    ax2.set_title(f'Top {n_changes} Percentage Changes')
+    
+    # Volume impact
+    volume_change = (df['change'] * df['orig_qty']).nlargest(n_changes)
+    volume_impact = df.loc[volume_change.index]
+    
+    ax3.barh(range(len(volume_impact)), volume_change)
+    ax3.set_yticks(range(len(volume_impact)))
+    ax3.set_yticklabels(volume_impact['td_desc'].str[:20])
+    ax3.set_title(f'Top {n_changes} Volume Impact')
+    
+    # Change over time
+    sorted_changes = df.sort_values('change', ascending=True)
+    cumsum = sorted_changes['change'].cumsum()
+    line(ax4, np.arange(len(cumsum)), cumsum, policy)
+    ax4.set_title('Cumulative Change Impact')
+    ax4.set_xlabel('Number of Promotions')
+    ax4.set_ylabel('Cumulative Change')
+    
+    return fig
+
+
+def _cube(df, cube):
+    return cube if cube is not None else AggregationCube.from_frame(df)
+
+
+def create_promo_type_analysis(df, policy=FULL_DETAIL, cube=None):
+    fig = Figure(figsize=(12, 10))
+    cube = _cube(df, cube)
+    by_type = cube.rollup(['Promo Type'])
+    if not len(by_type):
+        # Exports without the column still get a page in the full report
+        fig.text(0.5, 0.5, 'No Promo Type values to analyze', ha='center', va='center')
+        return fig
+    
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    # Average change by promo type
+    by_type['mean'].sort_values().plot(kind='barh', ax=ax1)
+    ax1.set_title('Average Change by Promotion Type')
+    
+    # Volume by promo type
+    by_type['updated_qty'].plot(kind='pie', ax=ax2, autopct='%1.1f%%')
+    ax2.set_title('Volume Distribution by Promotion Type')
+    
+    # Average change per customer group and promo type
+    by_pair = cube.rollup(['Customer Group', 'Promo Type'])
+    if len(by_pair):
+        sns.heatmap(by_pair['mean'].unstack(), ax=ax3, cmap='RdYlGn', center=0)
+    ax3.set_title('Average Change by Customer Group and Type')
+    
+    # Share of promotions that changed
+    (by_type['changed'] / by_type['rows'] * 100).plot(kind='bar', ax=ax4)
+    ax4.set_xticklabels(ax4.get_xticklabels(), rotation=45)
+    ax4.set_ylabel('% of promotions')
+    ax4.set_title('Changed Promotions by Type')
+    
+    return fig
+
+
+def create_customer_group_analysis(df, policy=FULL_DETAIL, cube=None):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    by_customer = _cube(df, cube).rollup(['Customer Group'])
+    
+    # Average change by customer
+    avg_by_customer = by_customer['mean'].sort_values()
+    avg_by_customer.plot(kind='barh', ax=ax1)
+    ax1.set_title('Average Change by Customer Group')
+    
+    # Volume by customer
+    volume_by_customer = by_customer['updated_qty']
+    volume_by_customer.plot(kind='pie', ax=ax2, autopct='%1.1f%%')
+    ax2.set_title('Volume Distribution by Customer')
+    
+    # Change distribution by customer
+    boxplot(ax3, df, 'Customer Group', 'change',
+                            order=volume_by_customer.index, policy=policy)
+    ax3.set_xticklabels(ax3.get_xticklabels(), rotation=45)
+    ax3.set_title('Change Distribution by Customer')
+    
+    # Customer performance metrics
+    customer_perf = by_customer[['mean', 'std', 'count']].plot(kind='bar', ax=ax4)
+    ax4.set_xticklabels(ax4.get_xticklabels(), rotation=45)
+    ax4.set_title('Customer Group Performance Metrics')
+    
+    return fig
+
+
+def create_timeline_analysis(df, policy=FULL_DETAIL, cube=None):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    # Changes over time
+    timeline = df.sort_values('Start Date')
+    line(ax1, timeline['Start Date'], timeline['change'].cumsum(), policy)
+    ax1.set_title('Cumulative Changes Over Time')
+    ax1.tick_params(axis='x', labelrotation=45)
+    
+    # Duration impact
+    scatter(ax2, df['Duration'], df['change'], policy)
+    ax2.set_title('Promotion Duration vs Change')
+    ax2.set_xlabel('Duration (days)')
+    ax2.set_ylabel('Change Amount')
+    
+    # Monthly pattern
+    monthly_changes = _cube(df, cube).rollup(
+        ['Start Month'], relabel={'Start Month': lambda months: months.month})['mean']
+    monthly_changes.plot(kind='bar', ax=ax3)
+    ax3.set_title('Average Change by Month')
+    ax3.set_xlabel('Month')
+    
+    # Duration distribution
+    sns.histplot(data=df, x='Duration', ax=ax4)
+    ax4.set_title('Distribution of Promotion Durations')
+    
+    return fig
+
+
+def create_quantity_range_analysis(df, policy=FULL_DETAIL, cube=None):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    
+    cube = _cube(df, cube)
+    # Every range, including empty ones
+    by_range = cube.rollup(['Quantity Range']).reindex(cube.labels['Quantity Range'])
+    
+    # Change distribution by range
+    boxplot(ax1, df, 'qty_range', 'change', policy=policy)
+    ax1.set_title('Change Distribution by Quantity Range')
+    ax1.set_xticklabels(ax1.get_xticklabels(), rotation=45)
+    
+    # Range composition
+    range_counts = by_range['rows'].fillna(0).rename('count')
+    range_counts.sort_values(ascending=False, kind='stable').plot(kind='pie', ax=ax2,
+                                                                 autopct='%1.1f%%')
+    ax2.set_title('Distribution of Quantity Ranges')
+    
+    # Average change by range
+    by_range['mean'].plot(kind='bar', ax=ax3)
+    ax3.set_title('Average Change by Quantity Range')
+    ax3.set_xticklabels(ax3.get_xticklabels(), rotation=45)
+    
+    # Quantity vs Percentage change
+    scatter(ax4, df['orig_qty'], df['pct_change'], policy)
+    ax4.set_title('Original Quantity vs Percentage Change')
+    ax4.set_xlabel('Original Quantity')
+    ax4.set_ylabel('Percentage Change')
+    
+    return fig
+
+
+def create_change_patterns(df, policy=FULL_DETAIL):
+    fig = Figure(figsize=(12, 10))
+    (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
+    # Change frequency distribution
+    sns.histplot(data=df, x='change', bins=30, ax=ax1)
+    ax1.axvline(x=0, color='r', linestyle='--')
+    ax1.set_title('Distribution of Changes')
+    
+    # Original vs Updated correlation
+    scatter(ax2, df['orig_qty'], df['updated_qty'], policy)
+    ax2.plot([df['orig_qty'].min(), df['orig_qty'].max()],
+             [df['orig_qty'].min(), df['orig_qty'].max()],
+             'r--')
+    ax2.set_title('Original vs Updated Quantities')
+    ax2.set_xlabel('Original Quantity')
+    ax2.set_ylabel('Updated Quantity')
+    
+    # Change magnitude categories
+    df['change_cat'].value_counts().plot(kind='pie', ax=ax3, autopct='%1.1f%%')
+    ax3.set_title('Distribution of Change Categories')
+    
+    # Change impact vs Original Quantity
+    scatter(ax4, df['orig_qty'], abs(df['change']), policy)
+    ax4.set_title('Change Magnitude vs Original Quantity')
+    ax4.set_xlabel('Original Quantity')
+    ax4.set_ylabel('Absolute Change')
+    
+    return fig
+
+
+CHART_BUILDERS = {
+    "Distribution of Changes": create_distribution_chart,
+    "Top Changes": create_top_changes_chart,
+    "Promotion Type Analysis": create_promo_type_analysis,
+    "Customer Group Analysis": create_customer_group_analysis,
+    "Timeline Analysis": create_timeline_analysis,
+    "Quantity Range Analysis": create_quantity_range_analysis,
+    "Change Patterns": create_change_patterns
+}
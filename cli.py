@@ -0,0 +1,319 @@
+"""Headless command line: compare snapshot files without a display.
+
+    python promotion_analysis.py compare original.tsv updated.tsv \\
+        --out report.xlsx --report charts.pdf --charts out/
+    python promotion_analysis.py series snapshots/*.tsv --out series.xlsx
+    python promotion_analysis.py store --list
+    python promotion_analysis.py serve --port 8765
+    python promotion_analysis.py memory original.tsv updated.tsv
+
+Uses the same loader, comparison engine, reports and chart builders as the
+dashboard, renders with the Agg backend and never imports tkinter.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import report
+from comparison_engine import compare_snapshots
+from instrumentation import format_records, timings
+from snapshot_loader import load_snapshot
+from snapshot_memory import format_report, memory_report
+from snapshot_series import SUMMARY_COLUMNS, load_series, order_paths
+from snapshot_store import (DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES, DEFAULT_MAX_SNAPSHOTS,
+                            DEFAULT_STORE_PATH, SnapshotStore)
+
+CHART_FORMATS = ['png', 'pdf', 'svg', 'jpg']
+# Defaults of chart_report, charts and service, repeated here because those
+# pull in matplotlib and seaborn; only the commands that draw import them
+CHART_DPI = 150
+CHART_TOP_N = 5
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_CACHE_MB = 2048
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='promotion_analysis.py',
+        description="Compare promotion snapshots. Run without arguments for the dashboard.")
+    parser.add_argument('--timings', action='store_true',
+                        help="print how long each stage took")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="also write a cProfile .pstats file per command into DIR")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    compare = commands.add_parser(
+        'compare', help="compare two snapshot files and write the reports")
+    compare.add_argument('original', help="original snapshot (.tsv, .txt, .csv or .xlsx)")
+    compare.add_argument('updated', help="updated snapshot (.tsv, .txt, .csv or .xlsx)")
+    compare.add_argument('--out', metavar='REPORT',
+                         help="write the results here (.xlsx report, .csv or .parquet)")
+    compare.add_argument('--sheets', nargs='+', choices=report.EXTRA_SHEETS, default=[],
+                         help="extra workbook sheets: one per customer group or promo "
+                              "type, and the largest changes")
+    compare.add_argument('--sheet-top-n', type=int, default=report.DEFAULT_TOP_N,
+                         help=f"rows in the top_changes sheet (default: {report.DEFAULT_TOP_N})")
+    compare.add_argument('--report', metavar='REPORT.pdf',
+                         help="write every chart as one page of this PDF")
+    compare.add_argument('--charts', metavar='DIR',
+                         help="save every chart into this directory")
+    compare.add_argument('--format', choices=CHART_FORMATS, default='png',
+                         help="chart file format (default: png)")
+    compare.add_argument('--dpi', type=int, default=CHART_DPI,
+                         help=f"chart resolution (default: {CHART_DPI})")
+    compare.add_argument('--top-n', type=int, default=CHART_TOP_N,
+                         help=f"promotions shown in the Top Changes chart (default: {CHART_TOP_N})")
+    compare.add_argument('--workers', type=int,
+                         help="processes rendering charts (default: one per core)")
+    compare.add_argument('--full-detail', action='store_true',
+                         help="draw every point even for large results")
+    compare.add_argument('--quiet', action='store_true',
+                         help="do not print the summary")
+    compare.add_argument('--store', action='store_true',
+                         help="load and compare through the snapshot store, parsing "
+                              "each file only once")
+    compare.add_argument('--store-path', default=DEFAULT_STORE_PATH,
+                         help=f"snapshot store file (default: {DEFAULT_STORE_PATH})")
+    compare.add_argument('--out-of-core', action='store_true',
+                         help="compare files larger than memory through hash partitions "
+                              "on disk (summary and .csv/.xlsx results only)")
+    compare.add_argument('--partitions', type=int,
+                         help="partitions for --out-of-core (default: by file size)")
+    compare.add_argument('--spill-dir',
+                         help="directory for the --out-of-core partitions (default: temp)")
+    
+    series = commands.add_parser(
+        'series', help="track Balance Qty across several snapshot files")
+    series.add_argument('snapshots', nargs='+',
+                        help="snapshot files, ordered by the date in their names")
+    series.add_argument('--keep-order', action='store_true',
+                        help="use the files in the order given instead")
+    series.add_argument('--out', metavar='REPORT',
+                        help="write every promotion's series here (.xlsx, .csv or .parquet)")
+    series.add_argument('--top', type=int, default=20,
+                        help="largest movers printed (default: 20)")
+    series.add_argument('--by', choices=SUMMARY_COLUMNS[4:7], default='net_change',
+                        help="rank movers by this metric (default: net_change)")
+    
+    store = commands.add_parser(
+        'store', help="list or trim the local snapshot store")
+    store.add_argument('--store-path', default=DEFAULT_STORE_PATH,
+                       help=f"snapshot store file (default: {DEFAULT_STORE_PATH})")
+    store.add_argument('--list', action='store_true',
+                       help="print the stored snapshots and comparisons")
+    store.add_argument('--prune', action='store_true',
+                       help="evict snapshots beyond the limits below")
+    store.add_argument('--delete', nargs='+', metavar='HASH', default=[],
+                       help="remove these snapshots (a unique hash prefix is enough)")
+    store.add_argument('--clear', action='store_true',
+                       help="remove every stored snapshot and comparison")
+    store.add_argument('--max-snapshots', type=int, default=DEFAULT_MAX_SNAPSHOTS,
+                       help=f"snapshots kept (default: {DEFAULT_MAX_SNAPSHOTS})")
+    store.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                       help=f"total size kept (default: {DEFAULT_MAX_BYTES // 1024 ** 2})")
+    store.add_argument('--max-age-days', type=int, default=DEFAULT_MAX_AGE_DAYS,
+                       help=f"days an unused snapshot is kept (default: {DEFAULT_MAX_AGE_DAYS})")
+    
+    serve = commands.add_parser(
+        'serve', help="run the local comparison service for dashboards and scripts")
+    serve.add_argument('--host', default=SERVER_HOST,
+                       help=f"address to listen on (default: {SERVER_HOST})")
+    serve.add_argument('--port', type=int, default=SERVER_PORT,
+                       help=f"port to listen on (default: {SERVER_PORT})")
+    serve.add_argument('--max-mb', type=int, default=SERVER_CACHE_MB,
+                       help="memory for cached snapshots, comparisons and charts "
+                            f"(default: {SERVER_CACHE_MB})")
+    serve.add_argument('--workers', type=int,
+                       help="threads parsing, comparing and rendering (default: one per core)")
+    
+    memory = commands.add_parser(
+        'memory', help="show the memory each snapshot takes as untyped text and once loaded")
+    memory.add_argument('snapshots', nargs='+',
+                        help="snapshot files (.tsv, .txt, .csv or .xlsx)")
+    return parser
+
+
+def use_agg():
+    """Render off-screen; must be chosen before seaborn pulls in pyplot."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def run_memory(args):
+    for position, path in enumerate(args.snapshots):
+        if position:
+            print()
+        print("\n".join(format_report(os.path.basename(path), memory_report(path))))
+    return 0
+
+
+def run_serve(args):
+    use_agg()
+    import service
+    
+    def ready(port):
+        print(f"Serving on http://{args.host}:{port} (Ctrl+C to stop)", file=sys.stderr)
+    
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port, args.max_mb * 1024 ** 2,
+                                          args.workers, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_compare(args):
+    if args.out:
+        report.check_export_path(args.out)
+    if args.out_of_core:
+        return run_out_of_core(args)
+    if args.store:
+        store = SnapshotStore(args.store_path)
+        load, compare = store.load_file, store.compare
+    else:
+        load, compare = load_snapshot, compare_snapshots
+    with timings.stage('load original') as stage:
+        original_df = load(args.original)
+        stage.rows = len(original_df)
+    with timings.stage('load updated') as stage:
+        updated_df = load(args.updated)
+        stage.rows = len(updated_df)
+    with timings.stage('compare') as stage:
+        outcome = compare(original_df, updated_df)
+        stage.rows = len(outcome)
+    with timings.stage('summary', len(outcome)):
+        outcome.summary()
+        outcome.changes()
+    
+    if not args.quiet:
+        if len(outcome):
+            print("\n".join(report.summary_lines(outcome.summary())))
+            changes = outcome.changes()
+            if changes is not None and len(changes.columns) > 1:
+                print("Changed promotions per column:")
+                for _, column, count in report.column_change_items(changes.counts()):
+                    print(f"  {column}: {count}")
+        else:
+            print("No data to analyze")
+    
+    if not len(outcome):
+        if args.out or args.report or args.charts:
+            print("Warning: no matching promotions, nothing exported", file=sys.stderr)
+        return 0
+    
+    if args.out:
+        with timings.stage('export', len(outcome)):
+            report.export_results(outcome, args.out, args.sheets, args.sheet_top_n)
+        print(f"Report written to {args.out}", file=sys.stderr)
+    if args.report or args.charts:
+        use_agg()
+        import chart_report
+        
+        with timings.stage('charts', len(outcome)):
+            paths = chart_report.export_chart_report(
+                outcome, args.report, args.charts, args.format, args.dpi,
+                n_changes=args.top_n, density=not args.full_detail, workers=args.workers)
+        print(f"Charts written: {', '.join(paths)}", file=sys.stderr)
+    return 0
+
+
+def run_out_of_core(args):
+    from out_of_core import compare_partitioned
+    
+    if args.store or args.report or args.charts or args.sheets:
+        raise ValueError("--out-of-core cannot be combined with --store, --report, "
+                         "--charts or --sheets")
+    with timings.stage('partitioned compare'):
+        outcome = compare_partitioned(args.original, args.updated, args.partitions,
+                                      args.spill_dir, top_n=args.sheet_top_n)
+    with outcome:
+        if not args.quiet:
+            if len(outcome):
+                print("\n".join(report.summary_lines(outcome.summary())))
+            else:
+                print("No data to analyze")
+        if args.out and len(outcome):
+            with timings.stage('export', len(outcome)):
+                report.export_partitioned(outcome, args.out)
+            print(f"Report written to {args.out}", file=sys.stderr)
+        elif args.out:
+            print("Warning: no matching promotions, nothing exported", file=sys.stderr)
+    return 0
+
+
+def run_series(args):
+    if args.out:
+        report.check_export_path(args.out)
+    paths = args.snapshots if args.keep_order else order_paths(args.snapshots)
+    if len(paths) < 2:
+        raise ValueError("A series needs at least two snapshots")
+    series = load_series(paths)
+    
+    totals = series.snapshot_totals()
+    print(f"{len(series):,} promotions across {series.n_snapshots} snapshots "
+          f"(burn rate per {series.time_unit})")
+    print(totals.to_string(index=False))
+    if args.top > 0:
+        print(f"\nLargest movers by {args.by}:")
+        print(series.largest_movers(args.top, args.by).to_string(index=False))
+    
+    if args.out:
+        report.export_series(series, args.out)
+        print(f"Series written to {args.out}", file=sys.stderr)
+    return 0
+
+
+def run_store(args):
+    store = SnapshotStore(args.store_path, args.max_snapshots, args.max_mb * 1024 ** 2,
+                          args.max_age_days)
+    if args.clear:
+        store.clear()
+        print("Store cleared", file=sys.stderr)
+    if args.delete:
+        hashes = store.snapshots()['content_hash']
+        for prefix in args.delete:
+            matches = hashes[hashes.str.startswith(prefix)]
+            if len(matches) != 1:
+                raise ValueError(f"'{prefix}' matches {len(matches)} stored snapshots")
+            store.delete(matches.iloc[0])
+    if args.prune:
+        print(f"Evicted {store.prune()} snapshot(s)", file=sys.stderr)
+    if args.list or not (args.clear or args.delete or args.prune):
+        snapshots = store.snapshots()
+        print(f"{len(snapshots)} snapshots, {store.total_bytes() / 1024 ** 2:,.1f} MB "
+              f"in {store.path}")
+        for row in snapshots.itertuples(index=False):
+            print(f"{row.content_hash[:12]}  {row.rows:>10,}  "
+                  f"{row.size_bytes / 1024 ** 2:8.1f} MB  {row.name}")
+        comparisons = store.comparisons()
+        if len(comparisons):
+            print(f"\n{len(comparisons)} comparisons")
+            for row in comparisons.itertuples(index=False):
+                print(f"{row.original_hash[:12]} -> {row.updated_hash[:12]}  "
+                      f"{row.original_name} -> {row.updated_name}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.timings or args.profile:
+            timings.enable(args.profile)
+        with timings.action(args.command):
+            if args.command == 'series':
+                return run_series(args)
+            if args.command == 'store':
+                return run_store(args)
+            if args.command == 'serve':
+                return run_serve(args)
+            if args.command == 'memory':
+                return run_memory(args)
+            return run_compare(args)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if timings.enabled:
+            print("\n".join(format_records(timings.snapshot())), file=sys.stderr)
@@ -0,0 +1,333 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+from enrichment import CONTEXT_COLUMNS, build_enriched_frame
+from snapshot_loader import DESC_COLUMN, KEY_COLUMN, QTY_COLUMN
+from summary_stats import summarize
+
+RESULT_COLUMNS = ['td_no', 'td_desc', 'orig_qty', 'updated_qty', 'change']
+ROW_CHUNK = 10_000
+
+
+class ComparisonOutcome:
+    """Columnar result of comparing two snapshots on ``Td No``.
+
+    One entry per matched original row, in original order. ``td_no`` is an
+    object array sharing the snapshot's strings, ``td_desc`` is a
+    Categorical when descriptions repeat (otherwise a shared object array)
+    and the three quantity columns are rows of a single float64 block, so
+    ``to_frame`` can wrap them without copying. ``added`` and ``removed``
+    hold the first row of every promotion that only exists in the updated
+    or the original snapshot. ``original_rows`` gives the position of each
+    result row in ``original_df``. ``join`` keeps the row positions the
+    comparison was built from (see ``outcome_from_join``) so it can be
+    stored and rebuilt without joining again, and with ``updated_df`` it
+    lets ``changes`` diff every other column of the matched rows.
+    """
+
+    def __init__(self, td_no, td_desc, orig_qty, updated_qty, added, removed,
+                 original_df=None, original_rows=None, join=None, updated_df=None):
+        self.td_no = td_no
+        self.td_desc = td_desc
+        self.quantities = np.empty((3, len(td_no)), dtype=np.float64)
+        self.quantities[0] = orig_qty
+        self.quantities[1] = updated_qty
+        np.subtract(self.quantities[1], self.quantities[0], out=self.quantities[2])
+        self.added = added
+        self.removed = removed
+        self.original_df = original_df
+        self.original_rows = original_rows
+        self.join = join
+        self.updated_df = updated_df
+        self._summary = None
+        self._frame = None
+        self._enriched = None
+        self._fingerprint = None
+        self._changes = None
+        self._cube = None
+        self._search_index = None
+
+    @property
+    def orig_qty(self):
+        return self.quantities[0]
+
+    @property
+    def updated_qty(self):
+        return self.quantities[1]
+
+    @property
+    def change(self):
+        return self.quantities[2]
+
+    def __len__(self):
+        return len(self.td_no)
+
+    def summary(self):
+        """The ``ComparisonSummary`` of this comparison, computed once."""
+        if self._summary is None:
+            self._summary = summarize(self.change, self.orig_qty,
+                                      added=len(self.added), removed=len(self.removed))
+        return self._summary
+
+    def fingerprint(self):
+        """Content hash of the results and the snapshot columns charts read.
+
+        Two comparisons with the same fingerprint draw identical charts.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(self.quantities.data)
+            columns = [self.td_no, np.asarray(self.td_desc, dtype=object)]
+            if self.original_df is not None:
+                for col in CONTEXT_COLUMNS:
+                    if col in self.original_df.columns:
+                        digest.update(col.encode())
+                        columns.append(self.original_df[col].to_numpy()[self.original_rows])
+            for values in columns:
+                digest.update(_hash_values(values).data)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def to_frame(self):
+        """A DataFrame over the result columns that shares their memory.
+
+        The frame is cached and shared, so callers that add columns should
+        work on ``to_frame().copy(deep=False)``.
+        """
+        if self._frame is None:
+            labels = pd.DataFrame({'td_no': self.td_no, 'td_desc': self.td_desc}, copy=False)
+            values = pd.DataFrame(self.quantities.T, columns=RESULT_COLUMNS[2:], copy=False)
+            self._frame = pd.concat([labels, values], axis=1, copy=False)
+        return self._frame
+
+    def enriched(self):
+        """The results joined with typed snapshot columns, built once.
+
+        Shared by every chart; treat it as read-only.
+        """
+        if self._enriched is None:
+            self._enriched = build_enriched_frame(self.to_frame(), self.original_df,
+                                                  self.original_rows)
+        return self._enriched
+
+    def cube(self):
+        """The ``AggregationCube`` of the enriched results, built once."""
+        if self._cube is None:
+            from aggregation_cube import AggregationCube
+            self._cube = AggregationCube.from_frame(self.enriched())
+        return self._cube
+
+    def search_index(self):
+        """The ``ResultIndex`` for searching and sorting the results, built once."""
+        if self._search_index is None:
+            from result_index import ResultIndex
+            self._search_index = ResultIndex(self)
+        return self._search_index
+
+    def changes(self):
+        """The ``ChangeMatrix`` of every configured column, built once.
+
+        Needs both snapshots and the join; ``None`` without them.
+        """
+        if self._changes is None and self.join is not None and self.updated_df is not None:
+            from multi_diff import diff_columns
+            self._changes = diff_columns(self.original_df, self.updated_df, self.original_rows,
+                                         self.join[0][self.original_rows])
+        return self._changes
+
+    def rows(self, indices):
+        """Result rows at ``indices`` as ``(td_no, td_desc, orig, updated, change)`` tuples."""
+        return list(zip(
+            self.td_no[indices].tolist(),
+            self.td_desc[indices].tolist(),
+            self.orig_qty[indices].tolist(),
+            self.updated_qty[indices].tolist(),
+            self.change[indices].tolist()
+        ))
+
+    def iter_rows(self, indices=None):
+        """Yield result rows lazily, materializing ``ROW_CHUNK`` at a time."""
+        if indices is None:
+            indices = np.arange(len(self))
+        for start in range(0, len(indices), ROW_CHUNK):
+            yield from self.rows(indices[start:start + ROW_CHUNK])
+
+    def to_records(self):
+        """The legacy list-of-dicts form of the results."""
+        return [dict(zip(RESULT_COLUMNS, row)) for row in self.iter_rows()]
+
+
+# Long single calls into pandas' hash tables hold the GIL for hundreds of
+# milliseconds on large inputs and freeze the Tk thread while a comparison
+# runs in the background. Keys are hashed in slices of this many rows
+# instead, and the join itself runs on NumPy arrays, which release the GIL.
+CHUNK_ROWS = 25_000
+
+
+class _HashCollision(Exception):
+    pass
+
+
+def _chunked(func, *arrays):
+    n_rows = len(arrays[0])
+    if n_rows == 0:
+        return func(*arrays)
+    return np.concatenate([
+        func(*(array[start:start + CHUNK_ROWS] for array in arrays))
+        for start in range(0, n_rows, CHUNK_ROWS)
+    ])
+
+
+def _hash_values(values):
+    return _chunked(lambda part: hash_array(part, categorize=False), values)
+
+
+def _keys_equal(left, right):
+    return bool(_chunked(lambda a, b: np.asarray(a == b, dtype=bool), left, right).all())
+
+
+def _unique_first(hashes, keys, valid):
+    """Sorted distinct hashes of the valid keys and the first row of each."""
+    rows = np.flatnonzero(valid)
+    order = rows[np.argsort(hashes[rows], kind='stable')]
+    sorted_hashes = hashes[order]
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = sorted_hashes[1:] != sorted_hashes[:-1]
+
+    # Rows sharing a hash must also share the key, or the hash lied
+    group_start = np.maximum.accumulate(np.where(is_first, np.arange(len(order)), 0))
+    repeats = ~is_first
+    if not _keys_equal(keys[order[repeats]], keys[order[group_start[repeats]]]):
+        raise _HashCollision()
+    return sorted_hashes[is_first], order[is_first]
+
+
+def _lookup(sorted_hashes, hashes):
+    if len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=np.intp), np.zeros(len(hashes), dtype=bool)
+    loc = np.searchsorted(sorted_hashes, hashes)
+    loc[loc == len(sorted_hashes)] = 0
+    return loc, sorted_hashes[loc] == hashes
+
+
+def _compact_strings(values):
+    """Store repetitive strings as a Categorical, others as they are.
+
+    A Categorical only saves memory when values repeat, so it is used when
+    there are at most a quarter as many distinct values as rows.
+    """
+    try:
+        hashes = _hash_values(values)
+    except TypeError:
+        return values
+    unique_hashes, first, codes = np.unique(hashes, return_index=True, return_inverse=True)
+    if len(unique_hashes) > len(values) // 4:
+        return values
+
+    categories = values[first]
+    # Missing values would come back as NaN rather than as they were
+    if pd.isna(categories).any() or not _keys_equal(values, categories[codes]):
+        return values
+    return pd.Categorical.from_codes(codes.astype(np.int32), categories=categories)
+
+
+def _hash_join(orig_keys, upd_keys, orig_valid, upd_valid):
+    orig_hashes = _hash_values(orig_keys)
+    upd_hashes = _hash_values(upd_keys)
+
+    upd_sorted, upd_first = _unique_first(upd_hashes, upd_keys, upd_valid)
+    orig_sorted, orig_first = _unique_first(orig_hashes, orig_keys, orig_valid)
+
+    loc, hit = _lookup(upd_sorted, orig_hashes)
+    hit &= orig_valid
+    # Indexed through hit only: with no updated keys there is nothing to point at
+    positions = np.full(len(orig_keys), -1, dtype=np.intp)
+    positions[hit] = upd_first[loc[hit]]
+    if not _keys_equal(orig_keys[hit], upd_keys[positions[hit]]):
+        raise _HashCollision()
+
+    upd_first = np.sort(upd_first)
+    orig_first = np.sort(orig_first)
+    added = ~_lookup(orig_sorted, upd_hashes[upd_first])[1]
+    removed = ~_lookup(upd_sorted, orig_hashes[orig_first])[1]
+    return positions, upd_first[added], orig_first[removed]
+
+
+def _index_join(orig_keys, upd_keys, orig_valid, upd_valid):
+    # Exact fallback for keys hash_array cannot handle or a hash collision
+    def first_rows(keys, valid):
+        rows = np.flatnonzero(valid)
+        return rows[~pd.Index(keys[rows]).duplicated(keep='first')]
+
+    upd_first = first_rows(upd_keys, upd_valid)
+    orig_first = first_rows(orig_keys, orig_valid)
+    upd_index = pd.Index(upd_keys[upd_first])
+    orig_index = pd.Index(orig_keys[orig_first])
+
+    loc = upd_index.get_indexer(orig_keys)
+    hit = (loc >= 0) & orig_valid
+    positions = np.full(len(orig_keys), -1, dtype=np.intp)
+    positions[hit] = upd_first[loc[hit]]
+    added = ~upd_index.isin(orig_index)
+    removed = ~orig_index.isin(upd_index)
+    return positions, upd_first[added], orig_first[removed]
+
+
+def compare_snapshots(original_df, updated_df):
+    """Join ``original_df`` to ``updated_df`` on ``Td No`` in one pass.
+
+    Every original row whose key exists in the updated snapshot is matched
+    against the first updated row with that key, so duplicate keys behave
+    exactly like the original row-by-row lookup did.
+    """
+    for name, df in (('original', original_df), ('updated', updated_df)):
+        missing = [col for col in (KEY_COLUMN, QTY_COLUMN) if col not in df.columns]
+        if missing:
+            raise KeyError(f"{name} data is missing column(s): {', '.join(missing)}")
+
+    orig_keys = original_df[KEY_COLUMN].to_numpy(dtype=object)
+    upd_keys = updated_df[KEY_COLUMN].to_numpy(dtype=object)
+    orig_valid = ~_chunked(pd.isna, orig_keys)
+    upd_valid = ~_chunked(pd.isna, upd_keys)
+
+    try:
+        positions, added_rows, removed_rows = _hash_join(orig_keys, upd_keys, orig_valid, upd_valid)
+    except (_HashCollision, TypeError):
+        positions, added_rows, removed_rows = _index_join(orig_keys, upd_keys, orig_valid, upd_valid)
+    return outcome_from_join(original_df, updated_df, positions, added_rows, removed_rows)
+
+
+def outcome_from_join(original_df, updated_df, positions, added_rows, removed_rows):
+    """Build the ``ComparisonOutcome`` of an already computed join.
+
+    ``positions`` holds, for every original row, the updated row it was
+    matched with or -1; ``added_rows`` and ``removed_rows`` are the rows
+    only found on one side. ``compare_snapshots`` produces these, and a
+    stored join of the same two snapshots can be replayed without hashing
+    any keys.
+    """
+    join = (positions, added_rows, removed_rows)
+    orig_keys = original_df[KEY_COLUMN].to_numpy(dtype=object)
+    matched = positions >= 0
+    positions = positions[matched]
+
+    if DESC_COLUMN in original_df.columns:
+        td_desc = original_df[DESC_COLUMN].to_numpy(dtype=object)[matched]
+    else:
+        td_desc = np.full(int(matched.sum()), None, dtype=object)
+
+    return ComparisonOutcome(
+        td_no=orig_keys[matched],
+        td_desc=_compact_strings(td_desc),
+        orig_qty=original_df[QTY_COLUMN].to_numpy(dtype=np.float64)[matched],
+        updated_qty=updated_df[QTY_COLUMN].to_numpy(dtype=np.float64)[positions],
+        added=updated_df.iloc[added_rows],
+        removed=original_df.iloc[removed_rows],
+        original_df=original_df,
+        original_rows=np.flatnonzero(matched),
+        join=join,
+        updated_df=updated_df
+    )
@@ -0,0 +1,1569 @@
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import numpy as np
+from datetime import datetime
+
+from figure_cache import FigureCache, estimate_figure_bytes
+from instrumentation import timings
+from job_runner import JobRunner
+from results_grid import VirtualTreeview
+
+# pandas, matplotlib, seaborn and openpyxl take seconds to import on a cold
+# desktop, so they are imported where first needed instead of up here: the
+# data modules by a background job once the window is up, the chart stack
+# when a ChartViewer opens and openpyxl on the first export.
+
+# Background jobs that drive the progress bar and the Cancel button
+PROGRESS_JOBS = ('compare', 'load-original', 'load-updated', 'export', 'series')
+
+SERIES_MOVERS = 50
+# Largest changes listed under every drill-down group
+DRILL_MOVERS = 10
+# The levels of aggregation_cube.DIMENSIONS, repeated here because that
+# module imports pandas and the tab is built before the window shows
+DRILL_LEVELS = ('Customer Group', 'Promo Type', 'Start Month', 'Quantity Range')
+# Pause in typing before the search is applied
+SEARCH_DELAY_MS = 250
+# Time between scans of a watched folder
+WATCH_INTERVAL_MS = 2000
+
+# Sortable grid columns and the result column behind each
+SORT_COLUMNS = {
+    "Td No": 'td_no',
+    "Td Desc": 'td_desc',
+    "Balance Qty (Original)": 'orig_qty',
+    "Balance Qty (Updated)": 'updated_qty',
+    "Change": 'change'
+}
+
+class ChartViewer:
+    def __init__(self, parent, comparison):
+        import charts
+        charts.apply_theme()
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Promotion Analysis Charts")
+        self.window.geometry("1200x800")
+        
+        self.comparison = comparison
+        self.current_chart = None
+        self.fig = None
+        self.ax = None
+        # One worker for on-screen charts, one for a full report export
+        self.jobs = JobRunner(self.window, max_workers=2)
+        self.figure_cache = FigureCache(on_evict=self.release_chart)
+        self.window.bind('<Destroy>', self.on_destroy)
+        
+        self.setup_gui()
+    
+    def setup_gui(self):
+        import charts
+        
+        control_frame = ttk.Frame(self.window, padding="5")
+        control_frame.pack(fill="x", padx=5, pady=5)
+        
+        # Chart Selection
+        ttk.Label(control_frame, text="Select Analysis Type:").pack(side="left", padx=5)
+        self.chart_var = tk.StringVar(value="Distribution of Changes")
+        
+        # Create chart selection dropdown
+        chart_combo = ttk.Combobox(control_frame, 
+                                 textvariable=self.chart_var,
+                                 values=[chart[0] for chart in charts.CHART_TYPES],
+                                 state="readonly",
+                                 width=30)
+        chart_combo.pack(side="left", padx=5)
+        chart_combo.bind('<<ComboboxSelected>>', lambda e: self.update_chart())
+        
+        # Used by the Top Changes chart and the full report
+        ttk.Label(control_frame, text="Top N:").pack(side="left", padx=5)
+        self.top_n_var = tk.IntVar(value=charts.DEFAULT_TOP_N)
+        top_n_spin = ttk.Spinbox(control_frame, from_=1, to=50, width=5,
+                                textvariable=self.top_n_var, command=self.top_n_changed)
+        top_n_spin.pack(side="left", padx=5)
+        top_n_spin.bind('<Return>', lambda e: self.top_n_changed())
+        
+        # Large result sets are drawn as density views unless switched off
+        self.density_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(control_frame, text="Density views for large data",
+                       variable=self.density_var,
+                       command=self.toggle_density).pack(side="left", padx=5)
+        
+        # Save Buttons
+        ttk.Button(control_frame, text="Export Full Report",
+                  command=self.export_report).pack(side="right", padx=5)
+        ttk.Button(control_frame, text="Save Chart",
+                  command=self.save_chart).pack(side="right", padx=5)
+        
+        self.status_label = ttk.Label(control_frame, text="")
+        self.status_label.pack(side="left", padx=5)
+        
+        # Chart Frame
+        self.chart_frame = ttk.LabelFrame(self.window, text="Visualization", padding="5")
+        self.chart_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        self.update_chart()
+    
+    def clear_chart(self):
+        self.figure_cache.clear()
+        self.current_chart = None
+        self.fig = None
+    
+    def release_chart(self, entry):
+        fig, canvas = entry
+        canvas.get_tk_widget().destroy()
+        if self.fig is fig:
+            self.fig = None
+    
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.jobs.shutdown()
+            self.figure_cache.clear()
+    
+    def set_comparison(self, comparison):
+        # Rendered charts stay valid as long as the content is unchanged
+        unchanged = comparison.fingerprint() == self.comparison.fingerprint()
+        self.comparison = comparison
+        if unchanged:
+            return
+        
+        if self.current_chart is not None:
+            _, chart_type, params = self.current_chart
+            params = dict(params)
+        else:
+            chart_type, params = self.chart_var.get(), {'density': self.density_var.get()}
+        self.clear_chart()
+        self.show_chart(chart_type, params)
+    
+    def update_chart(self):
+        import charts
+        
+        chart_type = self.chart_var.get()
+        params = charts.chart_params(chart_type, self.get_top_n(), self.density_var.get())
+        self.show_chart(chart_type, params)
+    
+    def get_top_n(self):
+        import charts
+        try:
+            return min(max(int(self.top_n_var.get()), 1), 50)
+        except (tk.TclError, ValueError):
+            return charts.DEFAULT_TOP_N
+    
+    def top_n_changed(self):
+        if self.chart_var.get() == "Top Changes":
+            self.update_chart()
+    
+    def toggle_density(self):
+        if self.current_chart is None:
+            self.update_chart()
+            return
+        _, chart_type, params = self.current_chart
+        params = dict(params)
+        params['density'] = self.density_var.get()
+        self.show_chart(chart_type, params)
+    
+    def show_chart(self, chart_type, params):
+        key = (self.comparison.fingerprint(), chart_type, tuple(sorted(params.items())))
+        cached = self.figure_cache.get(key)
+        if cached is not None:
+            self.jobs.cancel('chart')
+            self.status_label.configure(text="")
+            self.display_chart(key, cached)
+            return
+        
+        self.status_label.configure(text="Building chart...")
+        self.jobs.submit('chart', self.build_figure, chart_type, params,
+                         on_done=lambda fig: self.show_figure(key, fig),
+                         on_error=self.chart_failed)
+    
+    @timings.timed('chart')
+    def build_figure(self, job, chart_type, params):
+        import charts
+        if hasattr(self.comparison, 'build_chart'):
+            # Rendered by the comparison service
+            with timings.stage('server render'):
+                return self.comparison.build_chart(chart_type, params)
+        with timings.stage('data prep', len(self.comparison)):
+            df = self.comparison.enriched()
+            cube = self.comparison.cube() if chart_type in charts.CUBE_CHARTS else None
+        job.check()
+        with timings.stage('matplotlib build', len(df)):
+            return charts.build_chart_from_frame(df, chart_type, params, check=job.check,
+                                                 cube=cube)
+    
+    @timings.timed('chart draw')
+    def show_figure(self, key, fig):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.status_label.configure(text="")
+        try:
+            canvas = FigureCanvasTkAgg(fig, self.chart_frame)
+            with timings.stage('canvas.draw'):
+                canvas.draw()
+            entry = (fig, canvas)
+            self.figure_cache.put(key, entry, estimate_figure_bytes(fig))
+            self.display_chart(key, entry)
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Error creating chart: {str(e)}")
+    
+    def display_chart(self, key, entry):
+        for widget in self.chart_frame.winfo_children():
+            widget.pack_forget()
+        self.fig, canvas = entry
+        self.current_chart = key
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+    
+    def chart_failed(self, error):
+        self.status_label.configure(text="")
+        messagebox.showerror("Error", f"Error creating chart: {str(error)}")
+    
+    def save_chart(self):
+        if self.fig is None:
+            messagebox.showwarning("Warning", "No chart to save")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".png",
+            filetypes=[
+                ("PNG files", "*.png"),
+                ("JPEG files", "*.jpg"),
+                ("PDF files", "*.pdf"),
+                ("All files", "*.*")
+            ]
+        )
+        
+        if filename:
+            try:
+                self.fig.savefig(filename, bbox_inches='tight', dpi=300)
+                messagebox.showinfo("Success", f"Chart saved successfully to {filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error saving chart: {str(e)}")
+    
+    def export_report(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            initialfile=f"promotion_report_{timestamp}.pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        
+        image_dir = None
+        if messagebox.askyesno("Export Full Report", "Also save every chart as a PNG file?"):
+            image_dir = os.path.splitext(filename)[0] + "_charts"
+        
+        self.status_label.configure(text="Rendering report...")
+        self.jobs.submit('report', self.run_report, self.comparison, filename, image_dir,
+                         self.get_top_n(), self.density_var.get(),
+                         on_progress=lambda fraction, message: self.status_label.configure(text=message),
+                         on_done=self.report_finished,
+                         on_error=self.report_failed)
+    
+    def run_report(self, job, comparison, filename, image_dir, n_changes, density):
+        import chart_report
+        progress = lambda done, total: job.progress(done / total,
+                                                    f"Rendered {done} of {total} charts")
+        if hasattr(comparison, 'export_chart_report'):
+            return comparison.export_chart_report(filename, image_dir, n_changes=n_changes,
+                                                  density=density, progress=progress)
+        return chart_report.export_chart_report(
+            comparison, filename, image_dir, n_changes=n_changes, density=density,
+            progress=progress)
+    
+    def report_finished(self, paths):
+        self.status_label.configure(text="")
+        messagebox.showinfo("Success", f"Report saved successfully to {paths[-1]}")
+    
+    def report_failed(self, error):
+        self.status_label.configure(text="")
+        messagebox.showerror("Error", f"Error exporting report: {str(error)}")
+
+class PromotionAnalysisGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Promotion Analysis Dashboard")
+        self.root.geometry("1400x800")
+        
+        self.added_promotions = None
+        self.removed_promotions = None
+        self.comparison = None
+        self.filter_views = {}
+        self.loaded_files = {'original': None, 'updated': None}
+        self.file_labels = {}
+        self.jobs = JobRunner(self.root)
+        self.chart_viewers = []
+        self.series = None
+        self.series_paths = []
+        self.store = None
+        self.store_window = None
+        self.diagnostics_window = None
+        # Comparison the drill-down shows and its unopened groups
+        self.drill_comparison = None
+        self.drill_cube = None
+        self.drill_nodes = {}
+        # Comparison service the dashboard is a thin client of, if any
+        self.client = None
+        self.connect_server(os.environ.get('PROMOTION_SERVER'))
+        # Folder watched for new exports and the last export taken from it
+        self.watcher = None
+        self.watch_after = None
+        self.watch_snapshot = None
+        # Last comparison and the text it was parsed from, to update by delta
+        self.incremental = None
+        self.parsed_text = {'original': None, 'updated': None}
+        
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill='both', expand=True, padx=5, pady=5)
+        
+        self.comparison_tab = ttk.Frame(self.notebook)
+        self.analysis_tab = ttk.Frame(self.notebook)
+        self.series_tab = ttk.Frame(self.notebook)
+        self.drill_tab = ttk.Frame(self.notebook)
+        
+        self.notebook.add(self.comparison_tab, text="Comparison View")
+        self.notebook.add(self.analysis_tab, text="Analysis")
+        self.notebook.add(self.drill_tab, text="Drill-Down")
+        self.notebook.add(self.series_tab, text="Time Series")
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.refresh_drill_down())
+        
+        self.setup_comparison_tab()
+        self.setup_analysis_tab()
+        self.setup_series_tab()
+        self.setup_drill_down_tab()
+        
+        self.root.after_idle(lambda: self.jobs.submit('prefetch', self.prefetch_modules))
+    
+    def prefetch_modules(self, job):
+        # Loaded here so the first load or comparison does not pay for them
+        import comparison_engine
+        import report
+        import snapshot_loader
+        import snapshot_store
+    
+    def setup_comparison_tab(self):
+        input_frame = ttk.LabelFrame(self.comparison_tab, text="Data Input", padding=10)
+        input_frame.pack(fill="x", padx=5, pady=5)
+        
+        self.create_input_header(input_frame, "Original Data:", 'original')
+        self.original_text = tk.Text(input_frame, height=6, width=100)
+        self.original_text.pack(fill="x", pady=5)
+        
+        self.create_input_header(input_frame, "Updated Data:", 'updated')
+        self.updated_text = tk.Text(input_frame, height=6, width=100)
+        self.updated_text.pack(fill="x", pady=5)
+        
+        control_frame = ttk.Frame(input_frame)
+        control_frame.pack(fill="x", pady=5)
+        
+        ttk.Button(control_frame, text="Compare Data", 
+                  command=self.compare_data).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Clear Data", 
+                  command=self.clear_data).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Export Results", 
+                  command=self.export_to_excel).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="View Charts", 
+                  command=self.open_chart_viewer).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Snapshot Store",
+                  command=self.open_store_window).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Diagnostics",
+                  command=self.open_diagnostics_window).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Server...",
+                  command=self.choose_server).pack(side="left", padx=5)
+        self.watch_button = ttk.Button(control_frame, text="Watch Folder...",
+                                      command=self.toggle_watch)
+        self.watch_button.pack(side="left", padx=5)
+        self.watch_label = ttk.Label(control_frame, text="")
+        self.watch_label.pack(side="left", padx=5)
+        
+        self.cancel_button = ttk.Button(control_frame, text="Cancel",
+                                       command=self.cancel_jobs, state="disabled")
+        self.cancel_button.pack(side="right", padx=5)
+        self.progress_bar = ttk.Progressbar(control_frame, length=200, maximum=100)
+        self.progress_bar.pack(side="right", padx=5)
+        self.status_label = ttk.Label(control_frame, text="")
+        self.status_label.pack(side="right", padx=5)
+        
+        filter_frame = ttk.LabelFrame(self.comparison_tab, text="Filters", padding=10)
+        filter_frame.pack(fill="x", padx=5, pady=5)
+        
+        self.filter_var = tk.StringVar(value="all")
+        ttk.Radiobutton(filter_frame, text="Show All", variable=self.filter_var, 
+                       value="all", command=self.apply_filter).pack(side="left", padx=5)
+        ttk.Radiobutton(filter_frame, text="Show Changes Only", variable=self.filter_var, 
+                       value="changes", command=self.apply_filter).pack(side="left", padx=5)
+        ttk.Radiobutton(filter_frame, text="Any Column Changed", variable=self.filter_var, 
+                       value="any", command=self.apply_filter).pack(side="left", padx=5)
+        ttk.Radiobutton(filter_frame, text="Column Changed:", variable=self.filter_var, 
+                       value="column", command=self.apply_filter).pack(side="left", padx=5)
+        self.column_var = tk.StringVar()
+        self.column_combo = ttk.Combobox(filter_frame, textvariable=self.column_var,
+                                         state="readonly", width=18)
+        self.column_combo.pack(side="left", padx=5)
+        self.column_combo.bind('<<ComboboxSelected>>', self.column_selected)
+        
+        ttk.Button(filter_frame, text="Clear",
+                  command=self.clear_search).pack(side="right", padx=5)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
+        search_entry.pack(side="right", padx=5)
+        search_entry.bind('<KeyRelease>', self.search_changed)
+        search_entry.bind('<Return>', lambda e: self.apply_search())
+        ttk.Label(filter_frame, text="Search Td No / Desc:").pack(side="right", padx=5)
+        self.search_after = None
+        self.sort_state = None
+        
+        results_frame = ttk.LabelFrame(self.comparison_tab, text="Comparison Results", padding=10)
+        results_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        columns = ("Td No", "Td Desc", "Balance Qty (Original)", "Balance Qty (Updated)", "Change",
+                   "Changed Columns")
+        self.tree = VirtualTreeview(results_frame, columns, self.format_result_rows)
+        
+        self.tree.bind_headings(self.sort_by)
+        self.tree.tag_configure('increase', background='#90EE90')
+        self.tree.tag_configure('decrease', background='#FFB6C1')
+    
+    def create_input_header(self, parent, text, side):
+        header = ttk.Frame(parent)
+        header.pack(fill="x")
+        ttk.Label(header, text=text).pack(side="left")
+        ttk.Button(header, text="Load File",
+                  command=lambda: self.load_file(side)).pack(side="left", padx=5)
+        self.file_labels[side] = ttk.Label(header, text="")
+        self.file_labels[side].pack(side="left", padx=5)
+    
+    def setup_analysis_tab(self):
+        self.summary_frame = ttk.LabelFrame(self.analysis_tab, text="Summary Statistics", padding=10)
+        self.summary_frame.pack(fill="x", padx=5, pady=5)
+        
+        analysis_frame = ttk.LabelFrame(self.analysis_tab, text="Detailed Analysis", padding=10)
+        analysis_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        self.analysis_tree = ttk.Treeview(analysis_frame, show="headings")
+        vsb = ttk.Scrollbar(analysis_frame, orient="vertical", command=self.analysis_tree.yview)
+        hsb = ttk.Scrollbar(analysis_frame, orient="horizontal", command=self.analysis_tree.xview)
+        
+        self.analysis_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        
+        self.analysis_tree.grid(column=0, row=0, sticky="nsew")
+        vsb.grid(column=1, row=0, sticky="ns")
+        hsb.grid(column=0, row=1, sticky="ew")
+        
+        analysis_frame.grid_columnconfigure(0, weight=1)
+        analysis_frame.grid_rowconfigure(0, weight=1)
+    
+    def setup_drill_down_tab(self):
+        ttk.Label(self.drill_tab, padding=(10, 5), text=(
+            "Open a group to split it by " + " > ".join(DRILL_LEVELS) +
+            f" and list its {DRILL_MOVERS} largest changes")).pack(fill="x")
+        
+        drill_frame = ttk.LabelFrame(self.drill_tab, text="Groups", padding=10)
+        drill_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        columns = ("Promotions", "Changed", "Avg Change", "Std Dev", "Net Change", "Updated Qty")
+        self.drill_tree = ttk.Treeview(drill_frame, columns=columns, show="tree headings")
+        self.drill_tree.heading("#0", text="Group")
+        self.drill_tree.column("#0", width=320)
+        for col in columns:
+            self.drill_tree.heading(col, text=col)
+            self.drill_tree.column(col, width=120, anchor="e")
+        vsb = ttk.Scrollbar(drill_frame, orient="vertical", command=self.drill_tree.yview)
+        self.drill_tree.configure(yscrollcommand=vsb.set)
+        self.drill_tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        self.drill_tree.bind('<<TreeviewOpen>>', self.open_drill_node)
+    
+    def refresh_drill_down(self):
+        # Built only while the tab is shown; the cube costs a pass over the rows
+        if self.notebook.select() != str(self.drill_tab):
+            return
+        if self.comparison is self.drill_comparison:
+            return
+        self.drill_tree.delete(*self.drill_tree.get_children())
+        self.drill_nodes = {}
+        self.drill_comparison = self.comparison
+        if self.comparison is None or not hasattr(self.comparison, 'cube'):
+            return
+        comparison = self.comparison
+        self.jobs.submit('drill-down', self.run_drill_down, comparison,
+                         on_done=lambda cube: self.show_drill_down(comparison, cube),
+                         on_error=self.drill_down_failed)
+    
+    @timings.timed('drill-down')
+    def run_drill_down(self, job, comparison):
+        with timings.stage('aggregate', len(comparison)):
+            return comparison.cube()
+    
+    def show_drill_down(self, comparison, cube):
+        if comparison is not self.comparison:
+            return
+        self.drill_cube = cube
+        self.insert_drill_level("", {})
+    
+    def drill_down_failed(self, error):
+        self.drill_comparison = None
+        messagebox.showerror("Error", f"Error building drill-down: {str(error)}")
+    
+    def open_drill_node(self, event=None):
+        node = self.drill_tree.focus()
+        where = self.drill_nodes.pop(node, None)
+        if where is None:
+            return
+        self.drill_tree.delete(*self.drill_tree.get_children(node))
+        self.insert_drill_level(node, where)
+    
+    def insert_drill_level(self, parent, where):
+        from aggregation_cube import DIMENSIONS
+        
+        cube = self.drill_cube
+        if len(where) < len(DIMENSIONS):
+            name = DIMENSIONS[len(where)]
+            groups = cube.rollup([name], where)
+            for label, stats in zip(groups.index, groups.itertuples(index=False)):
+                node = self.drill_tree.insert(parent, "end", text=f"{name}: {label}", values=(
+                    f"{stats.rows:,}",
+                    f"{stats.changed:,}",
+                    f"{stats.mean:+.1f}",
+                    f"{stats.std:.1f}" if stats.count > 1 else "",
+                    f"{stats.sum:+,.0f}",
+                    f"{stats.updated_qty:,.0f}"
+                ))
+                # Filled in when opened
+                self.drill_nodes[node] = {**where, name: label}
+                self.drill_tree.insert(node, "end", text="...")
+        if where:
+            movers = cube.top_movers(DRILL_MOVERS, where)
+            node = self.drill_tree.insert(parent, "end", text=f"Largest {len(movers)} changes")
+            for td_no, td_desc, orig_qty, updated_qty, change in self.drill_comparison.rows(movers):
+                self.drill_tree.insert(node, "end", text=f"{td_no}  {td_desc}", values=(
+                    "", "", "", "", f"{change:+.0f}", f"{updated_qty:.0f}"))
+    
+    def setup_series_tab(self):
+        input_frame = ttk.LabelFrame(self.series_tab, text="Snapshots (oldest first)", padding=10)
+        input_frame.pack(fill="x", padx=5, pady=5)
+        
+        button_frame = ttk.Frame(input_frame)
+        button_frame.pack(fill="x")
+        ttk.Button(button_frame, text="Add Snapshots",
+                  command=self.add_series_files).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Clear Snapshots",
+                  command=self.clear_series).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Build Series",
+                  command=self.build_series).pack(side="left", padx=5)
+        
+        self.series_list = tk.Listbox(input_frame, height=6)
+        self.series_list.pack(fill="x", pady=5)
+        
+        pair_frame = ttk.Frame(input_frame)
+        pair_frame.pack(fill="x")
+        ttk.Label(pair_frame, text="Compare:").pack(side="left", padx=5)
+        self.pair_from_var = tk.StringVar()
+        self.pair_to_var = tk.StringVar()
+        self.pair_from_combo = ttk.Combobox(pair_frame, textvariable=self.pair_from_var,
+                                           state="readonly", width=30)
+        self.pair_from_combo.pack(side="left", padx=5)
+        ttk.Label(pair_frame, text="to").pack(side="left")
+        self.pair_to_combo = ttk.Combobox(pair_frame, textvariable=self.pair_to_var,
+                                         state="readonly", width=30)
+        self.pair_to_combo.pack(side="left", padx=5)
+        ttk.Button(pair_frame, text="Compare Selected Pair",
+                  command=self.compare_series_pair).pack(side="left", padx=5)
+        
+        self.series_summary = ttk.Label(self.series_tab, text="", padding=(10, 0))
+        self.series_summary.pack(fill="x", padx=5)
+        
+        movers_frame = ttk.LabelFrame(self.series_tab, text="Largest Movers", padding=10)
+        movers_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        sort_frame = ttk.Frame(movers_frame)
+        sort_frame.pack(fill="x")
+        ttk.Label(sort_frame, text="Rank by:").pack(side="left", padx=5)
+        self.movers_by_var = tk.StringVar(value="net_change")
+        for text, value in (("Net Change", "net_change"), ("Total Movement", "total_movement"),
+                            ("Burn Rate", "burn_rate")):
+            ttk.Radiobutton(sort_frame, text=text, variable=self.movers_by_var,
+                           value=value, command=self.show_movers).pack(side="left", padx=5)
+        
+        columns = ("Td No", "Td Desc", "First Qty", "Last Qty", "Net Change",
+                   "Total Movement", "Burn Rate", "Snapshots")
+        self.movers_tree = ttk.Treeview(movers_frame, columns=columns, show="headings")
+        for col in columns:
+            self.movers_tree.heading(col, text=col)
+            self.movers_tree.column(col, width=120)
+        vsb = ttk.Scrollbar(movers_frame, orient="vertical", command=self.movers_tree.yview)
+        self.movers_tree.configure(yscrollcommand=vsb.set)
+        self.movers_tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+    
+    def clear_data(self):
+        self.cancel_jobs()
+        self.original_text.delete(1.0, tk.END)
+        self.updated_text.delete(1.0, tk.END)
+        for side in self.loaded_files:
+            self.loaded_files[side] = None
+            self.file_labels[side].configure(text="")
+        self.tree.clear()
+        self.comparison = None
+        self.incremental = None
+        self.parsed_text = {'original': None, 'updated': None}
+        self.filter_views = {}
+        self.added_promotions = None
+        self.removed_promotions = None
+        # The next export from a watched folder starts over as the baseline
+        self.watch_snapshot = None
+        self.clear_analysis()
+    
+    def clear_analysis(self):
+        for widget in self.summary_frame.winfo_children():
+            widget.destroy()
+        self.analysis_tree.delete(*self.analysis_tree.get_children())
+        self.drill_tree.delete(*self.drill_tree.get_children())
+        self.drill_comparison = None
+        self.drill_nodes = {}
+    
+    def load_file(self, side):
+        from snapshot_loader import FILE_TYPES
+        
+        filename = filedialog.askopenfilename(filetypes=FILE_TYPES)
+        if not filename:
+            return
+        
+        self.file_labels[side].configure(text=f"Loading {os.path.basename(filename)}...")
+        self.show_progress(None, f"Loading {os.path.basename(filename)}")
+        self.jobs.submit(f'load-{side}', self.run_load, filename,
+                         on_progress=self.show_progress,
+                         on_done=lambda df: self.file_loaded(side, filename, df),
+                         on_error=lambda e: self.load_failed(side, e),
+                         on_cancel=lambda: self.file_labels[side].configure(text=""))
+    
+    def get_store(self):
+        from snapshot_store import SnapshotStore
+        
+        if self.store is None:
+            self.store = SnapshotStore()
+        return self.store
+    
+    def connect_server(self, url):
+        title = "Promotion Analysis Dashboard"
+        if not url:
+            # Working locally; the client pulls in pandas, so it is not imported
+            self.client = None
+            self.root.title(title)
+            return
+        
+        from service_client import ServiceClient
+        
+        self.client = ServiceClient(url)
+        self.root.title(f"{title} - {self.client.url}")
+    
+    def choose_server(self):
+        url = simpledialog.askstring(
+            "Comparison Server",
+            "URL of a comparison service (python promotion_analysis.py serve),\n"
+            "or leave empty to work locally:",
+            initialvalue=self.client.url if self.client else "http://127.0.0.1:8765",
+            parent=self.root)
+        if url is None:
+            return
+        try:
+            self.connect_server(url.strip())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Error connecting to server: {str(e)}")
+            return
+        # Loaded snapshots live either here or on the server
+        self.clear_data()
+    
+    @timings.timed('load')
+    def run_load(self, job, filename):
+        if self.client is not None:
+            job.progress(None, "Uploading")
+            with timings.stage('upload'):
+                return self.client.upload_file(filename)
+        # Files seen before come straight from the store without parsing
+        return self.get_store().load_file(
+            filename,
+            progress=lambda rows: job.progress(None, f"Loaded {rows:,} rows"))
+    
+    def file_loaded(self, side, filename, df):
+        self.hide_progress()
+        # A loaded file replaces whatever was pasted for this side
+        text_widget = self.original_text if side == 'original' else self.updated_text
+        text_widget.delete(1.0, tk.END)
+        self.loaded_files[side] = df
+        self.file_labels[side].configure(
+            text=f"Loaded {os.path.basename(filename)} ({len(df):,} rows)")
+    
+    def load_failed(self, side, error):
+        self.hide_progress()
+        self.file_labels[side].configure(text="")
+        messagebox.showerror("Error", f"Error loading file: {str(error)}")
+    
+    def get_snapshot(self, text_data, loaded_df, previous=None):
+        from snapshot_loader import parse_text_edit
+        
+        if not text_data:
+            return loaded_df
+        try:
+            if previous is not None:
+                # Re-pasted text only parses the lines that changed
+                previous_text, previous_df = previous
+                if text_data == previous_text:
+                    return previous_df
+                return parse_text_edit(text_data, previous_text, previous_df)
+            return self.get_store().parse_text(text_data)
+        except Exception as e:
+            raise ValueError(f"Error parsing data: {str(e)}") from e
+    
+    def compare_data(self):
+        original_text = self.original_text.get("1.0", tk.END).strip()
+        updated_text = self.updated_text.get("1.0", tk.END).strip()
+        
+        if ((not original_text and self.loaded_files['original'] is None) or
+                (not updated_text and self.loaded_files['updated'] is None)):
+            messagebox.showwarning("Warning", "Please paste or load both original and updated data")
+            return
+        
+        # Submitting under the same key supersedes a comparison still running
+        self.show_progress(0, "Starting comparison")
+        self.jobs.submit('compare', self.run_comparison,
+                         original_text, updated_text, dict(self.loaded_files),
+                         on_progress=self.show_progress,
+                         on_done=self.show_comparison,
+                         on_error=self.comparison_failed)
+    
+    @timings.timed('compare')
+    def run_comparison(self, job, original_text, updated_text, loaded_files):
+        from incremental import IncrementalComparison
+        
+        if self.client is not None:
+            return self.run_remote_comparison(job, self.client, original_text, updated_text,
+                                              loaded_files)
+        previous = self.incremental
+        parsed_text = dict(self.parsed_text)
+        job.progress(0.05, "Parsing original data")
+        with timings.stage('parse original') as stage:
+            original_df = self.get_snapshot(original_text, loaded_files['original'],
+                                            parsed_text['original'])
+            stage.rows = len(original_df)
+        job.progress(0.25, "Parsing updated data")
+        with timings.stage('parse updated') as stage:
+            updated_df = self.get_snapshot(updated_text, loaded_files['updated'],
+                                           parsed_text['updated'])
+            stage.rows = len(updated_df)
+        parsed_text = {
+            'original': (original_text, original_df) if original_text else None,
+            'updated': (updated_text, updated_df) if updated_text else None
+        }
+        
+        if previous is not None and previous.original_df is original_df:
+            job.progress(0.45, "Updating comparison")
+            with timings.stage('incremental update', len(updated_df)):
+                update = previous.update(updated_df)
+            if update is not None:
+                incremental, delta = update
+                outcome = incremental.outcome
+                job.check()
+                with timings.stage('filter views', len(outcome)):
+                    filter_views = self.build_filter_views(outcome)
+                return {
+                    'original_df': original_df,
+                    'updated_df': updated_df,
+                    'outcome': outcome,
+                    'filter_views': filter_views,
+                    'incremental': incremental,
+                    'delta': delta,
+                    'parsed_text': parsed_text
+                }
+        
+        job.progress(0.45, "Comparing")
+        # Replays the stored join when these two snapshots were compared before
+        with timings.stage('join') as stage:
+            outcome = self.get_store().compare(original_df, updated_df)
+            stage.rows = len(outcome)
+        job.progress(0.65, "Building results")
+        with timings.stage('filter views', len(outcome)):
+            filter_views = self.build_filter_views(outcome)
+        job.progress(0.85, "Summarizing")
+        with timings.stage('summary', len(outcome)):
+            outcome.summary()
+            outcome.fingerprint()
+        with timings.stage('enrich', len(outcome)):
+            outcome.enriched()
+        job.check()
+        
+        return {
+            'original_df': original_df,
+            'updated_df': updated_df,
+            'outcome': outcome,
+            'filter_views': filter_views,
+            'incremental': IncrementalComparison(outcome, updated_df),
+            'delta': None,
+            'parsed_text': parsed_text
+        }
+    
+    def run_remote_comparison(self, job, client, original_text, updated_text, loaded_files):
+        from service_client import RemoteSnapshot
+        
+        snapshots = {}
+        for side, text in (('original', original_text), ('updated', updated_text)):
+            job.progress(0.05 if side == 'original' else 0.25, f"Uploading {side} data")
+            with timings.stage(f"upload {side}") as stage:
+                if text:
+                    snapshots[side] = client.upload_text(text)
+                elif isinstance(loaded_files[side], RemoteSnapshot):
+                    snapshots[side] = loaded_files[side]
+                else:
+                    raise ValueError(f"Load the {side} file again to send it to the server")
+                stage.rows = len(snapshots[side])
+        
+        job.progress(0.45, "Comparing on server")
+        with timings.stage('server compare') as stage:
+            outcome = client.compare(snapshots['original'], snapshots['updated'])
+            stage.rows = len(outcome)
+        job.check()
+        with timings.stage('filter views', len(outcome)):
+            filter_views = self.build_filter_views(outcome)
+        return {
+            'original_df': None,
+            'updated_df': None,
+            'outcome': outcome,
+            'filter_views': filter_views,
+            'incremental': None,
+            'delta': None,
+            'parsed_text': {'original': None, 'updated': None}
+        }
+    
+    def build_filter_views(self, outcome):
+        changes = outcome.changes()
+        return {
+            'all': np.arange(len(outcome)),
+            'changes': np.flatnonzero(outcome.change != 0),
+            'any': changes.rows(),
+            # Filled per column on first use, see current_view
+            'column': {}
+        }
+    
+    @timings.timed('show comparison')
+    def show_comparison(self, result):
+        self.hide_progress()
+        outcome = result['outcome']
+        self.comparison = outcome
+        self.filter_views = result['filter_views']
+        self.added_promotions = outcome.added
+        self.removed_promotions = outcome.removed
+        self.incremental = result['incremental']
+        self.parsed_text = result['parsed_text']
+        
+        columns = outcome.changes().columns
+        self.column_combo.configure(values=columns)
+        if self.column_var.get() not in columns:
+            self.column_var.set(columns[0] if columns else "")
+        
+        # Index the keys while idle so the next edit can be applied by delta
+        incremental = self.incremental
+        if incremental is not None:
+            self.jobs.submit('incremental-index', lambda job: incremental.prepare())
+        # Search and sort indexes too, so the first lookup is instant
+        if hasattr(outcome, 'search_index'):
+            index = outcome.search_index()
+            self.jobs.submit('search-index', lambda job: index.prepare())
+        
+        delta = result['delta']
+        if delta is None:
+            self.apply_filter()
+        elif delta:
+            # Inserted or removed rows shift every position after them
+            with timings.stage('grid update', len(delta.changed_rows)):
+                self.tree.update_view(self.current_view(),
+                                      None if delta.structural else delta.changed_rows)
+        else:
+            return
+        self.update_analysis()
+        self.refresh_drill_down()
+        with timings.stage('chart refresh', len(self.chart_viewers)):
+            self.refresh_chart_viewers()
+    
+    def comparison_failed(self, error):
+        self.hide_progress()
+        messagebox.showerror("Error", f"Error during comparison: {str(error)}")
+    
+    def toggle_watch(self):
+        if self.watcher is not None:
+            self.stop_watch()
+            return
+        directory = filedialog.askdirectory(title="Folder to Watch for New Exports")
+        if directory:
+            self.start_watch(directory)
+    
+    def start_watch(self, directory):
+        from snapshot_watcher import DirectoryWatcher
+        
+        self.watcher = DirectoryWatcher(directory)
+        self.watch_snapshot = None
+        self.watch_button.configure(text="Stop Watching")
+        self.watch_label.configure(text=f"Watching {os.path.basename(self.watcher.directory)}")
+        self.poll_watch()
+    
+    def stop_watch(self):
+        if self.watch_after is not None:
+            self.root.after_cancel(self.watch_after)
+            self.watch_after = None
+        self.jobs.cancel('watch')
+        self.watcher = None
+        self.watch_snapshot = None
+        self.watch_button.configure(text="Watch Folder...")
+        self.watch_label.configure(text="")
+    
+    def schedule_watch(self):
+        if self.watcher is not None and self.watch_after is None:
+            self.watch_after = self.root.after(WATCH_INTERVAL_MS, self.poll_watch)
+    
+    def poll_watch(self):
+        self.watch_after = None
+        if self.watcher is None:
+            return
+        if any(self.jobs.is_running(key) for key in PROGRESS_JOBS):
+            # New exports wait until the user's own loads and comparisons finish
+            self.schedule_watch()
+            return
+        # Scanning runs in the pool too: a folder on a share can be slow to list
+        watcher = self.watcher
+        self.jobs.submit('watch', lambda job: watcher.poll(),
+                         on_done=lambda paths: self.watch_polled(watcher, paths),
+                         on_error=self.watch_failed)
+    
+    def watch_polled(self, watcher, paths):
+        if watcher is not self.watcher:
+            return
+        if not paths:
+            self.schedule_watch()
+            return
+        self.show_progress(0, f"Loading {os.path.basename(paths[-1])}")
+        # Under the compare key, so Cancel and a manual comparison supersede it
+        self.jobs.submit('compare', self.run_watch, paths, self.watch_snapshot, self.comparison,
+                         on_progress=self.show_progress,
+                         on_done=self.show_watch,
+                         on_error=lambda e: self.watch_compare_failed(paths[-1], e),
+                         on_cancel=self.schedule_watch)
+    
+    @timings.timed('watch')
+    def run_watch(self, job, paths, previous, shown):
+        """Load the newest of ``paths`` and compare it with the export before it."""
+        from incremental import outcome_delta
+        
+        # A burst of exports only compares the last two
+        if len(paths) > 1:
+            job.progress(None, f"Loading {os.path.basename(paths[-2])}")
+            previous = (paths[-2], self.run_load(job, paths[-2]))
+        job.progress(None, f"Loading {os.path.basename(paths[-1])}")
+        latest = (paths[-1], self.run_load(job, paths[-1]))
+        result = {'previous': previous, 'latest': latest, 'comparison': None}
+        # The first export is the baseline; a re-saved copy changes nothing
+        if previous is None or same_snapshot(previous[1], latest[1]):
+            return result
+        
+        comparison = self.run_comparison(job, "", "", {'original': previous[1],
+                                                       'updated': latest[1]})
+        if comparison['delta'] is None and shown is not None and self.client is None:
+            # Same promotions in the same order: only rows that differ are redrawn
+            with timings.stage('watch delta', len(comparison['outcome'])):
+                comparison['delta'] = outcome_delta(shown, comparison['outcome'])
+        result['comparison'] = comparison
+        return result
+    
+    def show_watch(self, result):
+        self.schedule_watch()
+        self.watch_snapshot = result['latest']
+        name = os.path.basename(result['latest'][0])
+        if result['comparison'] is None:
+            self.hide_progress()
+            state = "is the baseline" if result['previous'] is None else "has no changes"
+            self.watch_label.configure(text=f"Watching: {name} {state}")
+            return
+        
+        for side, (path, snapshot) in (('original', result['previous']),
+                                       ('updated', result['latest'])):
+            text_widget = self.original_text if side == 'original' else self.updated_text
+            text_widget.delete(1.0, tk.END)
+            self.loaded_files[side] = snapshot
+            self.file_labels[side].configure(
+                text=f"Loaded {os.path.basename(path)} ({len(snapshot):,} rows)")
+        self.watch_label.configure(
+            text=f"Watching: compared {name} at {datetime.now().strftime('%H:%M:%S')}")
+        self.show_comparison(result['comparison'])
+    
+    def watch_compare_failed(self, path, error):
+        # Keep watching: the next export may well be fine
+        self.schedule_watch()
+        self.hide_progress()
+        self.watch_label.configure(text=f"Watching: skipped {os.path.basename(path)} ({error})")
+    
+    def watch_failed(self, error):
+        self.stop_watch()
+        messagebox.showerror("Error", f"Error watching folder: {str(error)}")
+    
+    def cancel_jobs(self):
+        for key in PROGRESS_JOBS:
+            self.jobs.cancel(key)
+        self.hide_progress()
+    
+    def show_progress(self, fraction, message=""):
+        if fraction is None:
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.step(5)
+        else:
+            self.progress_bar.configure(mode="determinate", value=fraction * 100)
+        self.status_label.configure(text=message)
+        self.cancel_button.state(["!disabled"])
+    
+    def hide_progress(self):
+        if any(self.jobs.is_running(key) for key in PROGRESS_JOBS):
+            return
+        self.progress_bar.configure(mode="determinate", value=0)
+        self.status_label.configure(text="")
+        self.cancel_button.state(["disabled"])
+    
+    @timings.timed('filter')
+    def apply_filter(self):
+        if self.comparison is None:
+            self.tree.clear()
+            return
+        view = self.current_view()
+        with timings.stage('grid', len(view)):
+            self.tree.set_view(view)
+    
+    def column_selected(self, event=None):
+        self.filter_var.set("column")
+        self.apply_filter()
+    
+    def search_changed(self, event=None):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DELAY_MS, self.apply_search)
+    
+    def apply_search(self):
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+            self.search_after = None
+        self.apply_filter()
+        text = self.search_var.get().strip()
+        if text and self.comparison is not None:
+            # An exact Td No is selected as well
+            exact = self.comparison.search_index().find_td_no(text)
+            if len(exact):
+                self.tree.show_row(exact[0])
+    
+    def clear_search(self):
+        self.search_var.set("")
+        self.apply_search()
+    
+    def sort_by(self, column):
+        if column not in SORT_COLUMNS:
+            return
+        if self.sort_state is not None:
+            self.tree.set_heading(self.sort_state[0], self.sort_state[0])
+        descending = self.sort_state == (column, False)
+        self.sort_state = (column, descending)
+        self.tree.set_heading(column, f"{column} {'▼' if descending else '▲'}")
+        self.apply_filter()
+    
+    def filter_view(self):
+        mode = self.filter_var.get()
+        if mode != 'column':
+            return self.filter_views[mode]
+        column = self.column_var.get()
+        views = self.filter_views['column']
+        if column not in views:
+            changes = self.comparison.changes()
+            views[column] = (changes.rows([column]) if column in changes.columns
+                             else np.empty(0, dtype=np.intp))
+        return views[column]
+    
+    def current_view(self):
+        view = self.filter_view()
+        text = self.search_var.get().strip()
+        if not text and self.sort_state is None:
+            return view
+        index = self.comparison.search_index()
+        if text:
+            with timings.stage('search', len(view)):
+                in_view = np.zeros(len(self.comparison), dtype=bool)
+                in_view[index.search(text)] = True
+                view = view[in_view[view]]
+        if self.sort_state is not None:
+            column, descending = self.sort_state
+            with timings.stage('sort', len(view)):
+                view = index.sorted_view(view, SORT_COLUMNS[column], descending)
+        return view
+    
+    def format_result_rows(self, indices):
+        rows = []
+        changed_columns = self.comparison.changes().names(indices)
+        for (td_no, td_desc, orig_qty, updated_qty, change), columns in zip(
+                self.comparison.rows(indices), changed_columns):
+            tag = 'increase' if change > 0 else (
+                'decrease' if change < 0 else '')
+            rows.append(((
+                td_no,
+                td_desc,
+                f"{orig_qty:.0f}",
+                f"{updated_qty:.0f}",
+                f"{change:+.0f}",
+                columns
+            ), (tag,)))
+        return rows
+    
+    @timings.timed('analysis')
+    def update_analysis(self):
+        for widget in self.summary_frame.winfo_children():
+            widget.destroy()
+        
+        if self.comparison is None or not len(self.comparison):
+            ttk.Label(self.summary_frame, text="No data to analyze").pack(anchor="w")
+            return
+        
+        import report
+        
+        with timings.stage('summary stats', len(self.comparison)):
+            summary = self.comparison.summary()
+            counts = self.comparison.changes().counts()
+        for stat in report.summary_lines(summary):
+            ttk.Label(self.summary_frame, text=stat).pack(anchor="w", pady=2)
+        
+        self.analysis_tree["columns"] = ["Category", "Details", "Value"]
+        for col in self.analysis_tree["columns"]:
+            self.analysis_tree.heading(col, text=col)
+            self.analysis_tree.column(col, width=200)
+        
+        self.analysis_tree.delete(*self.analysis_tree.get_children())
+        
+        items = report.analysis_items(summary) + report.column_change_items(counts)
+        with timings.stage('analysis widgets', len(items)):
+            for category, details, value in items:
+                self.analysis_tree.insert("", "end", values=(category, details, value))
+    
+    def open_chart_viewer(self):
+        if self.comparison is None or not len(self.comparison):
+            messagebox.showwarning("Warning", "No data to display charts")
+            return
+        self.chart_viewers.append(
+            ChartViewer(self.root, self.comparison))
+    
+    def refresh_chart_viewers(self):
+        self.chart_viewers = [viewer for viewer in self.chart_viewers
+                              if viewer.window.winfo_exists()]
+        for viewer in self.chart_viewers:
+            viewer.set_comparison(self.comparison)
+    
+    def export_to_excel(self):
+        import report
+        
+        if self.comparison is None or not len(self.comparison):
+            messagebox.showwarning("Warning", "No data to export")
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            initialfile=f"promotion_comparison_{timestamp}.xlsx",
+            filetypes=report.EXPORT_TYPES
+        )
+        
+        if not filename:
+            return
+        try:
+            report.check_export_path(filename)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Error exporting data: {str(e)}")
+            return
+        
+        extra_sheets = []
+        if filename.lower().endswith('.xlsx') and messagebox.askyesno(
+                "Export", "Add sheets per customer group, per promo type and for the "
+                          f"top {report.DEFAULT_TOP_N} changes?"):
+            extra_sheets = report.EXTRA_SHEETS
+        
+        self.show_progress(0, f"Exporting {os.path.basename(filename)}")
+        self.jobs.submit('export', self.run_export, self.comparison, filename, extra_sheets,
+                         on_progress=self.show_progress,
+                         on_done=lambda _: self.export_finished(filename),
+                         on_error=self.export_failed)
+    
+    @timings.timed('export')
+    def run_export(self, job, comparison, filename, extra_sheets):
+        import report
+        with timings.stage(f"write {os.path.splitext(filename)[1]}", len(comparison)):
+            if hasattr(comparison, 'export'):
+                # Written by the comparison service
+                return comparison.export(filename, extra_sheets,
+                                         progress=lambda fraction: job.progress(fraction, "Exporting"))
+            report.export_results(
+                comparison, filename, extra_sheets,
+                progress=lambda fraction: job.progress(fraction, "Exporting"))
+    
+    def export_finished(self, filename):
+        self.hide_progress()
+        messagebox.showinfo("Success", f"Data exported successfully to {filename}")
+    
+    def export_failed(self, error):
+        self.hide_progress()
+        messagebox.showerror("Error", f"Error exporting data: {str(error)}")
+    
+    def add_series_files(self):
+        from snapshot_loader import FILE_TYPES
+        from snapshot_series import order_paths
+        
+        filenames = filedialog.askopenfilenames(filetypes=FILE_TYPES)
+        if not filenames:
+            return
+        self.series_paths = order_paths(set(self.series_paths) | set(filenames))
+        self.series_list.delete(0, tk.END)
+        for path in self.series_paths:
+            self.series_list.insert(tk.END, os.path.basename(path))
+    
+    def clear_series(self):
+        self.jobs.cancel('series')
+        self.hide_progress()
+        self.series_paths = []
+        self.series = None
+        self.series_list.delete(0, tk.END)
+        self.pair_from_combo.configure(values=[])
+        self.pair_to_combo.configure(values=[])
+        self.pair_from_var.set("")
+        self.pair_to_var.set("")
+        self.series_summary.configure(text="")
+        self.movers_tree.delete(*self.movers_tree.get_children())
+    
+    def build_series(self):
+        if len(self.series_paths) < 2:
+            messagebox.showwarning("Warning", "Please add at least two snapshots")
+            return
+        
+        self.show_progress(0, "Loading snapshots")
+        self.jobs.submit('series', self.run_series, list(self.series_paths),
+                         on_progress=self.show_progress,
+                         on_done=self.show_series,
+                         on_error=self.series_failed)
+    
+    def run_series(self, job, paths):
+        from snapshot_series import load_series
+        
+        series = load_series(
+            paths,
+            progress=lambda done, total: job.progress(done / total * 0.9,
+                                                      f"Loaded {done} of {total} snapshots"))
+        job.progress(0.95, "Computing movers")
+        series.summary()
+        return series
+    
+    def show_series(self, series):
+        self.hide_progress()
+        self.series = series
+        self.pair_from_combo.configure(values=series.labels)
+        self.pair_to_combo.configure(values=series.labels)
+        self.pair_from_var.set(series.labels[-2])
+        self.pair_to_var.set(series.labels[-1])
+        
+        totals = series.snapshot_totals()
+        self.series_summary.configure(text=(
+            f"{len(series):,} promotions across {series.n_snapshots} snapshots; "
+            f"total Balance Qty {totals['total_qty'].iloc[0]:,.0f} -> "
+            f"{totals['total_qty'].iloc[-1]:,.0f}; burn rate per {series.time_unit}"))
+        self.show_movers()
+    
+    def series_failed(self, error):
+        self.hide_progress()
+        messagebox.showerror("Error", f"Error building series: {str(error)}")
+    
+    def show_movers(self):
+        self.movers_tree.delete(*self.movers_tree.get_children())
+        if self.series is None:
+            return
+        movers = self.series.largest_movers(SERIES_MOVERS, by=self.movers_by_var.get())
+        for row in movers.itertuples(index=False):
+            self.movers_tree.insert("", "end", values=(
+                row.td_no,
+                row.td_desc,
+                f"{row.first_qty:.0f}",
+                f"{row.last_qty:.0f}",
+                f"{row.net_change:+.0f}",
+                f"{row.total_movement:.0f}",
+                f"{row.burn_rate:,.1f}",
+                row.snapshots_present
+            ))
+    
+    def compare_series_pair(self):
+        if self.series is None:
+            messagebox.showwarning("Warning", "Please build the series first")
+            return
+        labels = self.series.labels
+        original_path = self.series.sources[labels.index(self.pair_from_var.get())]
+        updated_path = self.series.sources[labels.index(self.pair_to_var.get())]
+        
+        # The pair goes through the normal comparison, so every view and chart applies
+        self.show_progress(0, "Loading snapshot pair")
+        self.jobs.submit('compare', self.run_series_pair, original_path, updated_path,
+                         on_progress=self.show_progress,
+                         on_done=self.show_series_pair,
+                         on_error=self.comparison_failed)
+    
+    def run_series_pair(self, job, original_path, updated_path):
+        store = self.get_store()
+        loaded_files = {'original': store.load_file(original_path),
+                        'updated': store.load_file(updated_path)}
+        job.check()
+        return self.run_comparison(job, "", "", loaded_files)
+    
+    def show_series_pair(self, result):
+        self.show_comparison(result)
+        self.notebook.select(self.comparison_tab)
+    
+    def open_store_window(self):
+        if self.store_window is not None and self.store_window.winfo_exists():
+            self.store_window.lift()
+            self.refresh_store_window()
+            return
+        
+        # Opened here so a store that cannot be opened fails before the window shows
+        try:
+            self.get_store()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error opening snapshot store: {str(e)}")
+            return
+        
+        self.store_window = tk.Toplevel(self.root)
+        self.store_window.title("Snapshot Store")
+        self.store_window.geometry("900x600")
+        
+        self.store_usage = ttk.Label(self.store_window, text="", padding=(10, 5))
+        self.store_usage.pack(fill="x")
+        
+        snapshot_frame = ttk.LabelFrame(self.store_window, text="Stored Snapshots", padding=10)
+        snapshot_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        columns = ("Name", "Rows", "Size", "Added", "Last Used")
+        self.store_snapshots = ttk.Treeview(snapshot_frame, columns=columns, show="headings",
+                                            selectmode="browse")
+        for col in columns:
+            self.store_snapshots.heading(col, text=col)
+            self.store_snapshots.column(col, width=150)
+        self.store_snapshots.pack(fill="both", expand=True)
+        
+        button_frame = ttk.Frame(snapshot_frame)
+        button_frame.pack(fill="x", pady=5)
+        ttk.Button(button_frame, text="Use as Original",
+                  command=lambda: self.use_stored_snapshot('original')).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Use as Updated",
+                  command=lambda: self.use_stored_snapshot('updated')).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Delete",
+                  command=self.delete_stored_snapshot).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Clear Store",
+                  command=self.clear_store).pack(side="right", padx=5)
+        
+        comparison_frame = ttk.LabelFrame(self.store_window, text="Previous Comparisons", padding=10)
+        comparison_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        columns = ("Original", "Updated", "Last Used")
+        self.store_comparisons = ttk.Treeview(comparison_frame, columns=columns, show="headings",
+                                              selectmode="browse")
+        for col in columns:
+            self.store_comparisons.heading(col, text=col)
+            self.store_comparisons.column(col, width=250)
+        self.store_comparisons.pack(fill="both", expand=True)
+        ttk.Button(comparison_frame, text="Open Comparison",
+                  command=self.open_stored_comparison).pack(side="left", padx=5, pady=5)
+        
+        self.refresh_store_window()
+    
+    def refresh_store_window(self):
+        store = self.get_store()
+        snapshots = store.snapshots()
+        comparisons = store.comparisons()
+        
+        def when(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+        
+        self.store_usage.configure(text=(
+            f"{len(snapshots)} of {store.max_snapshots} snapshots, "
+            f"{store.total_bytes() / 1024 ** 2:,.1f} of {store.max_bytes / 1024 ** 2:,.0f} MB; "
+            f"unused snapshots are removed after {store.max_age_days} days ({store.path})"))
+        
+        self.store_snapshots.delete(*self.store_snapshots.get_children())
+        for row in snapshots.itertuples(index=False):
+            self.store_snapshots.insert("", "end", iid=row.content_hash, values=(
+                row.name,
+                f"{row.rows:,}",
+                f"{row.size_bytes / 1024 ** 2:,.1f} MB",
+                when(row.added),
+                when(row.last_used)
+            ))
+        
+        self.store_comparisons.delete(*self.store_comparisons.get_children())
+        for row in comparisons.itertuples(index=False):
+            self.store_comparisons.insert(
+                "", "end", iid=f"{row.original_hash}:{row.updated_hash}",
+                values=(row.original_name, row.updated_name, when(row.last_used)))
+    
+    def use_stored_snapshot(self, side):
+        selection = self.store_snapshots.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a snapshot")
+            return
+        content_hash = selection[0]
+        name = self.store_snapshots.item(content_hash, "values")[0]
+        
+        self.file_labels[side].configure(text=f"Loading {name}...")
+        self.show_progress(None, f"Loading {name}")
+        self.jobs.submit(f'load-{side}', lambda job: self.get_store().load(content_hash),
+                         on_done=lambda df: self.file_loaded(side, name, df),
+                         on_error=lambda e: self.load_failed(side, e),
+                         on_cancel=lambda: self.file_labels[side].configure(text=""))
+    
+    def delete_stored_snapshot(self):
+        selection = self.store_snapshots.selection()
+        if not selection:
+            return
+        self.get_store().delete(selection[0])
+        self.refresh_store_window()
+    
+    def clear_store(self):
+        if messagebox.askyesno("Clear Store", "Remove every stored snapshot and comparison?"):
+            self.get_store().clear()
+            self.refresh_store_window()
+    
+    def open_stored_comparison(self):
+        selection = self.store_comparisons.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a comparison")
+            return
+        original_hash, updated_hash = selection[0].split(':')
+        names = self.store_comparisons.item(selection[0], "values")[:2]
+        
+        self.show_progress(0, "Opening comparison")
+        self.jobs.submit('compare', self.run_stored_comparison, original_hash, updated_hash,
+                         on_progress=self.show_progress,
+                         on_done=lambda result: self.show_stored_comparison(result, names),
+                         on_error=self.comparison_failed)
+    
+    def run_stored_comparison(self, job, original_hash, updated_hash):
+        store = self.get_store()
+        loaded_files = {'original': store.load(original_hash),
+                        'updated': store.load(updated_hash)}
+        return self.run_comparison(job, "", "", loaded_files)
+    
+    def show_stored_comparison(self, result, names):
+        for side, df, name in (('original', result['original_df'], names[0]),
+                               ('updated', result['updated_df'], names[1])):
+            text_widget = self.original_text if side == 'original' else self.updated_text
+            text_widget.delete(1.0, tk.END)
+            self.loaded_files[side] = df
+            self.file_labels[side].configure(text=f"Loaded {name} ({len(df):,} rows)")
+        self.show_comparison(result)
+        self.notebook.select(self.comparison_tab)
+    
+    def open_diagnostics_window(self):
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            return
+        
+        self.diagnostics_window = tk.Toplevel(self.root)
+        self.diagnostics_window.title("Diagnostics")
+        self.diagnostics_window.geometry("900x500")
+        
+        control_frame = ttk.Frame(self.diagnostics_window, padding=10)
+        control_frame.pack(fill="x")
+        self.timings_var = tk.BooleanVar(value=timings.enabled)
+        ttk.Checkbutton(control_frame, text="Record timings", variable=self.timings_var,
+                       command=self.toggle_timings).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Profile Actions To...",
+                  command=self.choose_profile_dir).pack(side="left", padx=5)
+        self.profile_label = ttk.Label(control_frame, text="")
+        self.profile_label.pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Save Log",
+                  command=self.save_timings).pack(side="right", padx=5)
+        ttk.Button(control_frame, text="Clear",
+                  command=timings.clear).pack(side="right", padx=5)
+        
+        timings_frame = ttk.LabelFrame(self.diagnostics_window, text="Stage Timings", padding=10)
+        timings_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        columns = ("Time", "Action", "Stage", "Seconds", "Rows", "RSS Change (MB)")
+        self.timings_tree = ttk.Treeview(timings_frame, columns=columns, show="headings")
+        vsb = ttk.Scrollbar(timings_frame, orient="vertical", command=self.timings_tree.yview)
+        self.timings_tree.configure(yscrollcommand=vsb.set)
+        for col in columns:
+            self.timings_tree.heading(col, text=col)
+            self.timings_tree.column(col, width=130)
+        self.timings_tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        
+        self.timings_version = None
+        self.refresh_diagnostics()
+    
+    def refresh_diagnostics(self):
+        if self.diagnostics_window is None or not self.diagnostics_window.winfo_exists():
+            return
+        # Records arrive from worker threads too, so the window polls for them
+        if timings.version != self.timings_version:
+            self.timings_version = timings.version
+            self.timings_tree.delete(*self.timings_tree.get_children())
+            for record in reversed(timings.snapshot()):
+                self.timings_tree.insert("", "end", values=(
+                    datetime.fromtimestamp(record.started).strftime("%H:%M:%S"),
+                    record.action,
+                    record.stage,
+                    f"{record.seconds:.3f}",
+                    "" if record.rows is None else f"{record.rows:,}",
+                    "" if record.memory_mb is None else f"{record.memory_mb:+.1f}"
+                ))
+        self.profile_label.configure(
+            text=f"Profiles: {timings.profile_dir}" if timings.profile_dir else "")
+        self.diagnostics_window.after(500, self.refresh_diagnostics)
+    
+    def toggle_timings(self):
+        if self.timings_var.get():
+            timings.enable(timings.profile_dir)
+        else:
+            timings.disable()
+    
+    def choose_profile_dir(self):
+        directory = filedialog.askdirectory(title="Write a cProfile file per action to")
+        if not directory:
+            return
+        try:
+            timings.enable(directory)
+        except OSError as e:
+            messagebox.showerror("Error", f"Error enabling profiling: {str(e)}")
+            return
+        self.timings_var.set(True)
+    
+    def save_timings(self):
+        from instrumentation import format_records
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            initialfile=f"timings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, 'w') as f:
+                f.write("\n".join(format_records(timings.snapshot())) + "\n")
+            messagebox.showinfo("Success", f"Timings saved successfully to {filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error saving timings: {str(e)}")
+
+def same_snapshot(a, b):
+    """Whether two loaded or uploaded snapshots have the same content hash."""
+    hashes = [snapshot.attrs.get('content_hash') if hasattr(snapshot, 'attrs')
+              else snapshot.content_hash for snapshot in (a, b)]
+    return hashes[0] is not None and hashes[0] == hashes[1]
+
+
+def main():
+    root = tk.Tk()
+    app = PromotionAnalysisGUI(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
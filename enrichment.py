@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from snapshot_loader import CATEGORY_COLUMNS, DATE_COLUMNS
+
+# Original snapshot columns the charts read next to the results
+CONTEXT_COLUMNS = ['Customer Group', 'Promo Type'] + DATE_COLUMNS
+
+QTY_RANGE_LABELS = ['Very Low', 'Low', 'Medium', 'High', 'Very High']
+CHANGE_CAT_LABELS = ['Large Decrease', 'Small Decrease', 'Minimal Change',
+                     'Small Increase', 'Large Increase']
+
+
+def _quantity_ranges(orig_qty):
+    try:
+        return pd.qcut(orig_qty, q=5, labels=QTY_RANGE_LABELS)
+    except ValueError:
+        # Heavily repeated quantities give duplicate quintile edges; fall
+        # back to the distinct bins rather than failing the whole table.
+        return pd.qcut(orig_qty, q=5, duplicates='drop')
+
+
+def build_enriched_frame(results, original_df, original_rows):
+    """Join the comparison results with typed snapshot columns, once.
+
+    ``results`` is the result frame (``ComparisonOutcome.to_frame``) and
+    ``original_rows`` the position of each result row in ``original_df``,
+    so the snapshot columns are taken positionally instead of merging on
+    ``Td No`` again. Adds categorical ``Customer Group``/``Promo Type``,
+    datetime ``Start Date``/``End Date``, ``Duration`` in days and the
+    derived ``pct_change``, ``qty_range`` and ``change_cat`` columns.
+    """
+    columns = {}
+    if original_df is not None:
+        for col in CONTEXT_COLUMNS:
+            if col in CATEGORY_COLUMNS and col in original_df.columns:
+                values = original_df[col].iloc[original_rows].reset_index(drop=True)
+                columns[col] = values.astype('category')
+        for col in DATE_COLUMNS:
+            if col in original_df.columns:
+                values = original_df[col].iloc[original_rows].reset_index(drop=True)
+                columns[col] = pd.to_datetime(values, errors='coerce')
+        if all(col in columns for col in DATE_COLUMNS):
+            columns['Duration'] = (columns['End Date'] - columns['Start Date']).dt.days
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_change = results['change'] / results['orig_qty'] * 100
+    columns['pct_change'] = pct_change.replace([np.inf, -np.inf], 0)
+    if len(results):
+        # pd.cut writes into its input when values are missing, and the
+        # result columns are read-only views of the comparison's block
+        columns['qty_range'] = _quantity_ranges(results['orig_qty'].to_numpy(copy=True))
+        columns['change_cat'] = pd.cut(results['change'].to_numpy(copy=True), bins=5,
+                                       labels=CHANGE_CAT_LABELS)
+    else:
+        columns['qty_range'] = pd.Categorical([], categories=QTY_RANGE_LABELS)
+        columns['change_cat'] = pd.Categorical([], categories=CHANGE_CAT_LABELS)
+
+    extra = pd.DataFrame(columns, index=results.index)
+    return pd.concat([results, extra], axis=1, copy=False)
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 16
+
+# Rough cost of one plotted point (x/y float64 plus path bookkeeping)
+BYTES_PER_POINT = 32
+
+
+def estimate_figure_bytes(fig):
+    """Approximate memory held by a rendered figure and its Tk canvas.
+
+    Counts the RGBA raster twice (Agg buffer and the Tk photo image) plus
+    the data behind every line, collection and patch.
+    """
+    width, height = fig.canvas.get_width_height(physical=True)
+    points = 0
+    for ax in fig.axes:
+        for line in ax.lines:
+            points += len(line.get_xdata(orig=False))
+        for collection in ax.collections:
+            points += len(collection.get_offsets()) + len(collection.get_paths())
+        points += len(ax.patches) * 5
+    return width * height * 4 * 2 + points * BYTES_PER_POINT
+
+
+class FigureCache:
+    """LRU cache of rendered charts bounded by entry count and bytes.
+
+    Values are opaque to the cache; ``on_evict`` is called with every value
+    that is dropped so the owner can release widgets and figures. The most
+    recently stored entry is never evicted, even if it alone exceeds
+    ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES,
+                 on_evict=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (value, size)
+        self.total_bytes += size
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        for key in list(self._entries):
+            self._drop(key)
+
+    def _drop(self, key):
+        value, size = self._entries.pop(key)
+        self.total_bytes -= size
+        if self.on_evict:
+            self.on_evict(value)
@@ -0,0 +1,341 @@
+"""Update a comparison when only part of the updated snapshot was edited.
+
+The new updated snapshot is diffed row by row against the previous one:
+with the same length, every position is compared; otherwise the common
+head and tail are skipped and the rows in between count as edited. Only
+the promotions whose key occurs in an edited row are joined again. Their
+result rows, join positions, added/removed promotions and summary
+statistics are patched, so the work after the row diff grows with the
+edit, not with the snapshot. ``outcome_delta`` describes the step
+between two separate comparisons the same way, so views can refresh only
+what differs.
+"""
+import numpy as np
+import pandas as pd
+
+from comparison_engine import DESC_COLUMN, KEY_COLUMN, QTY_COLUMN, ComparisonOutcome
+from multi_diff import DIFF_COLUMNS, diff_columns
+from summary_stats import update_summary
+
+# Edits touching more than this fraction of rows are cheaper to redo in full
+MAX_EDIT_FRACTION = 0.2
+# Rows compared at a time when looking for the start and end of an edit
+DIFF_BLOCK = 65_536
+
+
+class ComparisonDelta:
+    """What an incremental update changed.
+
+    ``changed_rows`` are result positions (in the new outcome) whose values
+    changed. ``structural`` is set when result rows were inserted or
+    removed, so positions before and after no longer line up.
+    ``edited_rows`` counts the updated snapshot rows that differed.
+    """
+
+    def __init__(self, changed_rows, structural, edited_rows):
+        self.changed_rows = changed_rows
+        self.structural = structural
+        self.edited_rows = edited_rows
+
+    def __bool__(self):
+        return self.structural or len(self.changed_rows) > 0
+
+
+class IncrementalComparison:
+    """A comparison plus the indexes needed to update it by delta.
+
+    ``update`` never modifies this object or its outcome; it returns a new
+    ``IncrementalComparison``, so a result still shown or exported stays
+    valid while the next one is computed. The key index of the original
+    snapshot is built on first use and shared by every later update.
+    """
+
+    def __init__(self, outcome, updated_df, original_index=None, updated_index=None):
+        if outcome.join is None:
+            raise ValueError("The comparison has no join to update")
+        self.outcome = outcome
+        self.original_df = outcome.original_df
+        self.updated_df = updated_df
+        self._original_index = original_index
+        self._updated_index = updated_index
+
+    def original_index(self):
+        if self._original_index is None:
+            self._original_index = _KeyIndex(self.original_df[KEY_COLUMN].to_numpy(dtype=object))
+        return self._original_index
+
+    def updated_index(self):
+        if self._updated_index is None:
+            self._updated_index = _KeyIndex(self.updated_df[KEY_COLUMN].to_numpy(dtype=object))
+        return self._updated_index
+
+    def prepare(self):
+        """Build both key indexes now rather than during the first update."""
+        self.original_index()
+        self.updated_index()
+        return self
+
+    def update(self, updated_df):
+        """Compare against ``updated_df`` reusing this result.
+
+        Returns ``(IncrementalComparison, ComparisonDelta)``, or ``None``
+        when the edit is too large to be worth patching.
+        """
+        for col in (KEY_COLUMN, QTY_COLUMN):
+            if col not in updated_df.columns:
+                raise KeyError(f"updated data is missing column(s): {col}")
+        old_keys = self.updated_df[KEY_COLUMN].to_numpy(dtype=object)
+        new_keys = updated_df[KEY_COLUMN].to_numpy(dtype=object)
+        # Every column the results or the column diff read counts as an edit
+        compared = [QTY_COLUMN] + [col for col in DIFF_COLUMNS if col != QTY_COLUMN
+                                   and col in self.updated_df.columns and col in updated_df.columns]
+        old_rows, new_rows, old_stop, keys_moved = _edited_rows(
+            [old_keys] + [self.updated_df[col].to_numpy() for col in compared],
+            [new_keys] + [updated_df[col].to_numpy() for col in compared])
+        edited = max(len(old_rows), len(new_rows))
+        if edited > MAX_EDIT_FRACTION * max(len(old_keys), len(new_keys), 1):
+            return None
+
+        # Unedited rows from ``old_stop`` on move by the change in length
+        shift = len(new_keys) - len(old_keys)
+
+        def to_new(rows):
+            return np.where(rows >= old_stop, rows + shift, rows) if shift else rows
+
+        edited_keys = pd.unique(np.concatenate([old_keys[old_rows], new_keys[new_rows]]))
+        edited_keys = edited_keys[~pd.isna(edited_keys)]
+        key_ids = pd.Index(edited_keys)
+
+        # First row of every edited key in the new snapshot: unedited
+        # occurrences come from the old index, edited ones from the diff
+        which, rows = self.updated_index().rows_of(edited_keys)
+        unedited = ~np.isin(rows, old_rows)
+        new_which = key_ids.get_indexer(new_keys[new_rows])
+        found = new_which >= 0
+        first_new = np.full(len(edited_keys), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_new,
+                      np.concatenate([which[unedited], new_which[found]]),
+                      np.concatenate([to_new(rows[unedited]), new_rows[found]]))
+        first_new[first_new == np.iinfo(np.int64).max] = -1
+
+        positions, added_rows, removed_rows = self.outcome.join
+        positions = to_new(positions)
+
+        # Original rows of the edited keys take their new match
+        which, affected = self.original_index().rows_of(edited_keys)
+        old_match = positions[affected] >= 0
+        positions = positions.copy()
+        positions[affected] = first_new[which]
+        new_match = positions[affected] >= 0
+
+        in_original = np.zeros(len(edited_keys), dtype=bool)
+        in_original[which] = True
+        added_rows = np.asarray(added_rows)
+        kept = key_ids.get_indexer(old_keys[added_rows]) < 0
+        added_rows = np.sort(np.concatenate([
+            to_new(added_rows[kept]), first_new[~in_original & (first_new >= 0)]]))
+
+        original_keys = self.original_df[KEY_COLUMN].to_numpy(dtype=object)
+        removed_rows = np.asarray(removed_rows)
+        kept = key_ids.get_indexer(original_keys[removed_rows]) < 0
+        original_first = self.original_index().first_rows(edited_keys)
+        removed_rows = np.sort(np.concatenate([
+            removed_rows[kept], original_first[in_original & (first_new < 0)]]))
+
+        outcome, delta = _patched_outcome(self.outcome, updated_df,
+                                          (positions, added_rows, removed_rows),
+                                          affected, old_match, new_match)
+        delta.edited_rows = edited
+        updated_index = None if keys_moved else self._updated_index
+        return IncrementalComparison(outcome, updated_df, self._original_index, updated_index), delta
+
+
+def outcome_delta(old, new):
+    """``ComparisonDelta`` from the comparison ``old`` to the unrelated ``new``.
+
+    For views showing ``old`` that are to show ``new`` instead, e.g. when a
+    watched folder gets a new export. Rows line up when both comparisons
+    list the same ``Td No`` in the same order; then only rows whose values
+    or changed columns differ count as changed. Anything else is structural.
+    """
+    if len(old) != len(new) or not _same_values(old.td_no, new.td_no).all():
+        return ComparisonDelta(np.arange(len(new)), True, len(new))
+    differs = ~_same_values(np.asarray(old.td_desc, dtype=object),
+                            np.asarray(new.td_desc, dtype=object))
+    for old_values, new_values in zip(old.quantities, new.quantities):
+        differs |= ~_same_values(old_values, new_values)
+    old_changes, new_changes = old.changes(), new.changes()
+    if old_changes.columns != new_changes.columns:
+        differs[:] = True
+    else:
+        differs |= old_changes.bits != new_changes.bits
+    changed_rows = np.flatnonzero(differs)
+    # Charts and the summary also read columns and promotions the rows do not show
+    if not len(changed_rows) and (old.fingerprint() != new.fingerprint()
+                                  or len(old.added) != len(new.added)
+                                  or len(old.removed) != len(new.removed)):
+        changed_rows = np.arange(len(new))
+    return ComparisonDelta(changed_rows, False, len(changed_rows))
+
+
+class _KeyIndex:
+    """Every row of every key, grouped: ``rows[starts[i]:starts[i + 1]]``.
+
+    Rows of a key are in ascending order, so the first is where the key
+    first occurs. Missing keys are left out.
+    """
+
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(keys)
+        self.index = pd.Index(uniques)
+        # Builds the hash table now rather than on the first lookup
+        self.index.get_indexer(uniques[:1])
+        order = np.argsort(codes, kind='stable')
+        self.rows = order[np.count_nonzero(codes < 0):]
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+    def rows_of(self, keys):
+        """``(which, rows)``: every row holding one of ``keys`` and the
+        position in ``keys`` of the key it holds."""
+        ids = self.index.get_indexer(keys)
+        found = np.flatnonzero(ids >= 0)
+        ids = ids[found]
+        lengths = self.starts[ids + 1] - self.starts[ids]
+        which = np.repeat(found, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return which, self.rows[np.repeat(self.starts[ids], lengths) + offsets]
+
+    def first_rows(self, keys):
+        """First row of each of ``keys``, -1 where absent."""
+        ids = self.index.get_indexer(keys)
+        first = np.full(len(keys), -1, dtype=np.int64)
+        found = ids >= 0
+        first[found] = self.rows[self.starts[ids[found]]]
+        return first
+
+
+def _same_values(old, new):
+    if old.dtype.kind == 'f' and new.dtype.kind == 'f':
+        return (old == new) | (np.isnan(old) & np.isnan(new))
+    if old.dtype.kind == 'M' and new.dtype.kind == 'M':
+        return (old == new) | (np.isnat(old) & np.isnat(new))
+    same = np.asarray(old == new, dtype=bool)
+    if same.shape != old.shape:
+        # NumPy gives a single False for arrays it cannot compare
+        same = np.zeros(len(old), dtype=bool)
+    differ = np.flatnonzero(~same)
+    # NaN never equals itself; only the few differing values need the check
+    same[differ] = pd.isna(old[differ]) & pd.isna(new[differ])
+    return same
+
+
+def _rows_equal(old_columns, new_columns):
+    """Per row: whether the key (the first column) and whether every column is equal."""
+    same_key = _same_values(old_columns[0], new_columns[0])
+    same_row = same_key.copy()
+    for old, new in zip(old_columns[1:], new_columns[1:]):
+        same_row &= _same_values(old, new)
+    return same_key, same_row
+
+
+def _edited_rows(old_columns, new_columns):
+    """Old and new positions of the rows that differ in any of the columns.
+
+    With equal lengths rows are compared position by position. Otherwise
+    the rows between the common head and the common tail are edited, and
+    old rows from ``old_stop`` on reappear shifted. Also returns whether
+    any key changed position, which invalidates the key index.
+    """
+    m, n = len(old_columns[0]), len(new_columns[0])
+    if m == n:
+        same_key, same_row = _rows_equal(old_columns, new_columns)
+        rows = np.flatnonzero(~same_row)
+        return rows, rows, m, not same_key.all()
+
+    k = min(m, n)
+    head = _common_head(old_columns, new_columns, k)
+    # The tail is the head of the reversed rows, never overlapping the head
+    tail = _common_head([column[::-1] for column in old_columns],
+                        [column[::-1] for column in new_columns], k - head)
+    return np.arange(head, m - tail), np.arange(head, n - tail), m - tail, True
+
+
+def _common_head(old_columns, new_columns, limit):
+    """Number of leading rows, up to ``limit``, that are equal in both.
+
+    Compared a block at a time, so the scan stops soon after the edit
+    instead of comparing shifted rows that all differ.
+    """
+    for start in range(0, limit, DIFF_BLOCK):
+        stop = min(start + DIFF_BLOCK, limit)
+        _, same_row = _rows_equal([column[start:stop] for column in old_columns],
+                                  [column[start:stop] for column in new_columns])
+        differs = np.flatnonzero(~same_row)
+        if len(differs):
+            return start + int(differs[0])
+    return limit
+
+
+def _patched_outcome(outcome, updated_df, join, affected, old_match, new_match):
+    """The new outcome for ``join`` and its ``ComparisonDelta``.
+
+    ``affected`` are the original rows of the edited keys, with whether
+    each was matched before and after. Unless a match appeared or
+    disappeared, the result rows stay where they were and only the
+    updated quantities of the affected ones are rewritten.
+    """
+    positions, added_rows, removed_rows = join
+    new_qty = updated_df[QTY_COLUMN].to_numpy(dtype=np.float64)
+    original_df = outcome.original_df
+    structural = bool((old_match != new_match).any())
+
+    if structural:
+        original_rows = np.flatnonzero(positions >= 0)
+        td_no = original_df[KEY_COLUMN].to_numpy(dtype=object)[original_rows]
+        td_desc = _take_desc(outcome, original_df, original_rows)
+        orig_qty = original_df[QTY_COLUMN].to_numpy(dtype=np.float64)[original_rows]
+        updated_qty = new_qty[positions[original_rows]]
+    else:
+        original_rows = outcome.original_rows
+        td_no, td_desc, orig_qty = outcome.td_no, outcome.td_desc, outcome.orig_qty
+        updated_qty = outcome.updated_qty.copy()
+
+    old_at = np.searchsorted(outcome.original_rows, affected[old_match])
+    new_at = np.searchsorted(original_rows, affected[new_match])
+    if not structural:
+        updated_qty[new_at] = new_qty[positions[affected[new_match]]]
+
+    result = ComparisonOutcome(td_no, td_desc, orig_qty, updated_qty,
+                               updated_df.iloc[added_rows], original_df.iloc[removed_rows],
+                               original_df, original_rows, join, updated_df)
+    if outcome._summary is not None:
+        result._summary = update_summary(
+            outcome._summary,
+            outcome.change[old_at], outcome.orig_qty[old_at],
+            result.change[new_at], result.orig_qty[new_at],
+            result.change, result.orig_qty,
+            added=len(added_rows), removed=len(removed_rows))
+
+    if outcome._changes is not None and not structural:
+        matched = original_rows[new_at]
+        part = diff_columns(original_df, updated_df, matched, positions[matched],
+                            outcome._changes.columns)
+        if part.columns == outcome._changes.columns:
+            result._changes = outcome._changes.patched(new_at, part)
+
+    # Any column of the affected rows may have changed, not just Balance Qty
+    return result, ComparisonDelta(np.unique(new_at), structural, 0)
+
+
+def _take_desc(outcome, original_df, original_rows):
+    """``td_desc`` for ``original_rows``, reusing the current categories."""
+    if DESC_COLUMN in original_df.columns:
+        values = original_df[DESC_COLUMN].to_numpy(dtype=object)[original_rows]
+    else:
+        values = np.full(len(original_rows), None, dtype=object)
+    if isinstance(outcome.td_desc, pd.Categorical):
+        codes = outcome.td_desc.categories.get_indexer(values)
+        if (codes >= 0).all():
+            return pd.Categorical.from_codes(codes, categories=outcome.td_desc.categories)
+    return values
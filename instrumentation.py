@@ -0,0 +1,213 @@
+"""Opt-in timing and profiling of the stages behind every user action.
+
+Off by default, when each ``stage`` costs one attribute check. Once
+enabled, every stage records its wall time, the rows it handled and how
+much the process RSS grew while it ran. Records are kept in memory for
+the dashboard's Diagnostics window and logged to the
+``promotion_analysis.timings`` logger. With a profile directory every
+top-level ``action`` additionally runs under cProfile and leaves a
+``<action>-<time>.pstats`` file there.
+
+Set ``PROMOTION_TIMINGS=1`` (and optionally ``PROMOTION_PROFILE_DIR``) to
+enable it from the start, use the CLI's ``--timings``/``--profile`` or
+switch it on in the Diagnostics window.
+
+RSS is per process, so a stage running while another thread allocates
+is charged for both; the deltas show where memory goes, not exact costs.
+"""
+import cProfile
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_MAX_RECORDS = 1000
+
+logger = logging.getLogger('promotion_analysis.timings')
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unknown."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class StageTiming:
+    action: str
+    stage: str
+    seconds: float
+    rows: Optional[int]
+    memory_mb: Optional[float]
+    started: float
+
+
+class _Stage:
+    """Context manager of one stage; set ``rows`` inside it if not known up front."""
+
+    def __init__(self, owner, name, rows):
+        self.owner = owner
+        self.name = name
+        self.rows = rows
+        self._start = None
+        self._rss = None
+
+    def __enter__(self):
+        if self.owner.enabled:
+            self._rss = current_rss()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            seconds = time.perf_counter() - self._start
+            rss = current_rss()
+            memory_mb = None if rss is None or self._rss is None else (rss - self._rss) / 2 ** 20
+            self.owner._record(self.name, seconds, self.rows, memory_mb, self._is_total())
+        return False
+
+    def _is_total(self):
+        return False
+
+
+class _Action(_Stage):
+    def __init__(self, owner, name, rows):
+        super().__init__(owner, name, rows)
+        self._outer = False
+        self._profile = None
+
+    def __enter__(self):
+        local = self.owner._local
+        # Nested actions, e.g. a filter applied while showing a comparison,
+        # are timed as stages of the outer one
+        self._outer = getattr(local, 'action', None) is None
+        if self._outer and self.owner.enabled:
+            local.action = self.name
+            if self.owner.profile_dir:
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        if self._profile is not None:
+            self._profile.disable()
+        super().__exit__(*exc)
+        if self._outer:
+            self.owner._local.action = None
+            if self._profile is not None:
+                self.owner._dump(self.name, self._profile)
+        return False
+
+    def _is_total(self):
+        return self._outer
+
+
+class Instrumentation:
+    """Collects ``StageTiming`` records of the actions run in this process.
+
+    Safe to use from worker threads: the current action is tracked per
+    thread and records are appended under a lock. ``version`` increases
+    with every record so a UI can poll for new ones.
+    """
+
+    def __init__(self, max_records=DEFAULT_MAX_RECORDS):
+        self.enabled = False
+        self.profile_dir = None
+        self.records = deque(maxlen=max_records)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, profile_dir=None):
+        """Start recording; with ``profile_dir`` also write a pstats file per action."""
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        self.profile_dir = profile_dir or None
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        self.profile_dir = None
+
+    def action(self, name, rows=None):
+        """Time a whole user action (and profile it when a profile directory is set)."""
+        return _Action(self, name, rows)
+
+    def stage(self, name, rows=None):
+        """Time one stage of the action running on this thread."""
+        return _Stage(self, name, rows)
+
+    def timed(self, name):
+        """Decorator running every call of the function as action ``name``."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.action(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.records)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.version += 1
+
+    def _record(self, name, seconds, rows, memory_mb, total):
+        action = getattr(self._local, 'action', None)
+        if action is None:
+            # A stage outside any action is reported as an action of its own
+            action, total = name, True
+        record = StageTiming(action, 'total' if total else name, seconds, rows, memory_mb,
+                             time.time() - seconds)
+        with self._lock:
+            self.records.append(record)
+            self.version += 1
+        logger.info("%s / %s: %.3f s, %s rows, %s MB", record.action, record.stage,
+                    seconds, '-' if rows is None else f"{rows:,}",
+                    '-' if memory_mb is None else f"{memory_mb:+.1f}")
+
+    def _dump(self, name, profile):
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.profile_dir,
+                            f"{name}-{stamp}-{int(time.time() * 1000) % 1000:03d}.pstats")
+        try:
+            profile.dump_stats(path)
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+        else:
+            logger.info("Profile of %s written to %s", name, path)
+
+
+def format_records(records):
+    """The records as aligned text lines, for the console and saved logs."""
+    lines = [f"{'action':<18} {'stage':<22} {'seconds':>9} {'rows':>11} {'RSS MB':>8}"]
+    for record in records:
+        rows = '-' if record.rows is None else f"{record.rows:,}"
+        memory = '-' if record.memory_mb is None else f"{record.memory_mb:+.1f}"
+        lines.append(f"{record.action:<18} {record.stage:<22} {record.seconds:9.3f} "
+                     f"{rows:>11} {memory:>8}")
+    return lines
+
+
+timings = Instrumentation()
+
+if os.environ.get('PROMOTION_TIMINGS') or os.environ.get('PROMOTION_PROFILE_DIR'):
+    timings.enable(os.environ.get('PROMOTION_PROFILE_DIR'))
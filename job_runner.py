@@ -0,0 +1,138 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 25
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to every job function so it can report progress and stop early.
+
+    Both ``progress`` and ``check`` raise ``JobCancelled`` once the job has
+    been cancelled or superseded, so long jobs should call one of them
+    between stages.
+    """
+
+    def __init__(self, runner, job):
+        self._runner = runner
+        self._job = job
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, fraction, message=""):
+        self.check()
+        self._runner._events.put((self._job, 'progress', (fraction, message)))
+
+
+class Job:
+    def __init__(self, key, on_done, on_progress, on_error, on_cancel):
+        self.key = key
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.context = None
+        self.future = None
+
+
+class JobRunner:
+    """Run work off the Tk mainloop and deliver results back onto it.
+
+    Jobs run in a thread pool. Workers never touch Tk: progress, results
+    and errors are queued and drained by a ``root.after`` poll, so every
+    callback runs on the UI thread. Jobs are keyed; submitting a job with
+    the key of one still running cancels the old one and drops anything it
+    still reports.
+    """
+
+    def __init__(self, root, max_workers=2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='promotion-job')
+        self._events = queue.Queue()
+        self._active = {}
+        self._poll_id = None
+
+    def submit(self, key, func, *args, on_done=None, on_progress=None,
+               on_error=None, on_cancel=None):
+        """Run ``func(context, *args)`` in the pool, superseding ``key``."""
+        self.cancel(key)
+        job = Job(key, on_done, on_progress, on_error, on_cancel)
+        job.context = JobContext(self, job)
+        self._active[key] = job
+        job.future = self._executor.submit(self._run, job, func, args)
+        self._schedule_poll()
+        return job
+
+    def cancel(self, key):
+        job = self._active.pop(key, None)
+        if job is not None:
+            job.context.cancel()
+            if job.on_cancel:
+                job.on_cancel()
+
+    def is_running(self, key):
+        return key in self._active
+
+    def shutdown(self):
+        for job in self._active.values():
+            job.context.cancel()
+        self._active.clear()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func, args):
+        try:
+            result = func(job.context, *args)
+        except JobCancelled:
+            return
+        except Exception as e:
+            self._events.put((job, 'error', e))
+        else:
+            self._events.put((job, 'done', result))
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                job, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            # Cancelled and superseded jobs may still have queued events
+            if self._active.get(job.key) is not job:
+                continue
+
+            if kind == 'progress':
+                if job.on_progress:
+                    job.on_progress(*payload)
+                continue
+
+            del self._active[job.key]
+            if kind == 'done' and job.on_done:
+                job.on_done(payload)
+            elif kind == 'error' and job.on_error:
+                job.on_error(payload)
+
+        if self._active:
+            self._schedule_poll()
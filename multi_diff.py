@@ -0,0 +1,125 @@
+"""Column-wise diff of every configured snapshot column at once.
+
+Numeric columns get the updated minus original value, dates the shift in
+days, and attributes such as a Promo Type reassignment only whether they
+changed. Every result row gets one small integer whose bits say which
+columns changed, so filtering for "any change" or for particular columns
+is a single vectorized bit test however many rows there are.
+"""
+import numpy as np
+import pandas as pd
+
+from snapshot_loader import CATEGORY_COLUMNS, DATE_COLUMNS, QUANTITY_COLUMNS, TEXT_COLUMNS
+
+ATTRIBUTE_COLUMNS = TEXT_COLUMNS + CATEGORY_COLUMNS
+DIFF_COLUMNS = QUANTITY_COLUMNS + DATE_COLUMNS + ATTRIBUTE_COLUMNS
+
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+class ChangeMatrix:
+    """Which columns changed for every result row.
+
+    ``bits`` holds one uint16 per result row with bit ``i`` set when
+    ``columns[i]`` differs between the snapshots. ``deltas`` maps numeric
+    columns to updated minus original and date columns to the shift in
+    days; NaN where either side is missing. Columns absent from either
+    snapshot are left out of ``columns``.
+    """
+
+    def __init__(self, columns, bits, deltas):
+        self.columns = list(columns)
+        self.bits = bits
+        self.deltas = deltas
+
+    def __len__(self):
+        return len(self.bits)
+
+    def _selector(self, columns):
+        if columns is None:
+            return (1 << len(self.columns)) - 1
+        selector = 0
+        for column in columns:
+            selector |= 1 << self.columns.index(column)
+        return selector
+
+    def mask(self, columns=None, how='any'):
+        """Rows where any (or, with ``how='all'``, every) one of ``columns`` changed.
+
+        ``columns`` defaults to every compared column.
+        """
+        selector = np.uint16(self._selector(columns))
+        if how == 'all':
+            return (self.bits & selector) == selector
+        return (self.bits & selector) != 0
+
+    def rows(self, columns=None, how='any'):
+        return np.flatnonzero(self.mask(columns, how))
+
+    def counts(self):
+        """Number of changed rows per column, in ``columns`` order."""
+        return pd.Series([int(np.count_nonzero(self.bits & np.uint16(1 << i)))
+                          for i in range(len(self.columns))],
+                         index=self.columns, dtype=np.int64)
+
+    def names(self, indices):
+        """Comma separated changed column names for the rows at ``indices``."""
+        return [", ".join(column for i, column in enumerate(self.columns) if bits >> i & 1)
+                for bits in self.bits[indices].tolist()]
+
+    def patched(self, rows, part):
+        """A copy with ``rows`` replaced by ``part``, a matrix over those rows."""
+        bits = self.bits.copy()
+        bits[rows] = part.bits
+        deltas = {}
+        for column, values in self.deltas.items():
+            deltas[column] = values.copy()
+            deltas[column][rows] = part.deltas[column]
+        return ChangeMatrix(self.columns, bits, deltas)
+
+
+def diff_columns(original_df, updated_df, original_rows, updated_rows, columns=DIFF_COLUMNS):
+    """``ChangeMatrix`` of ``original_rows`` against the ``updated_rows`` they matched."""
+    columns = [column for column in columns
+               if column in original_df.columns and column in updated_df.columns]
+    bits = np.zeros(len(original_rows), dtype=np.uint16)
+    deltas = {}
+    for position, column in enumerate(columns):
+        old = original_df[column].to_numpy()[original_rows]
+        new = updated_df[column].to_numpy()[updated_rows]
+        if column in QUANTITY_COLUMNS:
+            old, new = _numbers(old), _numbers(new)
+            changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+            deltas[column] = new - old
+        elif column in DATE_COLUMNS:
+            old, new = _dates(old), _dates(new)
+            # NaT never equals itself; a date blank on both sides is unchanged
+            changed = (old != new) & ~(np.isnat(old) & np.isnat(new))
+            missing = np.isnat(old) | np.isnat(new)
+            shift = (new.view(np.int64) - old.view(np.int64)) / NS_PER_DAY
+            deltas[column] = np.where(missing, np.nan, shift)
+        else:
+            changed = _values_differ(old, new)
+        bits |= changed.astype(np.uint16) << np.uint16(position)
+    return ChangeMatrix(columns, bits, deltas)
+
+
+def _numbers(values):
+    if values.dtype.kind in 'fiub':
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(pd.Series(values, copy=False), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _dates(values):
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]', copy=False)
+    return pd.to_datetime(pd.Series(values, copy=False), errors='coerce').to_numpy(
+        dtype='datetime64[ns]')
+
+
+def _values_differ(old, new):
+    # One factorize over both sides gives equal values equal codes, missing
+    # values included (-1), whatever categories each snapshot had
+    codes, _ = pd.factorize(np.concatenate([np.asarray(old, dtype=object),
+                                            np.asarray(new, dtype=object)]))
+    return codes[:len(old)] != codes[len(old):]
@@ -0,0 +1,219 @@
+"""Compare exports larger than memory by partitioning them on ``Td No``.
+
+Both files are streamed in chunks and every row is appended to one of
+``partitions`` spill files on disk, chosen by a hash of its key, so all
+rows of a promotion land in the same partition of both snapshots. Each
+pair of partitions is then small enough to join with the normal
+``compare_snapshots``; its results are folded into a running summary and
+top-N list and spilled again by original row number, so they can be read
+back in the original order a range at a time. Peak memory is set by the
+chunk and partition sizes, not by the size of the exports.
+
+Only the key, description and Balance Qty are spilled, which is what the
+summary, the top changes and the result exports need. Charts and the
+column diff need the whole snapshots and are not available this way.
+"""
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+from comparison_engine import (DESC_COLUMN, KEY_COLUMN, QTY_COLUMN, RESULT_COLUMNS,
+                               ComparisonOutcome, compare_snapshots)
+from snapshot_loader import DEFAULT_CHUNKSIZE, iter_snapshot
+from summary_stats import merge_summaries, summarize
+
+# Export bytes per partition; a partition pair needs a few times this in memory
+PARTITION_BYTES = 64 * 1024 ** 2
+MIN_PARTITIONS = 16
+# Result rows read back per ordered range
+RANGE_ROWS = 250_000
+DEFAULT_TOP_N = 100
+
+SPILLED_COLUMNS = [KEY_COLUMN, DESC_COLUMN, QTY_COLUMN]
+ROW_COLUMN = '_row'
+
+
+def choose_partitions(*paths):
+    """Enough partitions that each holds about ``PARTITION_BYTES`` of every export."""
+    largest = max(os.path.getsize(path) for path in paths)
+    return max(MIN_PARTITIONS, math.ceil(largest / PARTITION_BYTES))
+
+
+class _Spill:
+    """Frames appended to numbered files and read back in append order."""
+
+    def __init__(self, directory, prefix):
+        self.directory = directory
+        self.prefix = prefix
+        self.rows = {}
+
+    def path(self, number):
+        return os.path.join(self.directory, f"{self.prefix}-{number:05d}.pkl")
+
+    def append(self, number, frame):
+        with open(self.path(number), 'ab') as handle:
+            pickle.dump(frame, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        self.rows[number] = self.rows.get(number, 0) + len(frame)
+
+    def read(self, number, columns):
+        frames = []
+        if number in self.rows:
+            with open(self.path(number), 'rb') as handle:
+                while True:
+                    try:
+                        frames.append(pickle.load(handle))
+                    except EOFError:
+                        break
+        if not frames:
+            return pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+        return pd.concat(frames, ignore_index=True)
+
+    def remove(self, number):
+        if number in self.rows:
+            os.remove(self.path(number))
+            del self.rows[number]
+
+
+def _partition_of(keys, partitions):
+    try:
+        hashes = hash_array(keys, categorize=False)
+    except TypeError:
+        hashes = hash_array(keys.astype(str), categorize=False)
+    return (hashes % np.uint64(partitions)).astype(np.intp)
+
+
+def _spill_snapshot(path, spill, partitions, chunksize, progress, side):
+    n_rows = 0
+    for chunk in iter_snapshot(path, chunksize):
+        frame = pd.DataFrame({col: chunk[col].to_numpy() for col in SPILLED_COLUMNS
+                              if col in chunk.columns}, copy=False)
+        if DESC_COLUMN not in frame.columns:
+            frame[DESC_COLUMN] = None
+        frame[ROW_COLUMN] = np.arange(n_rows, n_rows + len(frame))
+        n_rows += len(frame)
+        partition = _partition_of(frame[KEY_COLUMN].to_numpy(dtype=object), partitions)
+        order = np.argsort(partition, kind='stable')
+        bounds = np.searchsorted(partition[order], np.arange(partitions + 1))
+        for number in range(partitions):
+            rows = order[bounds[number]:bounds[number + 1]]
+            if len(rows):
+                spill.append(number, frame.iloc[rows])
+        if progress is not None:
+            progress(side, n_rows)
+    return n_rows
+
+
+class PartitionedOutcome:
+    """Result of ``compare_partitioned``: summary, top changes and spilled rows.
+
+    Holds the summary and the ``top_n`` largest absolute changes in
+    memory; ``iter_outcomes`` reads the result rows back from disk as
+    ``ComparisonOutcome`` objects of up to ``RANGE_ROWS`` rows each, in
+    original order. ``close`` (or leaving a ``with`` block) deletes the
+    spill directory.
+    """
+
+    def __init__(self, summary, top_changes, ranges, directory):
+        self._summary = summary
+        self.top_changes = top_changes
+        self._ranges = ranges
+        self.directory = directory
+
+    def __len__(self):
+        return self._summary.total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def summary(self):
+        return self._summary
+
+    def iter_outcomes(self):
+        for number in sorted(self._ranges.rows):
+            frame = self._ranges.read(number, RESULT_COLUMNS + [ROW_COLUMN])
+            frame = frame.iloc[np.argsort(frame[ROW_COLUMN].to_numpy(), kind='stable')]
+            yield ComparisonOutcome(
+                td_no=frame['td_no'].to_numpy(dtype=object),
+                td_desc=frame['td_desc'].to_numpy(dtype=object),
+                orig_qty=frame['orig_qty'].to_numpy(dtype=np.float64),
+                updated_qty=frame['updated_qty'].to_numpy(dtype=np.float64),
+                added=frame.iloc[:0],
+                removed=frame.iloc[:0]
+            )
+
+    def iter_frames(self):
+        """The result rows as ``RESULT_COLUMNS`` frames, in original order."""
+        for outcome in self.iter_outcomes():
+            yield outcome.to_frame()
+
+    def close(self):
+        if self.directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory = None
+
+
+def compare_partitioned(original_path, updated_path, partitions=None, spill_dir=None,
+                        top_n=DEFAULT_TOP_N, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Compare two export files without loading either into memory.
+
+    Matches rows exactly like ``compare_snapshots``. ``partitions``
+    defaults to ``choose_partitions``; spill files go to a new directory
+    under ``spill_dir`` (default: the system temp directory), which the
+    returned ``PartitionedOutcome`` deletes when closed. ``progress(stage,
+    done)`` is called with ``'original'``/``'updated'`` and the rows
+    spilled so far, then with ``'join'`` and the partitions joined.
+    """
+    partitions = partitions or choose_partitions(original_path, updated_path)
+    directory = tempfile.mkdtemp(prefix='promotion-compare-', dir=spill_dir)
+    try:
+        original = _Spill(directory, 'original')
+        updated = _Spill(directory, 'updated')
+        ranges = _Spill(directory, 'results')
+        _spill_snapshot(original_path, original, partitions, chunksize, progress, 'original')
+        _spill_snapshot(updated_path, updated, partitions, chunksize, progress, 'updated')
+
+        summary = summarize([], [])
+        top = []
+        columns = SPILLED_COLUMNS + [ROW_COLUMN]
+        for number in range(partitions):
+            original_df = original.read(number, columns)
+            updated_df = updated.read(number, columns)
+            original.remove(number)
+            updated.remove(number)
+
+            outcome = compare_snapshots(original_df, updated_df)
+            summary = merge_summaries(summary, outcome.summary())
+            results = outcome.to_frame().copy(deep=False)
+            results[ROW_COLUMN] = original_df[ROW_COLUMN].to_numpy()[outcome.original_rows]
+            top = [_top_changes(pd.concat(top + [_top_changes(results, top_n)],
+                                          ignore_index=True), top_n)]
+
+            # Respilled by original row, so each range can be put back in order
+            spread = results[ROW_COLUMN].to_numpy() // RANGE_ROWS
+            for group, rows in pd.Series(spread).groupby(spread).indices.items():
+                ranges.append(int(group), results.iloc[rows])
+            if progress is not None:
+                progress('join', number + 1)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    top = top[0].drop(columns=ROW_COLUMN).reset_index(drop=True)
+    return PartitionedOutcome(summary, top, ranges, directory)
+
+
+def _top_changes(frame, top_n):
+    # Largest absolute change first, ties in original order, as in the
+    # top changes sheet of an in-memory comparison
+    change = np.abs(frame['change'].to_numpy(dtype=np.float64))
+    order = np.lexsort((frame[ROW_COLUMN].to_numpy(dtype=np.int64), -change))
+    return frame.iloc[order[:top_n]]
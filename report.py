@@ -0,0 +1,300 @@
+"""Text reports and file exports of a comparison, shared by the GUI and the CLI."""
+import importlib.util
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from comparison_engine import ROW_CHUNK
+
+RESULT_HEADERS = ['TD No', 'TD Description', 'Original Qty', 'Updated Qty', 'Change']
+
+# pandas writes Parquet through either of these, neither is a requirement
+PARQUET_ENGINES = ('pyarrow', 'fastparquet')
+
+
+def parquet_available():
+    return any(importlib.util.find_spec(name) for name in PARQUET_ENGINES)
+
+
+# Parquet is only offered when it can be written
+EXPORT_TYPES = ([("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
+                + ([("Parquet files", "*.parquet")] if parquet_available() else [])
+                + [("All files", "*.*")])
+
+# Optional workbook sheets: a sheet per group value, or the largest changes
+GROUP_SHEETS = {
+    'customer_group': 'Customer Group',
+    'promo_type': 'Promo Type'
+}
+TOP_CHANGES_SHEET = 'top_changes'
+EXTRA_SHEETS = list(GROUP_SHEETS) + [TOP_CHANGES_SHEET]
+DEFAULT_TOP_N = 100
+SERIES_METRICS = ['first_qty', 'last_qty', 'net_change', 'total_movement', 'burn_rate',
+                  'snapshots_present']
+
+MAX_SHEET_NAME = 31
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def summary_lines(summary):
+    """The "Summary Statistics" panel as lines of text."""
+    return [
+        f"Total Promotions Analyzed: {summary.total}",
+        f"Promotions with Changes: {summary.changed} ({summary.changed_pct:.1f}%)",
+        f"Total Net Change in Balance: {summary.net_change:,.0f}",
+        f"Average Change per Promotion: {summary.mean_change:,.1f}",
+        f"Added Promotions: {summary.added}",
+        f"Removed Promotions: {summary.removed}",
+        "",
+        "Change Distribution:",
+        f"Increases: {summary.increases} promos",
+        f"Decreases: {summary.decreases} promos",
+        f"No Change: {summary.unchanged} promos",
+        "",
+        "Magnitude of Changes:",
+        f"Largest Increase: {summary.largest_increase:,.0f}",
+        f"Largest Decrease: {summary.largest_decrease:,.0f}",
+        f"Standard Deviation: {summary.std_change:,.1f}"
+    ]
+
+
+def analysis_items(summary):
+    """(category, details, value) rows of the "Detailed Analysis" table."""
+    return [
+        ("Significant Changes", "Promotions with >50% increase", summary.significant_increases),
+        ("", "Promotions with >50% decrease", summary.significant_decreases),
+        ("Volume Analysis", "Total volume of increases", f"{summary.total_increase:,.0f}"),
+        ("", "Total volume of decreases", f"{summary.total_decrease:,.0f}"),
+        ("", "Net volume change", f"{(summary.total_increase - summary.total_decrease):,.0f}")
+    ]
+
+
+def column_change_items(counts):
+    """(category, details, value) rows with the promotions changed per column."""
+    return [("Column Changes" if i == 0 else "", column, f"{count:,}")
+            for i, (column, count) in enumerate(counts.items())]
+
+
+def summary_table(summary):
+    return [
+        ('Total Promotions', summary.total),
+        ('Total Changes', summary.changed),
+        ('Increases', summary.increases),
+        ('Decreases', summary.decreases),
+        ('No Change', summary.unchanged),
+        ('Average Change', summary.mean_change),
+        ('Largest Increase', summary.largest_increase),
+        ('Largest Decrease', summary.largest_decrease)
+    ]
+
+
+def export_results(comparison, filename, extra_sheets=(), top_n=DEFAULT_TOP_N, progress=None):
+    """Write the results to ``filename``, choosing the format by extension.
+
+    ``.csv`` and ``.parquet`` hold the result rows only; anything else is
+    written as an Excel workbook with the summary and ``extra_sheets``.
+    ``progress(fraction)`` is called after every chunk of rows.
+    """
+    check_export_path(filename)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        write_csv(comparison, filename, progress)
+    elif extension == '.parquet':
+        write_parquet(comparison, filename, progress)
+    else:
+        write_excel(comparison, filename, extra_sheets, top_n, progress)
+
+
+def check_export_path(filename):
+    """Raise ``ValueError`` when ``filename`` asks for a format that cannot be written."""
+    if os.path.splitext(filename)[1].lower() == '.parquet' and not parquet_available():
+        raise ValueError("Parquet export needs pyarrow or fastparquet installed")
+
+
+def write_csv(comparison, filename, progress=None):
+    frame = comparison.to_frame()
+    total = len(frame)
+    with open(filename, 'w', newline='', encoding='utf-8') as handle:
+        handle.write(','.join(RESULT_HEADERS) + '\n')
+        for start in range(0, total, ROW_CHUNK):
+            frame.iloc[start:start + ROW_CHUNK].to_csv(handle, header=False, index=False,
+                                                      lineterminator='\n')
+            _report(progress, start + ROW_CHUNK, total)
+
+
+def write_parquet(comparison, filename, progress=None):
+    comparison.to_frame().set_axis(RESULT_HEADERS, axis=1, copy=False).to_parquet(
+        filename, index=False)
+    _report(progress, 1, 1)
+
+
+def write_excel(comparison, filename, extra_sheets=(), top_n=DEFAULT_TOP_N, progress=None):
+    """Stream the results into a write-only workbook.
+
+    Rows are appended ``ROW_CHUNK`` at a time straight from the result
+    columns, so neither a DataFrame copy nor openpyxl cell objects for the
+    whole sheet are ever held in memory. Extra sheets are index arrays into
+    the same columns.
+    """
+    from openpyxl import Workbook
+
+    sheets = [('Comparison Results', np.arange(len(comparison)))]
+    sheets.extend(_extra_sheets(comparison, extra_sheets, top_n))
+    total = sum(len(indices) for _, indices in sheets)
+    written = 0
+
+    workbook = Workbook(write_only=True)
+    used_names = set()
+    for title, indices in sheets:
+        sheet = workbook.create_sheet(_sheet_name(title, used_names))
+        sheet.append(RESULT_HEADERS)
+        for start in range(0, len(indices), ROW_CHUNK):
+            chunk = indices[start:start + ROW_CHUNK]
+            for row in _excel_rows(comparison, chunk):
+                sheet.append(row)
+            written += len(chunk)
+            _report(progress, written, total)
+
+        if title == 'Comparison Results':
+            summary_sheet = workbook.create_sheet(_sheet_name('Summary Statistics', used_names))
+            summary_sheet.append(['Metric', 'Value'])
+            for metric, value in summary_table(comparison.summary()):
+                summary_sheet.append([metric, _cell(value)])
+
+    workbook.save(filename)
+
+
+def export_partitioned(outcome, filename, progress=None):
+    """``export_results`` for an ``out_of_core.PartitionedOutcome``.
+
+    The result rows are read back from disk one range at a time, so the
+    export needs no more memory than the comparison did. Excel reports get
+    the summary and the top changes the comparison kept; the per group
+    sheets need the whole snapshots and are not available.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    total = len(outcome)
+    written = 0
+    if extension == '.csv':
+        with open(filename, 'w', newline='', encoding='utf-8') as handle:
+            handle.write(','.join(RESULT_HEADERS) + '\n')
+            for frame in outcome.iter_frames():
+                frame.to_csv(handle, header=False, index=False, lineterminator='\n')
+                written += len(frame)
+                _report(progress, written, total)
+        return
+    if extension == '.parquet':
+        raise ValueError("Out-of-core results can be exported to .csv or .xlsx only")
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Comparison Results')
+    sheet.append(RESULT_HEADERS)
+    for part in outcome.iter_outcomes():
+        for start in range(0, len(part), ROW_CHUNK):
+            for row in _excel_rows(part, np.arange(start, min(start + ROW_CHUNK, len(part)))):
+                sheet.append(row)
+        written += len(part)
+        _report(progress, written, total)
+
+    summary_sheet = workbook.create_sheet('Summary Statistics')
+    summary_sheet.append(['Metric', 'Value'])
+    for metric, value in summary_table(outcome.summary()):
+        summary_sheet.append([metric, _cell(value)])
+
+    top = outcome.top_changes
+    top_sheet = workbook.create_sheet(_sheet_name(f"Top {len(top)} Changes", set()))
+    top_sheet.append(RESULT_HEADERS)
+    for row in top.itertuples(index=False):
+        top_sheet.append([_cell(value) for value in row])
+    workbook.save(filename)
+
+
+def export_series(series, filename):
+    """Write a ``SnapshotSeries`` to ``filename``, choosing the format by extension.
+
+    Every format holds one row per promotion: the Balance Qty in each
+    snapshot followed by the series metrics. The Excel workbook adds a
+    sheet with the totals of every snapshot.
+    """
+    check_export_path(filename)
+    summary = series.summary()
+    frame = pd.concat([series.to_frame(), summary[SERIES_METRICS]], axis=1, copy=False)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        with open(filename, 'w', newline='', encoding='utf-8') as handle:
+            for start in range(0, len(frame), ROW_CHUNK):
+                frame.iloc[start:start + ROW_CHUNK].to_csv(handle, header=start == 0, index=False,
+                                                          lineterminator='\n')
+        return
+    if extension == '.parquet':
+        frame.to_parquet(filename, index=False)
+        return
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Balance Qty Series')
+    sheet.append([str(column) for column in frame.columns])
+    for start in range(0, len(frame), ROW_CHUNK):
+        for row in frame.iloc[start:start + ROW_CHUNK].itertuples(index=False):
+            sheet.append([_cell(value) for value in row])
+    totals_sheet = workbook.create_sheet('Snapshot Totals')
+    totals = series.snapshot_totals()
+    totals_sheet.append(list(totals.columns))
+    for row in totals.itertuples(index=False):
+        totals_sheet.append([_cell(value) for value in row])
+    workbook.save(filename)
+
+
+def _extra_sheets(comparison, names, top_n):
+    for name in names:
+        if name == TOP_CHANGES_SHEET:
+            change = np.abs(comparison.change)
+            count = min(top_n, len(change))
+            top = np.argpartition(-change, count - 1)[:count] if count else np.empty(0, np.intp)
+            yield f"Top {count} Changes", top[np.argsort(-change[top], kind='stable')]
+        elif name in GROUP_SHEETS:
+            column = GROUP_SHEETS[name]
+            enriched = comparison.enriched()
+            if column not in enriched.columns:
+                continue
+            groups = enriched[column].groupby(enriched[column], observed=True).indices
+            for value, indices in sorted(groups.items(), key=lambda item: str(item[0])):
+                yield f"{column} - {value}", indices
+        else:
+            raise ValueError(f"Unknown sheet: {name}")
+
+
+def _excel_rows(comparison, indices):
+    rows = comparison.rows(indices)
+    labels = np.asarray(comparison.td_desc[indices], dtype=object)
+    missing = pd.isna(labels) | np.isnan(comparison.quantities[:, indices]).any(axis=0)
+    if missing.any():
+        # openpyxl would write NaN as an invalid number; leave the cell empty
+        for position in np.flatnonzero(missing):
+            rows[position] = tuple(_cell(value) for value in rows[position])
+    return rows
+
+
+def _cell(value):
+    return None if pd.isna(value) else value
+
+
+def _sheet_name(title, used_names):
+    name = INVALID_SHEET_CHARS.sub('_', str(title))[:MAX_SHEET_NAME]
+    base, suffix = name, 2
+    while name.lower() in used_names:
+        tag = f" ({suffix})"
+        name = base[:MAX_SHEET_NAME - len(tag)] + tag
+        suffix += 1
+    used_names.add(name.lower())
+    return name
+
+
+def _report(progress, done, total):
+    if progress:
+        progress(min(done, total) / total if total else 1.0)
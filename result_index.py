@@ -0,0 +1,200 @@
+"""Search and sort indexes over the rows of a comparison.
+
+Built once per comparison (``ComparisonOutcome.search_index``), each part
+on first use or all at once by ``prepare`` on a background thread:
+
+* ``Td No``: a hash index for exact lookups and the keys in sorted order
+  for prefix matches, both case-insensitive.
+* ``Td Desc``: a trigram index over the distinct descriptions. A fragment
+  is looked up by intersecting the postings of its trigrams and checking
+  the few candidates left, so only distinct descriptions are ever
+  scanned, and only for fragments shorter than a trigram.
+* A cached ``argsort`` permutation per column and direction; sorting a
+  filtered view keeps the permutation's entries that are in the view
+  instead of sorting again.
+
+Every lookup returns result row indices in result order.
+"""
+import numpy as np
+import pandas as pd
+
+from comparison_engine import RESULT_COLUMNS
+
+# Code points fit in 21 bits, so three of them make one exact uint64 key
+_BITS = 21
+_SEPARATOR = '\x00'
+
+
+def _trigram_keys(codes):
+    """Keys of every trigram starting at each position of a code point array."""
+    return (codes[:-2].astype(np.uint64) << np.uint64(2 * _BITS)
+            | codes[1:-1].astype(np.uint64) << np.uint64(_BITS)
+            | codes[2:].astype(np.uint64))
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+class _Groups:
+    """The rows of every code, as slices of one permutation."""
+
+    def __init__(self, codes, n_codes):
+        self.order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes[codes >= 0], minlength=n_codes)
+        # Rows with code -1 sort first and are skipped
+        self.bounds = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(codes < 0)
+
+    def rows(self, codes):
+        parts = [self.order[self.bounds[code]:self.bounds[code + 1]] for code in codes]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+
+class ResultIndex:
+    """Case-insensitive search and cached sort orders over one comparison."""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self._keys = None
+        self._key_index = None
+        self._key_order = None
+        self._ordered_keys = None
+        self._descriptions = None
+        self._desc_codes = None
+        self._desc_groups = None
+        self._grams = None
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.outcome)
+
+    def prepare(self):
+        """Build every index, e.g. on a worker thread while the user reads."""
+        self._td_no()
+        self._td_desc()
+        for column in RESULT_COLUMNS:
+            self.order(column)
+
+    # -- Td No --------------------------------------------------------------
+
+    def _td_no(self):
+        if self._keys is None:
+            keys = pd.Series(self.outcome.td_no, dtype=object).astype(str).str.lower()
+            keys = keys.to_numpy(dtype=object)
+            self._key_index = pd.Index(keys)
+            self._key_order = np.argsort(keys, kind='stable')
+            self._ordered_keys = keys[self._key_order]
+            # Set last: ``prepare`` may be building this while the UI searches
+            self._keys = keys
+        return self._keys
+
+    def find_td_no(self, td_no):
+        """Rows whose ``Td No`` is exactly ``td_no``."""
+        self._td_no()
+        rows = self._key_index.get_indexer_for([str(td_no).lower()])
+        return np.sort(rows[rows >= 0]).astype(np.intp)
+
+    def td_no_prefix(self, prefix):
+        """Rows whose ``Td No`` starts with ``prefix``."""
+        keys = self._td_no()
+        prefix = str(prefix).lower()
+        if not prefix:
+            return np.arange(len(keys))
+        start = np.searchsorted(self._ordered_keys, prefix, side='left')
+        end = np.searchsorted(self._ordered_keys, prefix + '\U0010ffff', side='left')
+        return np.sort(self._key_order[start:end])
+
+    # -- Td Desc ------------------------------------------------------------
+
+    def _td_desc(self):
+        if self._descriptions is None:
+            values = pd.Series(np.asarray(self.outcome.td_desc, dtype=object), dtype=object)
+            lowered = values.where(values.isna(), values.astype(str).str.lower())
+            codes, descriptions = pd.factorize(lowered)
+            self._desc_codes = codes.astype(np.intp)
+            self._desc_groups = _Groups(self._desc_codes, len(descriptions))
+            descriptions = np.asarray(descriptions, dtype=object)
+
+            # Every distinct trigram of every description, as sorted (key, id) pairs
+            lengths = np.fromiter((len(text) for text in descriptions), dtype=np.intp,
+                                  count=len(descriptions))
+            codes = _code_points(_SEPARATOR.join(descriptions) + _SEPARATOR * 3)
+            owners = np.repeat(np.arange(len(descriptions)), lengths + 1)
+            valid = ((codes[:-2] != 0) & (codes[1:-1] != 0) & (codes[2:] != 0))[:len(owners)]
+            keys = _trigram_keys(codes)[:len(owners)][valid]
+            owners = owners[valid]
+            order = np.lexsort((owners, keys))
+            keys, owners = keys[order], owners[order]
+            distinct = np.ones(len(keys), dtype=bool)
+            distinct[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+            self._grams = (keys[distinct], owners[distinct])
+            self._descriptions = descriptions
+        return self._descriptions
+
+    def desc_contains(self, fragment):
+        """Rows whose ``Td Desc`` contains ``fragment``."""
+        descriptions = self._td_desc()
+        fragment = str(fragment).lower()
+        if len(fragment) < 3:
+            matches = [i for i, text in enumerate(descriptions) if fragment in text]
+            return self._desc_groups.rows(matches)
+
+        gram_keys, gram_owners = self._grams
+        candidates = None
+        for key in np.unique(_trigram_keys(_code_points(fragment))):
+            owners = gram_owners[np.searchsorted(gram_keys, key, side='left'):
+                                 np.searchsorted(gram_keys, key, side='right')]
+            candidates = owners if candidates is None else np.intersect1d(
+                candidates, owners, assume_unique=True)
+            if not len(candidates):
+                break
+        matches = [i for i in candidates.tolist() if fragment in descriptions[i]]
+        return self._desc_groups.rows(matches)
+
+    def search(self, text):
+        """Rows whose ``Td No`` starts with ``text`` or whose ``Td Desc`` contains it."""
+        text = str(text).strip()
+        if not text:
+            return np.arange(len(self))
+        return np.union1d(self.td_no_prefix(text), self.desc_contains(text))
+
+    # -- Sorting ------------------------------------------------------------
+
+    def order(self, column, descending=False):
+        """Row permutation sorting ``column`` (one of ``RESULT_COLUMNS``).
+
+        Stable in both directions; missing values sort last.
+        """
+        key = (column, descending)
+        if key not in self._orders:
+            # Text columns are sorted by rank; NaN marks a missing value
+            if column == 'td_no':
+                self._td_no()
+                ordered = self._ordered_keys
+                # Equal keys share a rank so both directions keep result order
+                distinct = np.ones(len(ordered), dtype=bool)
+                distinct[1:] = ordered[1:] != ordered[:-1]
+                ranks = np.empty(len(self), dtype=np.float64)
+                ranks[self._key_order] = np.cumsum(distinct)
+            elif column == 'td_desc':
+                descriptions = self._td_desc()
+                rank_of = np.empty(len(descriptions) + 1, dtype=np.float64)
+                rank_of[np.argsort(descriptions, kind='stable')] = np.arange(len(descriptions))
+                # Code -1 picks the last entry
+                rank_of[-1] = np.nan
+                ranks = rank_of[self._desc_codes]
+            else:
+                ranks = self.outcome.quantities[RESULT_COLUMNS.index(column) - 2]
+            self._orders[key] = np.argsort(-ranks if descending else ranks, kind='stable')
+        return self._orders[key]
+
+    def sorted_view(self, view, column, descending=False):
+        """``view`` (row indices) reordered by ``column`` without sorting it."""
+        order = self.order(column, descending)
+        if len(view) == len(self):
+            return order
+        in_view = np.zeros(len(self), dtype=bool)
+        in_view[view] = True
+        return order[in_view[order]]
@@ -0,0 +1,196 @@
+from tkinter import ttk
+
+import numpy as np
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTreeview:
+    """A ``ttk.Treeview`` that only materializes the rows on screen.
+
+    The grid shows a *view*: an array of row indices into the caller's
+    data. ``fetch_rows(indices)`` is called with the slice of that view
+    that is currently visible and must return ``(values, tags)`` pairs.
+    The Treeview itself only ever holds one screenful of items, which are
+    reused as the user scrolls.
+    """
+
+    def __init__(self, parent, columns, fetch_rows):
+        self.fetch_rows = fetch_rows
+        self.view = np.empty(0, dtype=np.intp)
+        self.offset = 0
+        self.visible_rows = 1
+        self.items = []
+        self.selected_row = None
+
+        self.tree = ttk.Treeview(parent, show="headings", selectmode="browse")
+        self.vsb = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        hsb = ttk.Scrollbar(parent, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
+
+        self.tree.grid(column=0, row=0, sticky="nsew")
+        self.vsb.grid(column=1, row=0, sticky="ns")
+        hsb.grid(column=0, row=1, sticky="ew")
+
+        parent.grid_columnconfigure(0, weight=1)
+        parent.grid_rowconfigure(0, weight=1)
+
+        self.tree["columns"] = columns
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, minwidth=100, width=200)
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_rows(3))
+        self.tree.bind('<Up>', lambda e: self._on_arrow(-1))
+        self.tree.bind('<Down>', lambda e: self._on_arrow(1))
+        self.tree.bind('<Prior>', lambda e: self.scroll_rows(-self.visible_rows) or "break")
+        self.tree.bind('<Next>', lambda e: self.scroll_rows(self.visible_rows) or "break")
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+
+    def tag_configure(self, tag, **options):
+        self.tree.tag_configure(tag, **options)
+
+    def bind_headings(self, command):
+        """Call ``command(column)`` when a column heading is clicked."""
+        for col in self.tree["columns"]:
+            self.tree.heading(col, command=lambda col=col: command(col))
+
+    def set_heading(self, column, text):
+        self.tree.heading(column, text=text)
+
+    def set_view(self, view):
+        """Show the rows in ``view`` (an index array), scrolled to the top."""
+        self.view = np.asarray(view, dtype=np.intp)
+        self.offset = 0
+        self.selected_row = None
+        self.render()
+
+    def update_view(self, view, changed_rows=None):
+        """Swap in ``view`` keeping the scroll position and selection.
+
+        With ``changed_rows`` (indices into the caller's data) the grid is
+        only re-rendered when the rows on screen differ or one of them
+        changed; without it, always.
+        """
+        view = np.asarray(view, dtype=np.intp)
+        window = self.view[self.offset:self.offset + self.visible_rows]
+        self.view = view
+        self.offset = min(self.offset, self._max_offset())
+        if self.selected_row is not None and not np.isin(self.selected_row, view):
+            self.selected_row = None
+        new_window = view[self.offset:self.offset + self.visible_rows]
+        if (changed_rows is None or not np.array_equal(window, new_window)
+                or np.isin(new_window, changed_rows).any()):
+            self.render()
+        else:
+            self.vsb.set(*self._fractions())
+
+    def clear(self):
+        self.set_view(np.empty(0, dtype=np.intp))
+
+    def show_row(self, row):
+        """Select ``row`` and scroll it into view; False if it is not in the view."""
+        positions = np.flatnonzero(self.view == row)
+        if not len(positions):
+            return False
+        self.selected_row = row
+        if not self.offset <= positions[0] < self.offset + self.visible_rows:
+            self.offset = min(int(positions[0]), self._max_offset())
+        self.render()
+        return True
+
+    def row_count(self):
+        return len(self.view)
+
+    def _max_offset(self):
+        return max(0, len(self.view) - self.visible_rows)
+
+    def scroll_to(self, offset):
+        offset = min(max(0, int(offset)), self._max_offset())
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_rows(self, count):
+        self.scroll_to(self.offset + count)
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * len(self.view)))
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            if args[2] == 'pages':
+                count *= self.visible_rows
+            self.scroll_rows(count)
+
+    def _fractions(self):
+        total = len(self.view)
+        if total == 0:
+            return 0.0, 1.0
+        first = self.offset / total
+        last = min(1.0, (self.offset + self.visible_rows) / total)
+        return first, last
+
+    def render(self):
+        window = self.view[self.offset:self.offset + self.visible_rows]
+        rows = self.fetch_rows(window) if len(window) else []
+
+        # Reuse existing items; only add or drop the difference
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert('', 'end'))
+        if len(self.items) > len(rows):
+            self.tree.delete(*self.items[len(rows):])
+            del self.items[len(rows):]
+
+        for item, (values, tags) in zip(self.items, rows):
+            self.tree.item(item, values=values, tags=tags)
+
+        selected = [item for item, row in zip(self.items, window) if row == self.selected_row]
+        self.tree.selection_set(selected)
+        self.vsb.set(*self._fractions())
+
+    def _on_configure(self, event):
+        row_height = ttk.Style().lookup('Treeview', 'rowheight')
+        row_height = int(row_height) if row_height else DEFAULT_ROW_HEIGHT
+        header = row_height
+        if self.items:
+            bbox = self.tree.bbox(self.items[0])
+            if bbox:
+                header = bbox[1]
+        visible_rows = max(1, (event.height - header) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.offset = min(self.offset, self._max_offset())
+            self.render()
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_arrow(self, step):
+        if self.selected_row is None or len(self.view) == 0:
+            return None
+        positions = np.flatnonzero(self.view == self.selected_row)
+        if not len(positions):
+            return None
+        position = min(max(0, positions[0] + step), len(self.view) - 1)
+        self.selected_row = self.view[position]
+        if position < self.offset:
+            self.scroll_to(position)
+        elif position >= self.offset + self.visible_rows:
+            self.scroll_to(position - self.visible_rows + 1)
+        else:
+            self.render()
+        return "break"
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self.items:
+            position = self.offset + self.items.index(selection[0])
+            if position < len(self.view):
+                self.selected_row = self.view[position]
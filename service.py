@@ -0,0 +1,367 @@
+"""Local HTTP service that parses, compares and renders for many clients.
+
+    python promotion_analysis.py serve [--host 127.0.0.1] [--port 8765]
+
+One asyncio event loop reads HTTP/1.1 requests, keeping connections
+alive between them, and hands the parsing, joining and rendering to a
+thread pool. Parsed snapshots are kept in an LRU keyed by the same
+content hash the snapshot store uses, comparisons by the pair of
+snapshot hashes and rendered charts by comparison, chart and options, so
+a snapshot or comparison already requested by anyone is served from
+memory. Concurrent requests for the same missing entry share one
+computation.
+
+Endpoints (JSON unless noted):
+
+    GET  /stats                                  cache sizes, hits and misses
+    GET  /snapshots/<hash>                       rows and columns; 404 unless cached
+    POST /snapshots                              body: export text, or a file with
+                                                 an X-Filename header; -> hash, rows
+    POST /comparisons                            {"original": hash, "updated": hash}
+    GET  /comparisons/<id>/summary               summary and its printable lines
+    GET  /comparisons/<id>/arrays                .npz of the quantities and change bits
+    POST /comparisons/<id>/labels                {"indices": [...] or null for all}
+                                                 -> td_no, td_desc
+    GET  /comparisons/<id>/charts/<slug>         PNG; ?dpi=&density=&top_n=
+    GET  /comparisons/<id>/export?format=csv     the results file; xlsx may add
+                                                 &sheets=customer_group,...
+
+The service binds to localhost by default and has no authentication;
+only expose it on a network all of whose users may see the data.
+"""
+import asyncio
+import io
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from figure_cache import FigureCache
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_BYTES = 2 * 1024 ** 3
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_CHART_DPI = 100
+MAX_BODY_BYTES = 2 * 1024 ** 3
+# Rough cost of one Python string in an object column
+BYTES_PER_OBJECT = 64
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _frame_bytes(df):
+    size = int(df.memory_usage(index=False, deep=False).sum())
+    objects = sum(1 for dtype in df.dtypes if dtype == object)
+    return size + objects * len(df) * BYTES_PER_OBJECT
+
+
+class _Cache:
+    """A ``FigureCache`` LRU with hit counts and shared in-flight computations."""
+
+    def __init__(self, max_bytes, max_entries):
+        self.entries = FigureCache(max_bytes, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+        return value
+
+    async def get_or_compute(self, key, compute, size_of):
+        value = self.get(key)
+        if value is not None:
+            return value
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.ensure_future(compute())
+        self._pending[key] = future
+        try:
+            value = await future
+        finally:
+            del self._pending[key]
+        self.entries.put(key, value, size_of(value))
+        return value
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.entries.total_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+class ComparisonService:
+    """The request handlers and caches behind ``serve``."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, max_entries=DEFAULT_CACHE_ENTRIES,
+                 workers=None):
+        # Snapshots get half the budget, comparisons and charts a quarter each
+        self.snapshots = _Cache(max_bytes // 2, max_entries)
+        self.comparisons = _Cache(max_bytes // 4, max_entries)
+        self.charts = _Cache(max_bytes // 4, max_entries * 4)
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                           thread_name_prefix='promotion-service')
+        self.routes = [
+            ('GET', re.compile(r'/stats'), self.get_stats),
+            ('GET', re.compile(r'/snapshots/(\w+)'), self.get_snapshot),
+            ('POST', re.compile(r'/snapshots'), self.post_snapshot),
+            ('POST', re.compile(r'/comparisons'), self.post_comparison),
+            ('GET', re.compile(r'/comparisons/([\w-]+)/summary'), self.get_summary),
+            ('GET', re.compile(r'/comparisons/([\w-]+)/arrays'), self.get_arrays),
+            ('POST', re.compile(r'/comparisons/([\w-]+)/labels'), self.post_labels),
+            ('GET', re.compile(r'/comparisons/([\w-]+)/charts/(\w+)'), self.get_chart),
+            ('GET', re.compile(r'/comparisons/([\w-]+)/export'), self.get_export),
+        ]
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, method, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        'application/json', b'{"error": "Body too large"}', False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, content_type, payload = await self.dispatch(method, target, headers, body)
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                await self._respond(writer, method, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, method, status, content_type, payload, keep_alive):
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(payload)
+        await writer.drain()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            for route_method, pattern, handler in self.routes:
+                match = pattern.fullmatch(url.path)
+                if match and route_method == method:
+                    result = await handler(*match.groups(), query=query, headers=headers,
+                                           body=body)
+                    break
+            else:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"No endpoint {method} {url.path}")
+        except ServiceError as e:
+            return e.status, 'application/json', _json({'error': str(e)})
+        except (ValueError, KeyError) as e:
+            return HTTPStatus.BAD_REQUEST, 'application/json', _json({'error': str(e)})
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, 'application/json', _json({'error': str(e)})
+        if isinstance(result, tuple):
+            content_type, payload = result
+            return HTTPStatus.OK, content_type, payload
+        return HTTPStatus.OK, 'application/json', _json(result)
+
+    # -- Handlers -----------------------------------------------------------
+
+    async def get_stats(self, **_):
+        return {'snapshots': self.snapshots.stats(), 'comparisons': self.comparisons.stats(),
+                'charts': self.charts.stats()}
+
+    async def get_snapshot(self, content_hash, **_):
+        return _snapshot_info(content_hash, self._snapshot(content_hash))
+
+    async def post_snapshot(self, body, headers, **_):
+        from snapshot_store import bytes_hash, text_hash
+
+        filename = headers.get('x-filename')
+        if filename:
+            content_hash = bytes_hash(body)
+            compute = lambda: self.run_blocking(_load_file_bytes, body, filename)
+        else:
+            text = body.decode('utf-8')
+            content_hash = text_hash(text)
+            compute = lambda: self.run_blocking(_parse_text, text)
+        df = await self.snapshots.get_or_compute(content_hash, compute, _frame_bytes)
+        return _snapshot_info(content_hash, df)
+
+    async def post_comparison(self, body, **_):
+        from comparison_engine import compare_snapshots
+
+        request = json.loads(body)
+        original_df = self._snapshot(request['original'])
+        updated_df = self._snapshot(request['updated'])
+        comparison_id = f"{request['original']}-{request['updated']}"
+
+        def compare():
+            outcome = compare_snapshots(original_df, updated_df)
+            outcome.summary()
+            outcome.changes()
+            return outcome
+
+        outcome = await self.comparisons.get_or_compute(
+            comparison_id, lambda: self.run_blocking(compare), _outcome_bytes)
+        return {'id': comparison_id, 'rows': len(outcome), 'summary': asdict(outcome.summary())}
+
+    async def get_summary(self, comparison_id, **_):
+        import report
+
+        summary = self._comparison(comparison_id).summary()
+        return {'summary': asdict(summary), 'lines': report.summary_lines(summary)}
+
+    async def get_arrays(self, comparison_id, **_):
+        outcome = self._comparison(comparison_id)
+
+        def pack():
+            changes = outcome.changes()
+            buffer = io.BytesIO()
+            np.savez(buffer, quantities=outcome.quantities, bits=changes.bits,
+                     columns=np.array(changes.columns, dtype=str))
+            return buffer.getvalue()
+
+        return 'application/octet-stream', await self.run_blocking(pack)
+
+    async def post_labels(self, comparison_id, body, **_):
+        outcome = self._comparison(comparison_id)
+        indices = json.loads(body).get('indices')
+        indices = np.arange(len(outcome)) if indices is None else np.asarray(indices, dtype=np.intp)
+        if len(indices) and (indices.min() < 0 or indices.max() >= len(outcome)):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Row index out of range")
+        return {'td_no': outcome.td_no[indices].tolist(),
+                'td_desc': [None if value != value else value
+                            for value in np.asarray(outcome.td_desc[indices], dtype=object)]}
+
+    async def get_chart(self, comparison_id, slug, query, **_):
+        import charts
+        from chart_report import available_charts
+
+        chart_types = {chart_slug: chart_type for chart_type, chart_slug in available_charts()}
+        if slug not in chart_types:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown chart: {slug}")
+        outcome = self._comparison(comparison_id)
+        dpi = int(query.get('dpi', DEFAULT_CHART_DPI))
+        params = charts.chart_params(chart_types[slug], int(query.get('top_n', charts.DEFAULT_TOP_N)),
+                                     query.get('density', '1') != '0')
+        key = (comparison_id, slug, dpi, tuple(sorted(params.items())))
+        png = await self.charts.get_or_compute(
+            key, lambda: self.run_blocking(_render_png, outcome, chart_types[slug], params, dpi),
+            len)
+        return 'image/png', png
+
+    async def get_export(self, comparison_id, query, **_):
+        import report
+
+        outcome = self._comparison(comparison_id)
+        extension = query.get('format', 'csv')
+        if extension not in ('csv', 'xlsx') + (('parquet',) if report.parquet_available() else ()):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Unsupported format: {extension}")
+        sheets = [name for name in query.get('sheets', '').split(',') if name]
+
+        def export():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, f"results.{extension}")
+                report.export_results(outcome, path, sheets)
+                with open(path, 'rb') as handle:
+                    return handle.read()
+
+        return 'application/octet-stream', await self.run_blocking(export)
+
+    def _snapshot(self, content_hash):
+        df = self.snapshots.get(content_hash)
+        if df is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Snapshot {content_hash} is not cached")
+        return df
+
+    def _comparison(self, comparison_id):
+        outcome = self.comparisons.get(comparison_id)
+        if outcome is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Comparison {comparison_id} is not cached")
+        return outcome
+
+
+def _json(value):
+    # Summaries may hold NumPy scalars
+    return json.dumps(value, default=lambda v: v.item()).encode('utf-8')
+
+
+def _snapshot_info(content_hash, df):
+    return {'hash': content_hash, 'rows': len(df), 'columns': [str(c) for c in df.columns]}
+
+
+def _parse_text(text):
+    from snapshot_loader import parse_text
+    return parse_text(text)
+
+
+def _load_file_bytes(data, filename):
+    from snapshot_loader import load_snapshot
+
+    extension = os.path.splitext(filename)[1].lower()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"snapshot{extension}")
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return load_snapshot(path)
+
+
+def _outcome_bytes(outcome):
+    return outcome.quantities.nbytes + len(outcome) * (BYTES_PER_OBJECT + 2)
+
+
+def _render_png(outcome, chart_type, params, dpi):
+    import charts
+
+    fig = charts.build_chart(outcome, chart_type, params)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
+
+
+async def serve_forever(host=DEFAULT_HOST, port=DEFAULT_PORT, max_bytes=DEFAULT_CACHE_BYTES,
+                        workers=None, ready=None):
+    """Run the service until cancelled; ``ready(port)`` is called once listening."""
+    service = ComparisonService(max_bytes, workers=workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    try:
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,251 @@
+"""Client of the local comparison service (see ``service.py``).
+
+``ServiceClient`` uploads snapshots by content hash, skipping the upload
+when the server already has them, and compares them on the server.
+``RemoteComparison`` stands in for a ``ComparisonOutcome`` in the
+dashboard: the quantities and change bits are downloaded once, while
+labels are fetched per visible page and charts and exports are rendered
+by the server. Each thread keeps its own keep-alive connection.
+"""
+import http.client
+import io
+import json
+import os
+import threading
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from multi_diff import ChangeMatrix
+from service import DEFAULT_CHART_DPI, ServiceError
+from summary_stats import ComparisonSummary
+
+
+class RemoteSnapshot:
+    """A snapshot held by the server, in place of a loaded DataFrame."""
+
+    def __init__(self, content_hash, rows, name=None):
+        self.content_hash = content_hash
+        self.rows = rows
+        self.name = name
+
+    def __len__(self):
+        return self.rows
+
+
+class ServiceClient:
+    def __init__(self, url, timeout=300):
+        parts = urlsplit(url if '//' in url else f"http://{url}")
+        if parts.scheme != 'http':
+            raise ValueError(f"Unsupported server URL: {url}")
+        self.url = f"http://{parts.netloc}"
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def request(self, method, path, body=None, headers=None, query=None):
+        """Response body of one request; raises ``ServiceError`` unless it succeeds."""
+        if query:
+            path = f"{path}?{urlencode(query)}"
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # The server closed an idle keep-alive connection; retry once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status >= 400:
+            try:
+                message = json.loads(payload)['error']
+            except (ValueError, KeyError):
+                message = response.reason
+            raise ServiceError(response.status, message)
+        return payload
+
+    def json(self, method, path, body=None, **kwargs):
+        return json.loads(self.request(method, path, body, **kwargs))
+
+    def stats(self):
+        return self.json('GET', '/stats')
+
+    def _cached_snapshot(self, content_hash, name):
+        try:
+            info = self.json('GET', f"/snapshots/{content_hash}")
+        except ServiceError as e:
+            if e.status != 404:
+                raise
+            return None
+        return RemoteSnapshot(info['hash'], info['rows'], name)
+
+    def upload_file(self, path):
+        from snapshot_store import bytes_hash
+
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        name = os.path.basename(path)
+        snapshot = self._cached_snapshot(bytes_hash(data), name)
+        if snapshot is None:
+            info = self.json('POST', '/snapshots', data, headers={'X-Filename': name})
+            snapshot = RemoteSnapshot(info['hash'], info['rows'], name)
+        return snapshot
+
+    def upload_text(self, text):
+        from snapshot_store import text_hash
+
+        snapshot = self._cached_snapshot(text_hash(text), None)
+        if snapshot is None:
+            info = self.json('POST', '/snapshots', text.encode('utf-8'))
+            snapshot = RemoteSnapshot(info['hash'], info['rows'])
+        return snapshot
+
+    def compare(self, original, updated):
+        """A ``RemoteComparison`` of two ``RemoteSnapshot`` objects."""
+        info = self.json('POST', '/comparisons', {'original': original.content_hash,
+                                                  'updated': updated.content_hash})
+        arrays = np.load(io.BytesIO(self.request('GET', f"/comparisons/{info['id']}/arrays")),
+                         allow_pickle=False)
+        return RemoteComparison(self, info['id'], ComparisonSummary(**info['summary']),
+                                arrays['quantities'], arrays['bits'],
+                                arrays['columns'].tolist())
+
+
+class RemoteComparison:
+    """The parts of ``ComparisonOutcome`` the dashboard uses, served remotely."""
+
+    def __init__(self, client, comparison_id, summary, quantities, bits, columns):
+        self.client = client
+        self.id = comparison_id
+        self._summary = summary
+        self.quantities = quantities
+        self._changes = ChangeMatrix(columns, bits, {})
+        self.added = None
+        self.removed = None
+        self._search_index = None
+
+    @property
+    def orig_qty(self):
+        return self.quantities[0]
+
+    @property
+    def updated_qty(self):
+        return self.quantities[1]
+
+    @property
+    def change(self):
+        return self.quantities[2]
+
+    def __len__(self):
+        return self.quantities.shape[1]
+
+    def summary(self):
+        return self._summary
+
+    def fingerprint(self):
+        return self.id
+
+    def changes(self):
+        return self._changes
+
+    def search_index(self):
+        """A local ``ResultIndex``; downloads every label on first use."""
+        if self._search_index is None:
+            from result_index import ResultIndex
+
+            labels = self.client.json('POST', f"/comparisons/{self.id}/labels", {'indices': None})
+            self.td_no = np.array(labels['td_no'], dtype=object)
+            self.td_desc = np.array(labels['td_desc'], dtype=object)
+            self._search_index = ResultIndex(self)
+        return self._search_index
+
+    def rows(self, indices):
+        indices = np.asarray(indices, dtype=np.intp)
+        labels = self.client.json('POST', f"/comparisons/{self.id}/labels",
+                                  {'indices': indices.tolist()})
+        return list(zip(
+            labels['td_no'],
+            labels['td_desc'],
+            self.orig_qty[indices].tolist(),
+            self.updated_qty[indices].tolist(),
+            self.change[indices].tolist()
+        ))
+
+    def chart_png(self, chart_type, params, dpi=DEFAULT_CHART_DPI):
+        import charts
+
+        slug = dict(charts.CHART_TYPES)[chart_type]
+        query = {'dpi': dpi, 'density': int(params.get('density', True)),
+                 'top_n': params.get('n_changes', charts.DEFAULT_TOP_N)}
+        return self.client.request('GET', f"/comparisons/{self.id}/charts/{slug}", query=query)
+
+    def build_chart(self, chart_type, params, dpi=DEFAULT_CHART_DPI):
+        """The server's rendering of ``chart_type`` as a matplotlib Figure."""
+        return _png_figure(self.chart_png(chart_type, params, dpi), dpi)
+
+    def export(self, filename, extra_sheets=(), progress=None):
+        extension = os.path.splitext(filename)[1].lower().lstrip('.')
+        payload = self.client.request('GET', f"/comparisons/{self.id}/export",
+                                      query={'format': extension,
+                                             'sheets': ','.join(extra_sheets)})
+        with open(filename, 'wb') as handle:
+            handle.write(payload)
+        if progress is not None:
+            progress(1.0)
+
+    def export_chart_report(self, pdf_path=None, image_dir=None, dpi=DEFAULT_CHART_DPI,
+                            n_changes=None, density=True, progress=None):
+        """``chart_report.export_chart_report`` with the charts rendered by the server."""
+        import charts
+        from chart_report import available_charts
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        pages = available_charts()
+        params = {'density': density, 'n_changes': n_changes or charts.DEFAULT_TOP_N}
+        if image_dir:
+            os.makedirs(image_dir, exist_ok=True)
+        paths = []
+        pdf = PdfPages(pdf_path) if pdf_path else None
+        try:
+            for done, (chart_type, slug) in enumerate(pages, 1):
+                png = self.chart_png(chart_type, params, dpi)
+                if image_dir:
+                    path = os.path.join(image_dir, f"{slug}.png")
+                    with open(path, 'wb') as handle:
+                        handle.write(png)
+                    paths.append(path)
+                if pdf is not None:
+                    pdf.savefig(_png_figure(png, dpi), dpi=dpi)
+                if progress is not None:
+                    progress(done, len(pages))
+        finally:
+            if pdf is not None:
+                pdf.close()
+        if pdf_path:
+            paths.append(pdf_path)
+        return paths
+
+
+def _png_figure(png, dpi):
+    from matplotlib.figure import Figure
+    from matplotlib.image import imread
+
+    image = imread(io.BytesIO(png), format='png')
+    height, width = image.shape[:2]
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    fig.figimage(image)
+    return fig
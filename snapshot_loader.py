@@ -0,0 +1,260 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+KEY_COLUMN = 'Td No'
+DESC_COLUMN = 'Td Desc'
+QTY_COLUMN = 'Balance Qty'
+
+# How every column the comparison, column diff and chart code read is
+# stored; everything else in an export is dropped while loading or parsing.
+#   key:      Td No, kept as str
+#   text:     str with equal values sharing one object (interned)
+#   category: Categorical
+#   date:     datetime64, unparseable values NaT
+#   quantity: float32 when every value fits exactly, float64 otherwise
+DTYPE_PLAN = {
+    KEY_COLUMN: 'key',
+    DESC_COLUMN: 'text',
+    'Customer Group': 'category',
+    'Qualify Group': 'category',
+    'Assign Group': 'category',
+    'Promo Type': 'category',
+    'Start Date': 'date',
+    'End Date': 'date',
+    'Plan Qty': 'quantity',
+    'Issue Qty': 'quantity',
+    QTY_COLUMN: 'quantity'
+}
+LOADED_COLUMNS = list(DTYPE_PLAN)
+CATEGORY_COLUMNS = [col for col, kind in DTYPE_PLAN.items() if kind == 'category']
+DATE_COLUMNS = [col for col, kind in DTYPE_PLAN.items() if kind == 'date']
+TEXT_COLUMNS = [col for col, kind in DTYPE_PLAN.items() if kind == 'text']
+QUANTITY_COLUMNS = [col for col, kind in DTYPE_PLAN.items() if kind == 'quantity']
+# Besides Balance Qty, which is always required
+NUMERIC_COLUMNS = [col for col in QUANTITY_COLUMNS if col != QTY_COLUMN]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+FILE_TYPES = [
+    ("Promotion exports", "*.tsv *.txt *.csv *.xlsx"),
+    ("Tab separated", "*.tsv *.txt"),
+    ("CSV files", "*.csv"),
+    ("Excel files", "*.xlsx"),
+    ("All files", "*.*")
+]
+
+
+def parse_text(text_data):
+    """Parse tab separated text pasted from Excel into a DataFrame.
+
+    Typed by ``DTYPE_PLAN`` like a loaded file; other columns are never
+    materialized. Every line is one row and every tab a cell boundary, as
+    Excel copies them, so quotes are kept as text.
+    """
+    df = pd.read_csv(
+        io.StringIO(text_data.strip()),
+        sep='\t',
+        usecols=lambda col: col in DTYPE_PLAN,
+        dtype=str,
+        na_filter=False,
+        quoting=csv.QUOTE_NONE
+    )
+    return _finish([_convert_chunk(df)])
+
+
+def parse_text_edit(text_data, previous_text, previous_df):
+    """Parse ``text_data`` reusing the rows of an earlier parse.
+
+    ``previous_df`` must be what ``parse_text`` returned for
+    ``previous_text``. Lines shared at the start and end of both texts are
+    taken from it and only the lines in between are parsed, so pasting a
+    slightly edited export again costs little more than splitting it.
+    """
+    lines = text_data.strip().split('\n')
+    old_lines = previous_text.strip().split('\n')
+    # Rows are reused by line position, which only holds while every line
+    # was a row: the parser skips blank lines. A blank line in the shared
+    # head or tail is also in the old text, so checking that one is enough.
+    if lines[0] != old_lines[0] or len(old_lines) - 1 != len(previous_df):
+        return parse_text(text_data)
+
+    new_rows = np.array(lines[1:], dtype=object)
+    old_rows = np.array(old_lines[1:], dtype=object)
+    limit = min(len(new_rows), len(old_rows))
+    head = _common_lines(old_rows, new_rows, limit)
+    tail = _common_lines(old_rows[::-1], new_rows[::-1], limit - head)
+
+    edited = parse_text('\n'.join([lines[0], *new_rows[head:len(new_rows) - tail]]))
+    if head == 0 and tail == 0:
+        return edited
+    # The edited rows were interned on their own; re-interning every row
+    # would cost more than the edit
+    return _finish([previous_df.iloc[:head], edited, previous_df.iloc[len(old_rows) - tail:]],
+                   intern=False)
+
+
+def _common_lines(old_rows, new_rows, limit):
+    same = np.asarray(old_rows[:limit] == new_rows[:limit], dtype=bool)
+    differs = np.flatnonzero(~same)
+    return int(differs[0]) if len(differs) else limit
+
+
+def _check_columns(columns, path):
+    missing = [col for col in (KEY_COLUMN, QTY_COLUMN) if col not in columns]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} is missing column(s): {', '.join(missing)}")
+
+
+def _key_to_text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return '' if value is None else str(value)
+
+
+def _quantities(values, fill=None):
+    values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    if fill is not None:
+        values = np.where(np.isnan(values), fill, values)
+    narrow = values.astype(np.float32)
+    # Whole-number quantities below 2**24 round-trip; anything else stays float64
+    exact = (narrow == values) | np.isnan(values)
+    return narrow if exact.all() else values
+
+
+def _interned(values):
+    """``values`` as an object array in which equal strings are one object."""
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    # Missing values (code -1) come back as None, as from the snapshot store
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    lookup[:-1] = uniques
+    lookup[-1] = None
+    return lookup[codes]
+
+
+def _convert_chunk(chunk):
+    """Apply ``DTYPE_PLAN`` to the columns of ``chunk``."""
+    for col in chunk.columns:
+        kind = DTYPE_PLAN.get(col)
+        if kind == 'quantity':
+            chunk[col] = _quantities(chunk[col], fill=0 if col == QTY_COLUMN else None)
+        elif kind == 'date':
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+        elif kind == 'category':
+            chunk[col] = chunk[col].astype('category')
+    return chunk
+
+
+def _finish(chunks, intern=True):
+    # Chunks carry their own categories; unify them so concat keeps the
+    # categorical dtype instead of falling back to object.
+    if len(chunks) > 1:
+        # Shallow copies: chunks may be slices of a frame still in use
+        chunks = [chunk.copy(deep=False) for chunk in chunks]
+        for col in CATEGORY_COLUMNS:
+            if col in chunks[0].columns:
+                categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+                for chunk in chunks:
+                    chunk[col] = chunk[col].cat.set_categories(categories)
+    df = pd.concat(chunks, ignore_index=True)
+    df = df[[col for col in LOADED_COLUMNS if col in df.columns]]
+    if intern:
+        for col in TEXT_COLUMNS:
+            if col in df.columns:
+                df[col] = _interned(df[col])
+    return df
+
+
+def _empty_chunk(columns):
+    return _convert_chunk(pd.DataFrame({col: pd.Series(dtype=object) for col in columns}))
+
+
+def _iter_delimited(path, sep, chunksize):
+    header = pd.read_csv(path, sep=sep, nrows=0).columns
+    _check_columns(header, path)
+    reader = pd.read_csv(
+        path,
+        sep=sep,
+        usecols=lambda col: col in LOADED_COLUMNS,
+        dtype=str,
+        na_filter=False,
+        chunksize=chunksize
+    )
+    empty = True
+    for chunk in reader:
+        empty = False
+        yield _convert_chunk(chunk)
+    if empty:
+        yield _empty_chunk([col for col in LOADED_COLUMNS if col in header])
+
+
+def _report(progress, chunks):
+    if progress is not None:
+        progress(sum(len(chunk) for chunk in chunks))
+
+
+def _iter_xlsx(path, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(col) if col is not None else '' for col in next(rows, ())]
+        _check_columns(header, path)
+        keep = [(i, col) for i, col in enumerate(header) if col in LOADED_COLUMNS]
+        columns = [col for _, col in keep]
+
+        empty = True
+        buffer = []
+        for row in rows:
+            buffer.append([row[i] if i < len(row) else None for i, _ in keep])
+            if len(buffer) >= chunksize:
+                empty = False
+                yield _xlsx_chunk(buffer, columns)
+                buffer = []
+        if buffer or empty:
+            yield _xlsx_chunk(buffer, columns) if buffer else _empty_chunk(columns)
+    finally:
+        workbook.close()
+
+
+def _xlsx_chunk(rows, columns):
+    chunk = pd.DataFrame(rows, columns=columns)
+    chunk[KEY_COLUMN] = chunk[KEY_COLUMN].map(_key_to_text)
+    return _convert_chunk(chunk)
+
+
+def iter_snapshot(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Read a TSV, CSV or XLSX promotion export as typed chunks.
+
+    Yields DataFrames of up to ``chunksize`` rows converted like
+    ``load_snapshot`` does, except that group columns only know the
+    categories of their own chunk. An export without rows yields one empty
+    chunk, so the columns are always known.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.xlsx':
+        return _iter_xlsx(path, chunksize)
+    if ext == '.csv':
+        return _iter_delimited(path, ',', chunksize)
+    if ext in ('.tsv', '.txt', ''):
+        return _iter_delimited(path, '\t', chunksize)
+    raise ValueError(f"Unsupported file type: {ext}")
+
+
+def load_snapshot(path, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Load a TSV, CSV or XLSX promotion export in chunks.
+
+    Only ``LOADED_COLUMNS`` are kept, typed by ``DTYPE_PLAN`` (a missing
+    ``Balance Qty`` becomes 0). ``progress``,
+    if given, is called with the number of rows read after every chunk.
+    """
+    chunks = []
+    for chunk in iter_snapshot(path, chunksize):
+        chunks.append(chunk)
+        _report(progress, chunks)
+    return _finish(chunks)
@@ -0,0 +1,103 @@
+"""Bytes a parsed snapshot keeps in memory, column by column.
+
+``snapshot_bytes`` counts what a DataFrame really holds: array buffers,
+category codes plus their values, and every distinct Python object of an
+object column once, however many rows point at it (pandas'
+``memory_usage(deep=True)`` counts a shared string again for every row,
+so it cannot show what interning saves). ``memory_report`` sets the
+columns of an export as untyped text, the way pasted data used to be
+kept, against the snapshot ``DTYPE_PLAN`` gives it now.
+"""
+import csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from snapshot_loader import load_snapshot
+
+REPORT_COLUMNS = ['before_dtype', 'before_bytes', 'after_dtype', 'after_bytes']
+
+
+def _object_bytes(values):
+    """Pointer array plus every distinct object in it, each counted once."""
+    ids = np.fromiter(map(id, values), dtype=np.uint64, count=len(values))
+    _, first = np.unique(ids, return_index=True)
+    return values.nbytes + sum(map(sys.getsizeof, values[first]))
+
+
+def column_bytes(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.to_numpy()
+        return series.cat.codes.to_numpy().nbytes + (
+            _object_bytes(categories) if categories.dtype == object else categories.nbytes)
+    values = series.to_numpy()
+    return _object_bytes(values) if values.dtype == object else values.nbytes
+
+
+def snapshot_bytes(df):
+    """Bytes held by every column of ``df``."""
+    return pd.Series({col: column_bytes(df[col]) for col in df.columns}, dtype=np.int64)
+
+
+def untyped_snapshot(path):
+    """Every column of an export as text, one ``str`` per cell.
+
+    What parsing the export as pasted data used to keep: no column dropped
+    or converted and no string shared between cells.
+    """
+    if os.path.splitext(path)[1].lower() == '.xlsx':
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = [['' if value is None else str(value) for value in row]
+                    for row in workbook.active.iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+    else:
+        delimiter = ',' if path.lower().endswith('.csv') else '\t'
+        with open(path, newline='', encoding='utf-8') as handle:
+            rows = list(csv.reader(handle, delimiter=delimiter))
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def memory_report(path):
+    """``REPORT_COLUMNS`` per export column of ``path``, plus a ``total`` row.
+
+    Columns the loader drops have ``after_dtype`` 'dropped' and no bytes.
+    """
+    before = untyped_snapshot(path)
+    before_bytes = snapshot_bytes(before)
+    after = load_snapshot(path)
+    after_bytes = snapshot_bytes(after)
+    rows = {}
+    for col in before.columns:
+        kept = col in after.columns
+        rows[col] = [str(before[col].dtype), int(before_bytes[col]),
+                     str(after[col].dtype) if kept else 'dropped',
+                     int(after_bytes[col]) if kept else 0]
+    report = pd.DataFrame.from_dict(rows, orient='index', columns=REPORT_COLUMNS)
+    report.loc['total'] = ['', int(before_bytes.sum()), '', int(after_bytes.sum())]
+    report.attrs['rows'] = len(after)
+    return report
+
+
+def format_report(name, report):
+    """Lines of a ``memory_report`` for the console."""
+    lines = [f"{name}: {report.attrs.get('rows', 0):,} rows",
+             f"{'column':<18} {'before':<10} {'MB':>9}   {'after':<16} {'MB':>9}"]
+    for col, row in report.iterrows():
+        if col == 'total':
+            continue
+        lines.append(f"{str(col)[:18]:<18} {row.before_dtype[:10]:<10} "
+                     f"{row.before_bytes / 1024 ** 2:9.2f}   {row.after_dtype[:16]:<16} "
+                     f"{row.after_bytes / 1024 ** 2:9.2f}")
+    before, after = report.loc['total', 'before_bytes'], report.loc['total', 'after_bytes']
+    share = f" ({after / before:.0%} of before)" if before else ""
+    lines.append(f"{'total':<18} {'':<10} {before / 1024 ** 2:9.2f}   {'':<16} "
+                 f"{after / 1024 ** 2:9.2f}{share}")
+    return lines
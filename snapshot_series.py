@@ -0,0 +1,228 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from comparison_engine import DESC_COLUMN, KEY_COLUMN, QTY_COLUMN
+from snapshot_loader import load_snapshot
+
+# Rows processed at once by the per-promotion metrics, bounding temporaries
+SERIES_CHUNK = 100_000
+
+SUMMARY_COLUMNS = ['td_no', 'td_desc', 'first_qty', 'last_qty', 'net_change',
+                   'total_movement', 'burn_rate', 'snapshots_present']
+
+_DATE_IN_NAME = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+
+
+class SnapshotSeries:
+    """Balance Qty of every promotion across an ordered series of snapshots.
+
+    ``quantities`` is a (promotions, snapshots) float64 matrix aligned on
+    ``Td No``; ``present`` marks which promotions appear in which snapshot
+    (absent cells hold NaN). ``td_desc`` is the latest description seen.
+    ``times`` places the snapshots on the time axis: days since the first
+    snapshot when every label carries a date, otherwise the snapshot
+    position. ``sources`` keeps what each snapshot was loaded from, so any
+    pair can be reloaded for a full comparison.
+    """
+
+    def __init__(self, labels, td_no, td_desc, quantities, present, times=None, sources=None):
+        self.labels = list(labels)
+        self.td_no = td_no
+        self.td_desc = td_desc
+        self.quantities = quantities
+        self.present = present
+        self.times = (np.arange(len(self.labels), dtype=np.float64)
+                      if times is None else np.asarray(times, dtype=np.float64))
+        self.time_unit = 'snapshot' if times is None else 'day'
+        self.sources = list(sources) if sources is not None else [None] * len(self.labels)
+        self._summary = None
+
+    def __len__(self):
+        return len(self.td_no)
+
+    @property
+    def n_snapshots(self):
+        return len(self.labels)
+
+    def deltas(self):
+        """Change between consecutive snapshots, (promotions, snapshots - 1).
+
+        NaN where the promotion is missing from either side.
+        """
+        return np.diff(self.quantities, axis=1)
+
+    def summary(self):
+        """Per-promotion first/last quantity, net change, movement and burn rate.
+
+        ``total_movement`` is the sum of absolute step changes and
+        ``burn_rate`` the least-squares slope of Balance Qty over ``times``,
+        negated so a balance being used up has a positive rate. Computed
+        once, in row chunks, without looping over promotions.
+        """
+        if self._summary is None:
+            n = len(self)
+            columns = {name: np.empty(n) for name in SUMMARY_COLUMNS[2:]}
+            for start in range(0, n, SERIES_CHUNK):
+                stop = min(start + SERIES_CHUNK, n)
+                for name, values in _chunk_metrics(self.quantities[start:stop],
+                                                   self.present[start:stop],
+                                                   self.times).items():
+                    columns[name][start:stop] = values
+            columns['snapshots_present'] = columns['snapshots_present'].astype(np.int64)
+            frame = pd.DataFrame({'td_no': self.td_no, 'td_desc': self.td_desc}, copy=False)
+            self._summary = pd.concat([frame, pd.DataFrame(columns, copy=False)], axis=1)
+        return self._summary
+
+    def largest_movers(self, n=20, by='net_change'):
+        """The ``n`` promotions with the largest absolute ``by`` value."""
+        values = np.abs(self.summary()[by].to_numpy())
+        values = np.where(np.isnan(values), -np.inf, values)
+        n = min(n, len(values))
+        if n == 0:
+            return self.summary().iloc[:0]
+        top = np.argpartition(-values, n - 1)[:n]
+        top = top[np.argsort(-values[top], kind='stable')]
+        return self.summary().iloc[top].reset_index(drop=True)
+
+    def to_frame(self):
+        """Wide table: ``td_no``, ``td_desc`` and one column per snapshot."""
+        frame = pd.DataFrame({'td_no': self.td_no, 'td_desc': self.td_desc}, copy=False)
+        values = pd.DataFrame(self.quantities, columns=self.labels, copy=False)
+        return pd.concat([frame, values], axis=1, copy=False)
+
+    def snapshot_totals(self):
+        """Total Balance Qty and promotion count in every snapshot."""
+        return pd.DataFrame({
+            'snapshot': self.labels,
+            'promotions': self.present.sum(axis=0),
+            'total_qty': np.nansum(self.quantities, axis=0)
+        })
+
+
+def build_series(snapshots, labels=None, sources=None, progress=None):
+    """Align an ordered list of snapshot DataFrames on ``Td No``.
+
+    Each snapshot is reduced to integer row codes into one growing index
+    of keys plus its quantities, so only the key strings of the union
+    are kept however many snapshots there are. Like ``compare_snapshots``
+    the first row of a duplicated key wins and null keys are ignored.
+    ``snapshots`` may be any iterable, e.g. a generator loading files one
+    at a time; ``progress(done)`` is called after each one.
+    """
+    known = pd.Index([], dtype=object)
+    descriptions = np.empty(0, dtype=object)
+    columns = []
+    for position, df in enumerate(snapshots):
+        if KEY_COLUMN not in df.columns or QTY_COLUMN not in df.columns:
+            raise KeyError(f"Snapshot {position + 1} needs '{KEY_COLUMN}' and '{QTY_COLUMN}' columns")
+        keys = df[KEY_COLUMN].to_numpy(dtype=object)
+        keep = pd.notna(keys) & ~pd.Series(keys).duplicated(keep='first').to_numpy()
+        keys = keys[keep]
+        qty = pd.to_numeric(df[QTY_COLUMN], errors='coerce').to_numpy(dtype=np.float64)[keep]
+
+        codes = known.get_indexer(keys)
+        new = codes < 0
+        if new.any():
+            codes[new] = np.arange(len(known), len(known) + int(new.sum()))
+            known = known.append(pd.Index(keys[new], dtype=object))
+            descriptions = np.concatenate([descriptions, np.full(int(new.sum()), None, dtype=object)])
+        if DESC_COLUMN in df.columns:
+            descriptions[codes] = df[DESC_COLUMN].to_numpy(dtype=object)[keep]
+        columns.append((codes, qty))
+        if progress:
+            progress(position + 1)
+
+    n_snapshots = len(columns)
+    if labels is None:
+        labels = [f"Snapshot {i + 1}" for i in range(n_snapshots)]
+    quantities = np.full((len(known), n_snapshots), np.nan)
+    present = np.zeros((len(known), n_snapshots), dtype=bool)
+    for column, (codes, qty) in enumerate(columns):
+        quantities[codes, column] = qty
+        present[codes, column] = True
+
+    return SnapshotSeries(labels, known.to_numpy(dtype=object), descriptions, quantities,
+                          present, times=_times(labels), sources=sources)
+
+
+def load_series(paths, progress=None):
+    """Load snapshot files in order and build their ``SnapshotSeries``.
+
+    Files are loaded one at a time and dropped once aligned. Labels are
+    the file names; ``progress(done, total)`` is called after each file.
+    """
+    paths = list(paths)
+    frames = (load_snapshot(path) for path in paths)
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+
+    def loaded(done):
+        if progress:
+            progress(done, len(paths))
+
+    return build_series(frames, labels, sources=paths, progress=loaded)
+
+
+def order_paths(paths):
+    """Sort snapshot files by the date in their name, then by name."""
+    def key(path):
+        match = _DATE_IN_NAME.search(os.path.basename(path))
+        return (match.groups() if match else ('',) * 3, os.path.basename(path))
+    return sorted(paths, key=key)
+
+
+def _label_dates(labels):
+    dates = []
+    for label in labels:
+        match = _DATE_IN_NAME.search(str(label))
+        if not match:
+            return None
+        date = pd.to_datetime(''.join(match.groups()), format='%Y%m%d', errors='coerce')
+        if pd.isna(date):
+            return None
+        dates.append(date)
+    return dates
+
+
+def _times(labels):
+    dates = _label_dates(labels)
+    if dates is None or len(set(dates)) != len(dates):
+        return None
+    return np.array([(date - dates[0]).days for date in dates], dtype=np.float64)
+
+
+def _chunk_metrics(quantities, present, times):
+    rows = np.arange(len(quantities))
+    n_snapshots = quantities.shape[1]
+    counts = present.sum(axis=1)
+    seen = counts > 0
+    first = present.argmax(axis=1)
+    last = n_snapshots - 1 - present[:, ::-1].argmax(axis=1)
+    first_qty = np.where(seen, quantities[rows, first], np.nan)
+    last_qty = np.where(seen, quantities[rows, last], np.nan)
+
+    steps = np.abs(np.diff(quantities, axis=1))
+    total_movement = np.nansum(steps, axis=1)
+
+    # Least-squares slope over the snapshots each promotion appears in
+    weights = present & ~np.isnan(quantities)
+    n = weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(weights, times, 0.0)
+        q = np.where(weights, quantities, 0.0)
+        t_centered = np.where(weights, t - (t.sum(axis=1) / n)[:, None], 0.0)
+        q_centered = np.where(weights, q - (q.sum(axis=1) / n)[:, None], 0.0)
+        variance = (t_centered * t_centered).sum(axis=1)
+        slope = (t_centered * q_centered).sum(axis=1) / variance
+    burn_rate = np.where(variance > 0, -slope, np.nan)
+
+    return {
+        'first_qty': first_qty,
+        'last_qty': last_qty,
+        'net_change': last_qty - first_qty,
+        'total_movement': total_movement,
+        'burn_rate': burn_rate,
+        'snapshots_present': counts
+    }
@@ -0,0 +1,448 @@
+"""Local on-disk store of parsed snapshots and the comparisons between them.
+
+Everything lives in one SQLite file. A snapshot is keyed by a content hash
+of the file or pasted text it was parsed from and kept column by column as
+typed binary blobs: numbers and dates as raw arrays, strings and groups as
+integer codes plus their distinct values. Reloading one therefore costs a
+few array copies instead of a parse. Each snapshot also keeps its row
+order sorted on ``Td No``, so any two stored snapshots are joined by
+merging the two orders instead of hashing every key, and every comparison
+keeps its join, so comparing the same two again or reopening an earlier
+result skips the key join altogether.
+
+Retention is bounded by snapshot count, total bytes and age; the least
+recently used snapshots are evicted first, together with their comparisons.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from comparison_engine import KEY_COLUMN, outcome_from_join
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.promotion_analysis', 'snapshots.db')
+DEFAULT_MAX_SNAPSHOTS = 50
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_AGE_DAYS = 90
+
+# Part of every content hash, so a change to how snapshots are parsed or
+# encoded never serves data stored by an older version
+STORE_FORMAT = b'promotion-store-3'
+HASH_BLOCK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    content_hash TEXT PRIMARY KEY,
+    name TEXT,
+    source TEXT,
+    rows INTEGER,
+    size_bytes INTEGER,
+    added REAL,
+    last_used REAL
+);
+CREATE TABLE IF NOT EXISTS snapshot_columns (
+    content_hash TEXT,
+    position INTEGER,
+    name TEXT,
+    kind TEXT,
+    dtype TEXT,
+    meta TEXT,
+    data BLOB,
+    PRIMARY KEY (content_hash, position)
+);
+CREATE TABLE IF NOT EXISTS key_index (
+    content_hash TEXT PRIMARY KEY,
+    sorted_rows BLOB
+);
+CREATE TABLE IF NOT EXISTS comparisons (
+    original_hash TEXT,
+    updated_hash TEXT,
+    positions BLOB,
+    added_rows BLOB,
+    removed_rows BLOB,
+    created REAL,
+    last_used REAL,
+    PRIMARY KEY (original_hash, updated_hash)
+);
+CREATE INDEX IF NOT EXISTS comparisons_updated ON comparisons (updated_hash);
+"""
+
+
+def file_hash(path):
+    """Content hash of a snapshot file, read in blocks."""
+    digest = hashlib.blake2b(STORE_FORMAT, digest_size=20)
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def bytes_hash(data):
+    """``file_hash`` of a file with contents ``data``."""
+    digest = hashlib.blake2b(STORE_FORMAT, digest_size=20)
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def text_hash(text):
+    """Content hash of pasted snapshot text."""
+    digest = hashlib.blake2b(STORE_FORMAT + b'text', digest_size=20)
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Parsed snapshots and comparison joins in one SQLite file.
+
+    Every method opens its own connection, so one store can be shared by
+    the GUI's background jobs. Loaded frames carry their hash in
+    ``df.attrs['content_hash']``; ``compare`` uses it to find a stored join.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, max_snapshots=DEFAULT_MAX_SNAPSHOTS,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            # Must be set before the first table exists to take effect
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        return _Connection(sqlite3.connect(self.path, timeout=30))
+
+    def __contains__(self, content_hash):
+        with self._connect() as db:
+            return db.execute("SELECT 1 FROM snapshots WHERE content_hash = ?",
+                              (content_hash,)).fetchone() is not None
+
+    def load_file(self, path, progress=None):
+        """The snapshot in ``path``, from the store when it was seen before.
+
+        Otherwise the file is parsed with ``snapshot_loader.load_snapshot``
+        (``progress`` is passed on) and stored.
+        """
+        content_hash = file_hash(path)
+        if content_hash in self:
+            return self.load(content_hash)
+        from snapshot_loader import load_snapshot
+        df = load_snapshot(path, progress=progress)
+        self.save(df, content_hash, os.path.basename(path), os.path.abspath(path))
+        return df
+
+    def parse_text(self, text, name="Pasted data"):
+        """Pasted snapshot text, parsed once and then served from the store."""
+        content_hash = text_hash(text)
+        if content_hash in self:
+            return self.load(content_hash)
+        from snapshot_loader import parse_text
+        df = parse_text(text)
+        self.save(df, content_hash, name, None)
+        return df
+
+    def save(self, df, content_hash, name=None, source=None):
+        """Store ``df`` under ``content_hash`` and apply the retention limits."""
+        encoded = [_encode_column(df[column]) for column in df.columns]
+        sorted_rows = _key_order(df)
+        size = sum(len(data) for _, _, _, data in encoded) + sorted_rows.nbytes
+        now = time.time()
+        with self._connect() as db:
+            self._delete(db, content_hash)
+            db.execute("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (content_hash, name, source, len(df), size, now, now))
+            db.executemany(
+                "INSERT INTO snapshot_columns VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(content_hash, position, str(column), kind, dtype, meta, data)
+                 for position, (column, (kind, dtype, meta, data))
+                 in enumerate(zip(df.columns, encoded))])
+            db.execute("INSERT INTO key_index VALUES (?, ?)",
+                       (content_hash, sorted_rows.tobytes()))
+        df.attrs['content_hash'] = content_hash
+        self.prune(keep=content_hash)
+        return content_hash
+
+    def load(self, content_hash):
+        """The stored snapshot as a typed DataFrame; raises ``KeyError`` if absent."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT name, kind, dtype, meta, data FROM snapshot_columns "
+                "WHERE content_hash = ? ORDER BY position", (content_hash,)).fetchall()
+            if not rows:
+                raise KeyError(f"Snapshot {content_hash} is not in the store")
+            db.execute("UPDATE snapshots SET last_used = ? WHERE content_hash = ?",
+                       (time.time(), content_hash))
+        df = pd.DataFrame({name: _decode_column(kind, dtype, meta, data)
+                           for name, kind, dtype, meta, data in rows}, copy=False)
+        df.attrs['content_hash'] = content_hash
+        return df
+
+    def compare(self, original_df, updated_df):
+        """``compare_snapshots``, replaying the stored join when there is one.
+
+        Frames loaded from this store carry their content hash. Two stored
+        snapshots never compared before are joined by merging their stored
+        ``Td No`` orders, and the join is saved for next time.
+        """
+        from comparison_engine import compare_snapshots
+
+        original_hash = original_df.attrs.get('content_hash')
+        updated_hash = updated_df.attrs.get('content_hash')
+        if original_hash is None or updated_hash is None:
+            return compare_snapshots(original_df, updated_df)
+
+        outcome = self.load_comparison(original_hash, updated_hash, original_df, updated_df)
+        if outcome is None:
+            orders = self.key_orders(original_hash, updated_hash)
+            join = None
+            if orders is not None:
+                join = _merge_join(original_df, updated_df, *orders)
+            if join is None:
+                outcome = compare_snapshots(original_df, updated_df)
+            else:
+                outcome = outcome_from_join(original_df, updated_df, *join)
+            self.save_comparison(outcome, original_hash, updated_hash)
+        return outcome
+
+    def key_orders(self, *content_hashes):
+        """The stored ``Td No`` row order of each snapshot, or ``None`` if one has none."""
+        with self._connect() as db:
+            rows = [db.execute("SELECT sorted_rows FROM key_index WHERE content_hash = ?",
+                               (content_hash,)).fetchone() for content_hash in content_hashes]
+        if any(row is None for row in rows):
+            return None
+        return [np.frombuffer(row[0], dtype=np.int64) for row in rows]
+
+    def save_comparison(self, outcome, original_hash, updated_hash):
+        positions, added_rows, removed_rows = outcome.join
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO comparisons VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (original_hash, updated_hash,
+                 np.asarray(positions, dtype=np.int64).tobytes(),
+                 np.asarray(added_rows, dtype=np.int64).tobytes(),
+                 np.asarray(removed_rows, dtype=np.int64).tobytes(),
+                 now, now))
+
+    def load_comparison(self, original_hash, updated_hash, original_df=None, updated_df=None):
+        """Rebuild a stored comparison, or ``None`` if these two were never compared.
+
+        The snapshots are loaded from the store unless passed in.
+        """
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT positions, added_rows, removed_rows FROM comparisons "
+                "WHERE original_hash = ? AND updated_hash = ?",
+                (original_hash, updated_hash)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE comparisons SET last_used = ? "
+                       "WHERE original_hash = ? AND updated_hash = ?",
+                       (time.time(), original_hash, updated_hash))
+        if original_df is None:
+            original_df = self.load(original_hash)
+        if updated_df is None:
+            updated_df = self.load(updated_hash)
+        positions, added_rows, removed_rows = (np.frombuffer(data, dtype=np.int64)
+                                               for data in row)
+        return outcome_from_join(original_df, updated_df, positions, added_rows, removed_rows)
+
+    def snapshots(self):
+        """Stored snapshots, most recently used first."""
+        with self._connect() as db:
+            return pd.read_sql_query(
+                "SELECT content_hash, name, source, rows, size_bytes, added, last_used "
+                "FROM snapshots ORDER BY last_used DESC", db.connection)
+
+    def comparisons(self):
+        """Stored comparisons with the names of both snapshots, most recent first."""
+        with self._connect() as db:
+            return pd.read_sql_query(
+                "SELECT c.original_hash, o.name AS original_name, "
+                "c.updated_hash, u.name AS updated_name, c.created, c.last_used "
+                "FROM comparisons c "
+                "JOIN snapshots o ON o.content_hash = c.original_hash "
+                "JOIN snapshots u ON u.content_hash = c.updated_hash "
+                "ORDER BY c.last_used DESC", db.connection)
+
+    def total_bytes(self):
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM snapshots").fetchone()[0]
+
+    def delete(self, content_hash):
+        """Remove a snapshot and every comparison that uses it."""
+        with self._connect() as db:
+            self._delete(db, content_hash)
+            db.execute("PRAGMA incremental_vacuum")
+
+    def prune(self, keep=None):
+        """Evict snapshots beyond the age, count and size limits.
+
+        The least recently used go first; ``keep`` is never evicted.
+        Returns the number of snapshots removed.
+        """
+        with self._connect() as db:
+            entries = db.execute(
+                "SELECT content_hash, size_bytes, last_used FROM snapshots "
+                "ORDER BY last_used DESC").fetchall()
+            cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+            kept, total, evicted = 0, 0, []
+            for content_hash, size, last_used in entries:
+                if content_hash != keep:
+                    too_old = cutoff is not None and last_used < cutoff
+                    too_many = self.max_snapshots and kept >= self.max_snapshots
+                    too_big = self.max_bytes and total + size > self.max_bytes
+                    if too_old or too_many or too_big:
+                        evicted.append(content_hash)
+                        continue
+                kept += 1
+                total += size
+            for content_hash in evicted:
+                self._delete(db, content_hash)
+            if evicted:
+                db.execute("PRAGMA incremental_vacuum")
+        return len(evicted)
+
+    def clear(self):
+        with self._connect() as db:
+            for table in ('snapshots', 'snapshot_columns', 'key_index', 'comparisons'):
+                db.execute(f"DELETE FROM {table}")
+            db.execute("PRAGMA incremental_vacuum")
+
+    @staticmethod
+    def _delete(db, content_hash):
+        db.execute("DELETE FROM snapshots WHERE content_hash = ?", (content_hash,))
+        db.execute("DELETE FROM snapshot_columns WHERE content_hash = ?", (content_hash,))
+        db.execute("DELETE FROM key_index WHERE content_hash = ?", (content_hash,))
+        db.execute("DELETE FROM comparisons WHERE original_hash = ? OR updated_hash = ?",
+                   (content_hash, content_hash))
+
+
+class _Connection:
+    """Commit-and-close context for one SQLite connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def execute(self, *args):
+        return self.connection.execute(*args)
+
+    def executemany(self, *args):
+        return self.connection.executemany(*args)
+
+    def executescript(self, script):
+        return self.connection.executescript(script)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+
+def _key_order(df):
+    if KEY_COLUMN not in df.columns:
+        return np.empty(0, dtype=np.int64)
+    keys = df[KEY_COLUMN].to_numpy(dtype=object).astype(str)
+    return np.argsort(keys, kind='stable').astype(np.int64)
+
+
+def _merge_join(original_df, updated_df, orig_order, upd_order):
+    """The join ``compare_snapshots`` would build, from two sorted row orders.
+
+    Returns ``(positions, added_rows, removed_rows)``, or ``None`` when the
+    orders cannot stand in for a hash join: keys that are not all strings
+    (they were sorted as text, so 1 and '1' would meet) or an order that
+    does not fit its snapshot.
+    """
+    orig_keys = original_df[KEY_COLUMN].to_numpy(dtype=object)
+    upd_keys = updated_df[KEY_COLUMN].to_numpy(dtype=object)
+    if len(orig_order) != len(orig_keys) or len(upd_order) != len(upd_keys):
+        return None
+    if any(pd.api.types.infer_dtype(keys, skipna=True) not in ('string', 'empty')
+           for keys in (orig_keys, upd_keys)):
+        return None
+
+    def sorted_valid(keys, order):
+        sorted_keys = keys[order]
+        valid = ~pd.isna(sorted_keys)
+        return sorted_keys[valid], order[valid]
+
+    orig_sorted, orig_rows = sorted_valid(orig_keys, orig_order)
+    upd_sorted, upd_rows = sorted_valid(upd_keys, upd_order)
+    # The orders are stable, so the first of equal keys is also the first row
+    upd_first = np.ones(len(upd_sorted), dtype=bool)
+    upd_first[1:] = upd_sorted[1:] != upd_sorted[:-1]
+    upd_rows = upd_rows[upd_first]
+    n_upd = len(upd_rows)
+
+    # Both runs are sorted, so the stable sort merges them in one pass. Equal
+    # keys end up together, the updated one (if any) first, then the
+    # original rows in row order.
+    combined = np.concatenate([upd_sorted[upd_first], orig_sorted])
+    merged = np.argsort(combined, kind='stable')
+    merged_keys = combined[merged]
+    starts = np.ones(len(merged), dtype=bool)
+    starts[1:] = merged_keys[1:] != merged_keys[:-1]
+    run_start = np.flatnonzero(starts)
+    run_of = np.cumsum(starts) - 1
+    in_upd = merged < n_upd
+    run_in_upd = in_upd[run_start]
+
+    orig_at = np.flatnonzero(~in_upd)
+    orig_at = orig_at[run_in_upd[run_of[orig_at]]]
+    positions = np.full(len(orig_keys), -1, dtype=np.int64)
+    positions[orig_rows[merged[orig_at] - n_upd]] = upd_rows[merged[run_start[run_of[orig_at]]]]
+
+    run_length = np.diff(np.append(run_start, len(merged)))
+    added = np.sort(upd_rows[merged[run_start[run_in_upd & (run_length == 1)]]])
+    removed = np.sort(orig_rows[merged[run_start[~run_in_upd]] - n_upd])
+    return positions, added, removed
+
+
+def _encode_column(series):
+    """``(kind, dtype, meta, bytes)`` for one column.
+
+    Strings and categoricals become int32 codes into their distinct values
+    (stored as JSON in ``meta``, -1 for missing); anything else numeric is
+    stored as its raw array.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy(dtype=np.int32)
+        categories = series.cat.categories.tolist()
+        return 'category', 'int32', json.dumps(categories, default=str), codes.tobytes()
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        values = np.asarray(uniques, dtype=object).tolist()
+        return 'object', 'int32', json.dumps(values, default=str), codes.astype(np.int32).tobytes()
+    values = series.to_numpy()
+    return 'array', values.dtype.str, None, np.ascontiguousarray(values).tobytes()
+
+
+def _decode_column(kind, dtype, meta, data):
+    if kind == 'array':
+        return np.frombuffer(data, dtype=np.dtype(dtype)).copy()
+    codes = np.frombuffer(data, dtype=np.int32)
+    values = json.loads(meta)
+    if kind == 'category':
+        return pd.Categorical.from_codes(codes, categories=values)
+    # Missing values come back as None
+    lookup = np.empty(len(values) + 1, dtype=object)
+    lookup[:-1] = values
+    lookup[-1] = None
+    return lookup[codes]
@@ -0,0 +1,75 @@
+"""Notice new snapshot exports dropped into a local folder.
+
+``DirectoryWatcher.poll`` scans the folder with ``os.scandir`` (no
+platform file-system events, so shares and synced folders work too) and
+remembers each export's size and modification time. A file counts as
+dropped once the folder has been quiet for ``settle`` seconds: while an
+export is still being written, or several land in a burst, every poll
+sees a change and holds all of them back, then releases them together
+in the order they were written. Overwriting a file with new content
+drops it again. The watcher only reads directory entries, so it is safe
+to poll from a worker thread.
+"""
+import os
+import time
+
+# Extensions ``snapshot_loader.iter_snapshot`` reads
+SNAPSHOT_EXTENSIONS = ('.tsv', '.txt', '.csv', '.xlsx')
+# Quiet time after the last write before new files are released
+DEFAULT_SETTLE_SECONDS = 3.0
+
+
+class DirectoryWatcher:
+    """Snapshot files dropped into ``directory``; see the module docstring.
+
+    Files already in the folder when watching starts are released by the
+    first polls like any other drop, so the newest ones can be compared
+    right away.
+    """
+
+    def __init__(self, directory, settle=DEFAULT_SETTLE_SECONDS, clock=time.monotonic):
+        self.directory = os.path.abspath(directory)
+        self.settle = settle
+        self.clock = clock
+        # Size and mtime of every file seen, and of those already released
+        self._pending = {}
+        self._released = {}
+        self._last_change = None
+
+    def _scan(self):
+        entries = {}
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                name = entry.name
+                # Hidden files and Office lock files (~$name.xlsx) are not exports
+                if name.startswith(('.', '~$')) or not name.lower().endswith(SNAPSHOT_EXTENSIONS):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return entries
+
+    def poll(self):
+        """Paths dropped since the last call, oldest first; often empty."""
+        now = self.clock()
+        entries = self._scan()
+        for seen in (self._pending, self._released):
+            for path in [path for path in seen if path not in entries]:
+                del seen[path]
+        for path, signature in entries.items():
+            if signature != self._released.get(path) and signature != self._pending.get(path):
+                self._pending[path] = signature
+                self._last_change = now
+        if not self._pending or now - self._last_change < self.settle:
+            return []
+
+        # Empty files are still being created
+        ready = {path: signature for path, signature in self._pending.items() if signature[0]}
+        for path in ready:
+            del self._pending[path]
+        self._released.update(ready)
+        return sorted(ready, key=lambda path: (ready[path][1], os.path.basename(path)))
@@ -0,0 +1,230 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+# A change is "significant" when it moves the balance by more than this
+# fraction of the original quantity.
+SIGNIFICANT_FRACTION = 0.5
+# Taking rows out of a sum of squared deviations cancels its leading digits;
+# below this share of the old sum too few are left, so it is recomputed.
+MIN_KEPT_SQUARES = 1e-6
+
+
+@dataclass(frozen=True)
+class ComparisonSummary:
+    total: int
+    changed: int
+    increases: int
+    decreases: int
+    unchanged: int
+    net_change: float
+    mean_change: float
+    std_change: float
+    largest_increase: float
+    largest_decrease: float
+    total_increase: float
+    total_decrease: float
+    significant_increases: int
+    significant_decreases: int
+    added: int = 0
+    removed: int = 0
+
+    @property
+    def changed_pct(self):
+        return self.changed / self.total * 100 if self.total else 0.0
+
+
+def summarize(change, orig_qty, added=0, removed=0):
+    """Compute every summary statistic of a comparison in one pass.
+
+    ``change`` and ``orig_qty`` are aligned float arrays. Counts and sums
+    for increases, decreases and unchanged rows come from a single
+    ``bincount`` over the sign of each change instead of one boolean mask
+    per statistic.
+    """
+    change = np.asarray(change, dtype=np.float64)
+    orig_qty = np.asarray(orig_qty, dtype=np.float64)
+    total = len(change)
+    if total == 0:
+        return ComparisonSummary(
+            total=0, changed=0, increases=0, decreases=0, unchanged=0,
+            net_change=0.0, mean_change=np.nan, std_change=np.nan,
+            largest_increase=np.nan, largest_decrease=np.nan,
+            total_increase=0.0, total_decrease=0.0,
+            significant_increases=0, significant_decreases=0,
+            added=added, removed=removed
+        )
+
+    counts, sums = _buckets(change)
+
+    threshold = orig_qty * SIGNIFICANT_FRACTION
+    net_change = float(sums.sum())
+    mean_change = net_change / total
+    if total > 1:
+        deviation = change - mean_change
+        std_change = float(np.sqrt(np.dot(deviation, deviation) / (total - 1)))
+    else:
+        std_change = np.nan
+
+    return ComparisonSummary(
+        total=total,
+        changed=int(counts[0] + counts[2]),
+        increases=int(counts[2]),
+        decreases=int(counts[0]),
+        unchanged=int(counts[1]),
+        net_change=net_change,
+        mean_change=mean_change,
+        std_change=std_change,
+        largest_increase=float(change.max()),
+        largest_decrease=float(change.min()),
+        total_increase=float(sums[2]),
+        total_decrease=float(-sums[0]),
+        significant_increases=int(np.count_nonzero(change > threshold)),
+        significant_decreases=int(np.count_nonzero(change < -threshold)),
+        added=added,
+        removed=removed
+    )
+
+
+def update_summary(summary, old_change, old_orig, new_change, new_orig,
+                   change, orig_qty, added=0, removed=0):
+    """``summary`` adjusted for rows whose values went from old to new.
+
+    ``old_change``/``old_orig`` are the values of the rows that changed or
+    left the results, ``new_change``/``new_orig`` their values afterwards
+    (including new rows). Counts and sums are patched by difference. The
+    standard deviation goes through the sum of squared deviations: the
+    old rows are taken out and the new ones pooled in as in
+    ``merge_summaries``, never through raw sums of squares, which lose
+    every digit once the changes share a large offset. The full ``change``
+    and ``orig_qty`` arrays are only read again when a largest change was
+    among the old values, when the old rows carried nearly all of the
+    spread, or when there are too few rows for the incremental formulas.
+    """
+    old_change = np.asarray(old_change, dtype=np.float64)
+    new_change = np.asarray(new_change, dtype=np.float64)
+    total = summary.total - len(old_change) + len(new_change)
+    kept = summary.total - len(old_change)
+    if summary.total < 2 or total < 2 or kept < 1:
+        return summarize(change, orig_qty, added=added, removed=removed)
+
+    old_counts, old_sums = _buckets(old_change)
+    new_counts, new_sums = _buckets(new_change)
+    counts = (np.array([summary.decreases, summary.unchanged, summary.increases])
+              - old_counts + new_counts)
+    sums = (np.array([-summary.total_decrease, 0.0, summary.total_increase])
+            - old_sums + new_sums)
+
+    net_change = float(sums.sum())
+    mean_change = net_change / total
+    # Chan et al. run backwards for the rows that left, then forwards
+    old_mean, old_squares = _moments(old_change)
+    kept_mean = (summary.mean_change
+                 + (summary.mean_change - old_mean) * len(old_change) / kept)
+    delta = old_mean - kept_mean
+    squares = (_squares(summary) - old_squares
+               - delta * delta * len(old_change) * kept / summary.total)
+    new_mean, new_squares = _moments(new_change)
+    delta = new_mean - kept_mean
+    squares += new_squares + delta * delta * kept * len(new_change) / total
+    if squares < MIN_KEPT_SQUARES * _squares(summary):
+        deviation = np.asarray(change, dtype=np.float64) - mean_change
+        squares = float(np.dot(deviation, deviation))
+    std_change = float(np.sqrt(max(squares, 0.0) / (total - 1)))
+
+    largest_increase = summary.largest_increase
+    largest_decrease = summary.largest_decrease
+    if len(old_change) and (old_change.max() >= largest_increase
+                            or old_change.min() <= largest_decrease):
+        change = np.asarray(change, dtype=np.float64)
+        largest_increase = float(change.max())
+        largest_decrease = float(change.min())
+    elif len(new_change):
+        largest_increase = max(largest_increase, float(new_change.max()))
+        largest_decrease = min(largest_decrease, float(new_change.min()))
+
+    def significant(values, orig):
+        threshold = np.asarray(orig, dtype=np.float64) * SIGNIFICANT_FRACTION
+        return np.count_nonzero(values > threshold), np.count_nonzero(values < -threshold)
+
+    old_up, old_down = significant(old_change, old_orig)
+    new_up, new_down = significant(new_change, new_orig)
+
+    return ComparisonSummary(
+        total=total,
+        changed=int(counts[0] + counts[2]),
+        increases=int(counts[2]),
+        decreases=int(counts[0]),
+        unchanged=int(counts[1]),
+        net_change=net_change,
+        mean_change=mean_change,
+        std_change=std_change,
+        largest_increase=largest_increase,
+        largest_decrease=largest_decrease,
+        total_increase=float(sums[2]),
+        total_decrease=float(-sums[0]),
+        significant_increases=int(summary.significant_increases - old_up + new_up),
+        significant_decreases=int(summary.significant_decreases - old_down + new_down),
+        added=added,
+        removed=removed
+    )
+
+
+def merge_summaries(first, second):
+    """The ``ComparisonSummary`` of two disjoint sets of results combined.
+
+    Counts and sums add up; the standard deviation is pooled from both
+    means and deviations (Chan et al.), so summaries of partitions can be
+    folded together without keeping their rows.
+    """
+    if first.total == 0 or second.total == 0:
+        merged = second if first.total == 0 else first
+        return replace(merged, added=first.added + second.added,
+                       removed=first.removed + second.removed)
+
+    total = first.total + second.total
+    net_change = first.net_change + second.net_change
+    mean_change = net_change / total
+    delta = second.mean_change - first.mean_change
+    squares = (_squares(first) + _squares(second)
+               + delta * delta * first.total * second.total / total)
+
+    return ComparisonSummary(
+        total=total,
+        changed=first.changed + second.changed,
+        increases=first.increases + second.increases,
+        decreases=first.decreases + second.decreases,
+        unchanged=first.unchanged + second.unchanged,
+        net_change=net_change,
+        mean_change=mean_change,
+        std_change=float(np.sqrt(squares / (total - 1))),
+        largest_increase=max(first.largest_increase, second.largest_increase),
+        largest_decrease=min(first.largest_decrease, second.largest_decrease),
+        total_increase=first.total_increase + second.total_increase,
+        total_decrease=first.total_decrease + second.total_decrease,
+        significant_increases=first.significant_increases + second.significant_increases,
+        significant_decreases=first.significant_decreases + second.significant_decreases,
+        added=first.added + second.added,
+        removed=first.removed + second.removed
+    )
+
+
+def _squares(summary):
+    # Sum of squared deviations from the mean; a single row has none
+    return summary.std_change ** 2 * (summary.total - 1) if summary.total > 1 else 0.0
+
+
+def _moments(values):
+    # Mean and sum of squared deviations; nothing for no values
+    if len(values) == 0:
+        return 0.0, 0.0
+    mean = values.mean()
+    deviation = values - mean
+    return float(mean), float(np.dot(deviation, deviation))
+
+
+def _buckets(change):
+    # 0 = decrease, 1 = unchanged, 2 = increase
+    bucket = (change > 0).astype(np.intp) - (change < 0) + 1
+    return (np.bincount(bucket, minlength=3),
+            np.bincount(bucket, weights=change, minlength=3))
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+import cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parser_defaults_match_their_modules():
+    import chart_report
+    import charts
+    import service
+
+    assert cli.CHART_DPI == chart_report.DEFAULT_DPI
+    assert cli.CHART_TOP_N == charts.DEFAULT_TOP_N
+    assert cli.SERVER_HOST == service.DEFAULT_HOST
+    assert cli.SERVER_PORT == service.DEFAULT_PORT
+    assert cli.SERVER_CACHE_MB == service.DEFAULT_CACHE_BYTES // 1024 ** 2
+
+
+def test_commands_without_charts_do_not_import_matplotlib():
+    statement = ("import sys, cli; cli.build_parser().parse_args(['store', '--list']); "
+                 "print(sorted(name for name in ('matplotlib', 'seaborn', 'service') "
+                 "if name in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', statement], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == '[]'
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparison_engine import compare_snapshots
+
+
+def iterrows_compare(original_df, updated_df):
+    """The row-by-row comparison ``compare_snapshots`` replaced."""
+    results = []
+    for _, orig_row in original_df.iterrows():
+        td_no = orig_row['Td No']
+        updated_row = updated_df[updated_df['Td No'] == td_no]
+        if not updated_row.empty:
+            orig_qty = float(orig_row['Balance Qty'])
+            updated_qty = float(updated_row.iloc[0]['Balance Qty'])
+            results.append((td_no, orig_row['Td Desc'], orig_qty, updated_qty,
+                            updated_qty - orig_qty))
+    return results
+
+
+def random_snapshot(rng, n_rows, n_keys):
+    keys = np.array([f"TD{key}" for key in rng.integers(0, n_keys, n_rows)], dtype=object)
+    # Missing keys
+    keys[rng.random(n_rows) < 0.1] = np.nan
+    qty = rng.integers(0, 5, n_rows).astype(np.float64)
+    # NaN quantities
+    qty[rng.random(n_rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Td No': keys,
+        'Td Desc': [f"desc {i}" for i in rng.integers(0, 3, n_rows)],
+        'Balance Qty': qty
+    })
+
+
+def assert_same_results(outcome, expected):
+    assert len(outcome) == len(expected)
+    if not expected:
+        return
+    td_no, td_desc, orig_qty, updated_qty, change = zip(*expected)
+    assert list(outcome.td_no) == list(td_no)
+    assert list(np.asarray(outcome.td_desc, dtype=object)) == list(td_desc)
+    for values, column in ((outcome.orig_qty, orig_qty), (outcome.updated_qty, updated_qty),
+                           (outcome.change, change)):
+        np.testing.assert_array_equal(values, np.array(column, dtype=np.float64))
+
+
+@pytest.mark.parametrize('seed', range(500))
+def test_matches_iterrows_loop(seed):
+    # Few keys for the row counts, so both sides have duplicates and one-sided keys
+    rng = np.random.default_rng(seed)
+    original = random_snapshot(rng, int(rng.integers(0, 40)), 25)
+    updated = random_snapshot(rng, int(rng.integers(0, 40)), 25)
+
+    assert_same_results(compare_snapshots(original, updated),
+                        iterrows_compare(original, updated))
+
+
+def test_added_and_removed_keep_the_first_row_of_each_key():
+    original = pd.DataFrame({'Td No': ['A', 'B', 'B', np.nan], 'Td Desc': list('abcd'),
+                             'Balance Qty': [1.0, 2.0, 3.0, 4.0]})
+    updated = pd.DataFrame({'Td No': ['C', 'A', 'C', np.nan], 'Td Desc': list('efgh'),
+                            'Balance Qty': [5.0, 6.0, 7.0, 8.0]})
+
+    outcome = compare_snapshots(original, updated)
+
+    assert outcome.added.index.tolist() == [0]
+    assert outcome.removed.index.tolist() == [1]
+
+
+def test_updated_without_any_key_matches_nothing():
+    original = pd.DataFrame({'Td No': ['A', 'B'], 'Td Desc': ['a', 'b'],
+                             'Balance Qty': [1.0, 2.0]})
+    updated = pd.DataFrame({'Td No': [np.nan], 'Td Desc': ['c'], 'Balance Qty': [3.0]})
+
+    outcome = compare_snapshots(original, updated)
+
+    assert len(outcome) == 0
+    assert outcome.removed.index.tolist() == [0, 1]
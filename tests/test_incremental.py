@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from comparison_engine import compare_snapshots
+from incremental import IncrementalComparison
+from snapshot_loader import parse_text, parse_text_edit
+
+HEADER = ['Td No', 'Td Desc', 'Customer Group', 'Promo Type', 'Start Date', 'Balance Qty']
+N_KEYS = 150
+# Every change is about the same large number, which raw sums of squares
+# cannot tell apart
+OFFSET = 5e7
+
+
+def random_line(rng, header=HEADER, offset=OFFSET):
+    cells = [
+        f"TD{rng.integers(0, N_KEYS)}",
+        f"desc {rng.integers(0, 5)}",
+        f"G{rng.integers(0, 3)}",
+        f"P{rng.integers(0, 3)}",
+        f"2024-0{rng.integers(1, 10)}-01",
+        str(offset + rng.integers(0, 4))
+    ]
+    if 'Issue Qty' in header:
+        cells.insert(-1, '7')
+    return '\t'.join(cells)
+
+
+def with_last_cell(line, *cells):
+    """``line`` with its last cell replaced by ``cells``."""
+    return '\t'.join([line.rsplit('\t', 1)[0], *map(str, cells)])
+
+
+def random_edit(rng, header, rows):
+    """Edit the lines of an updated snapshot the way a re-paste does."""
+    rows = list(rows)
+    edit = rng.integers(0, 8)
+    at = int(rng.integers(0, len(rows) + 1))
+    last = min(at, len(rows) - 1)
+    if edit == 0:
+        rows.insert(at, random_line(rng, header))
+    elif edit == 1 and rows:
+        del rows[last]
+    elif edit == 2 and rows and rows[last]:
+        # Quantity only
+        rows[last] = with_last_cell(rows[last], OFFSET + rng.integers(0, 4))
+    elif edit == 3 and rows:
+        rows[last] = random_line(rng, header)
+    elif edit == 4:
+        # A blank line shifts later lines off their row positions
+        rows.insert(at, '')
+    elif edit == 5 and 'Issue Qty' not in header:
+        # A new header means every row is parsed again
+        header = header[:-1] + ['Issue Qty', header[-1]]
+        rows = [with_last_cell(line, 7, line.rsplit('\t', 1)[1]) if line else line
+                for line in rows]
+    elif edit == 6:
+        rows.extend(random_line(rng, header) for _ in range(rng.integers(1, 4)))
+    elif rows:
+        del rows[at:at + int(rng.integers(1, 4))]
+    return header, rows
+
+
+def as_text(header, rows):
+    return '\n'.join(['\t'.join(header)] + rows)
+
+
+def assert_same_outcome(outcome, expected):
+    assert list(outcome.td_no) == list(expected.td_no)
+    assert list(np.asarray(outcome.td_desc, dtype=object)) == \
+        list(np.asarray(expected.td_desc, dtype=object))
+    np.testing.assert_array_equal(outcome.quantities, expected.quantities)
+    for rows, expected_rows in zip(outcome.join, expected.join):
+        np.testing.assert_array_equal(rows, expected_rows)
+    assert outcome.added.index.tolist() == expected.added.index.tolist()
+    assert outcome.removed.index.tolist() == expected.removed.index.tolist()
+
+    summary, expected_summary = outcome.summary(), expected.summary()
+    for field in summary.__dataclass_fields__:
+        assert np.isclose(getattr(summary, field), getattr(expected_summary, field),
+                          rtol=1e-9, equal_nan=True), field
+    assert outcome.changes().counts().to_dict() == expected.changes().counts().to_dict()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_updates_match_a_fresh_comparison(seed):
+    rng = np.random.default_rng(seed)
+    original_df = parse_text(as_text(HEADER, [random_line(rng, offset=0.0) for _ in range(200)]))
+    header, rows = HEADER, [random_line(rng) for _ in range(200)]
+    text = as_text(header, rows)
+    updated_df = parse_text(text)
+    incremental = IncrementalComparison(compare_snapshots(original_df, updated_df), updated_df)
+
+    for _ in range(30):
+        header, rows = random_edit(rng, header, rows)
+        new_text = as_text(header, rows)
+        updated_df = parse_text_edit(new_text, text, updated_df)
+        text = new_text
+        fresh_df = parse_text(text)
+        assert updated_df.equals(fresh_df)
+
+        expected = compare_snapshots(original_df, fresh_df)
+        update = incremental.update(updated_df)
+        if update is None:
+            # Too large an edit; the dashboard compares in full instead
+            incremental = IncrementalComparison(expected, fresh_df)
+            continue
+        incremental = update[0]
+        assert_same_outcome(incremental.outcome, expected)
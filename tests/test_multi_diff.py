@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from multi_diff import diff_columns
+
+
+def snapshot(start_dates, balance):
+    return pd.DataFrame({
+        'Td No': [f"TD{i}" for i in range(len(balance))],
+        'Start Date': pd.to_datetime(start_dates),
+        'Balance Qty': np.asarray(balance, dtype=np.float64)
+    })
+
+
+def test_date_blank_on_both_sides_is_unchanged():
+    original = snapshot([None, '2024-01-01', None], [1, 2, 3])
+    updated = snapshot([None, '2024-01-01', '2024-02-01'], [1, 2, 3])
+    rows = np.arange(3)
+
+    changes = diff_columns(original, updated, rows, rows)
+
+    assert changes.rows(['Start Date']).tolist() == [2]
+    assert changes.rows().tolist() == [2]
+    assert np.isnan(changes.deltas['Start Date'][0])
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparison_engine import compare_snapshots
+from out_of_core import compare_partitioned
+from snapshot_loader import load_snapshot
+
+HEADER = 'Td No\tTd Desc\tCustomer Group\tBalance Qty'
+
+
+def write_snapshot(path, rng, n_rows, n_keys):
+    lines = [HEADER]
+    for _ in range(n_rows):
+        lines.append('\t'.join([
+            '' if rng.random() < 0.05 else f"TD{rng.integers(0, n_keys)}",
+            f"desc {rng.integers(0, 5)}",
+            f"G{rng.integers(0, 3)}",
+            '' if rng.random() < 0.05 else str(rng.integers(0, 50))
+        ]))
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('partitions, chunksize', [(1, 10_000), (7, 997), (16, 13)])
+def test_matches_the_in_memory_comparison(tmp_path, partitions, chunksize):
+    # Duplicate, missing and one-sided keys, chunks smaller than a partition
+    rng = np.random.default_rng(partitions)
+    original_path = write_snapshot(tmp_path / 'original.tsv', rng, 3_000, 2_000)
+    updated_path = write_snapshot(tmp_path / 'updated.tsv', rng, 2_500, 2_000)
+    expected = compare_snapshots(load_snapshot(original_path), load_snapshot(updated_path))
+    # Only the values of the descriptions are compared, not their categories
+    expected_frame = expected.to_frame().astype({'td_desc': object})
+
+    with compare_partitioned(original_path, updated_path, partitions, str(tmp_path),
+                             top_n=50, chunksize=chunksize) as outcome:
+        summary, expected_summary = outcome.summary(), expected.summary()
+        for field in summary.__dataclass_fields__:
+            assert np.isclose(getattr(summary, field), getattr(expected_summary, field),
+                              rtol=1e-9, equal_nan=True), field
+
+        frame = pd.concat(outcome.iter_frames(), ignore_index=True)
+        pd.testing.assert_frame_equal(frame, expected_frame)
+
+        # Largest absolute change first, ties in original order
+        order = np.argsort(-np.abs(expected.change), kind='stable')[:50]
+        pd.testing.assert_frame_equal(outcome.top_changes.astype({'td_desc': object}),
+                                      expected_frame.iloc[order].reset_index(drop=True))
+        directory = outcome.directory
+    assert not os.path.exists(directory)
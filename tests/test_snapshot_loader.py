@@ -0,0 +1,26 @@
+import pandas as pd
+
+from snapshot_loader import parse_text, parse_text_edit
+
+HEADER = "Td No\tTd Desc\tBalance Qty"
+
+
+def test_edit_after_blank_line_matches_full_parse():
+    previous_text = f"{HEADER}\nA\tFirst\t1\n\nB\tSecond\t2"
+    text = f"{HEADER}\nA\tFirst\t1\n\nB\tSecond\t5"
+    previous_df = parse_text(previous_text)
+
+    edited = parse_text_edit(text, previous_text, previous_df)
+
+    pd.testing.assert_frame_equal(edited, parse_text(text))
+    assert edited['Td No'].tolist() == ['A', 'B']
+    assert edited['Balance Qty'].tolist() == [1, 5]
+
+
+def test_edit_reuses_unchanged_rows():
+    previous_text = f"{HEADER}\nA\tFirst\t1\nB\tSecond\t2\nC\tThird\t3"
+    text = f"{HEADER}\nA\tFirst\t1\nB\tSecond\t7\nC\tThird\t3"
+
+    edited = parse_text_edit(text, previous_text, parse_text(previous_text))
+
+    pd.testing.assert_frame_equal(edited, parse_text(text))
@@ -0,0 +1,89 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot_store
+from comparison_engine import compare_snapshots
+from snapshot_loader import parse_text
+from snapshot_store import SnapshotStore
+
+HEADER = ('Td No\tTd Desc\tCustomer Group\tPromo Type\tStart Date\tEnd Date\t'
+          'Plan Qty\tBalance Qty')
+
+
+def snapshot_text(seed, n_rows=60):
+    rng = np.random.default_rng(seed)
+    lines = [HEADER]
+    for _ in range(n_rows):
+        key = rng.integers(0, n_rows)
+        lines.append('\t'.join([
+            '' if rng.random() < 0.05 else f"TD{key}",
+            f"promo {key % 7}",
+            f"G{rng.integers(0, 3)}",
+            rng.choice(['Discount', 'Bundle', '']),
+            '' if rng.random() < 0.1 else f"2024-0{rng.integers(1, 10)}-15",
+            f"2024-1{rng.integers(0, 3)}-01",
+            str(rng.integers(0, 100)),
+            '' if rng.random() < 0.05 else f"{rng.integers(0, 1000) / 4}"
+        ]))
+    return '\n'.join(lines)
+
+
+class Clock:
+    """``time`` stand-in that moves on a second every call."""
+
+    def __init__(self):
+        self.ticks = itertools.count(1_700_000_000)
+
+    def time(self):
+        return float(next(self.ticks))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'time', Clock())
+    return SnapshotStore(str(tmp_path / 'store.db'))
+
+
+def test_save_and_load_round_trip_dtypes(store):
+    df = parse_text(snapshot_text(0))
+    content_hash = store.save(df, 'a' * 40, 'first')
+
+    loaded = store.load(content_hash)
+
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded.attrs['content_hash'] == df.attrs['content_hash'] == content_hash
+    assert store.parse_text(snapshot_text(0)).attrs['content_hash'] in store
+
+
+def test_stored_comparison_equals_a_fresh_one(store):
+    original, updated = store.parse_text(snapshot_text(1)), store.parse_text(snapshot_text(2))
+    expected = compare_snapshots(original, updated)
+
+    # Joined from the stored key orders, then replayed from the saved join
+    for _ in range(2):
+        outcome = store.compare(store.load(original.attrs['content_hash']),
+                                store.load(updated.attrs['content_hash']))
+        for rows, expected_rows in zip(outcome.join, expected.join):
+            np.testing.assert_array_equal(rows, expected_rows)
+        assert outcome.summary() == expected.summary()
+        pd.testing.assert_frame_equal(outcome.to_frame(), expected.to_frame())
+    assert len(store.comparisons()) == 1
+
+
+def test_retention_evicts_least_recently_used_with_their_comparisons(store):
+    store.max_snapshots = 2
+    first, second = store.parse_text(snapshot_text(3)), store.parse_text(snapshot_text(4))
+    store.compare(first, second)
+    # Using the first makes the second the least recently used
+    store.load(first.attrs['content_hash'])
+
+    third = store.parse_text(snapshot_text(5))
+
+    assert list(store.snapshots()['content_hash']) == [third.attrs['content_hash'],
+                                                       first.attrs['content_hash']]
+    assert second.attrs['content_hash'] not in store
+    assert len(store.comparisons()) == 0
+    assert store.key_orders(second.attrs['content_hash']) is None
@@ -0,0 +1,60 @@
+import numpy as np
+
+from summary_stats import summarize, update_summary
+
+
+def test_update_keeps_std_of_changes_far_from_zero():
+    rng = np.random.default_rng(0)
+    change = 5e7 + rng.normal(0.0, 1.0, 200_000)
+    orig_qty = np.full(len(change), 1e8)
+    summary = summarize(change, orig_qty)
+
+    for _ in range(50):
+        rows = rng.choice(len(change), 100, replace=False)
+        old_change = change[rows].copy()
+        change[rows] = 5e7 + rng.normal(0.0, 1.0, len(rows))
+        summary = update_summary(summary, old_change, orig_qty[rows],
+                                 change[rows], orig_qty[rows], change, orig_qty)
+
+    assert np.isclose(summary.std_change, np.std(change, ddof=1), rtol=1e-6)
+    assert np.isclose(summary.mean_change, change.mean(), rtol=1e-12)
+
+
+def test_update_with_rows_added_and_removed_matches_summarize():
+    rng = np.random.default_rng(1)
+    change = rng.normal(10.0, 3.0, 1_000)
+    orig_qty = rng.uniform(1.0, 50.0, len(change))
+    summary = summarize(change, orig_qty)
+
+    removed = rng.choice(len(change), 50, replace=False)
+    kept = np.setdiff1d(np.arange(len(change)), removed)
+    added_change = rng.normal(-5.0, 1.0, 80)
+    added_orig = rng.uniform(1.0, 50.0, len(added_change))
+    new_change = np.concatenate([change[kept], added_change])
+    new_orig = np.concatenate([orig_qty[kept], added_orig])
+
+    updated = update_summary(summary, change[removed], orig_qty[removed],
+                             added_change, added_orig, new_change, new_orig)
+    expected = summarize(new_change, new_orig)
+
+    for field in ('total', 'changed', 'increases', 'decreases', 'unchanged',
+                  'significant_increases', 'significant_decreases'):
+        assert getattr(updated, field) == getattr(expected, field)
+    for field in ('net_change', 'mean_change', 'std_change', 'largest_increase',
+                  'largest_decrease', 'total_increase', 'total_decrease'):
+        assert np.isclose(getattr(updated, field), getattr(expected, field), rtol=1e-9)
+
+
+def test_update_recomputes_std_when_the_old_rows_held_the_spread():
+    rng = np.random.default_rng(2)
+    change = 5e7 + rng.integers(0, 4, 150).astype(np.float64)
+    change[:3] = [-3.0, 0.0, -3.0]
+    orig_qty = np.ones(len(change))
+    summary = summarize(change, orig_qty)
+
+    old_change = change[:3].copy()
+    change[:3] = 5e7 + rng.integers(0, 4, 3)
+    updated = update_summary(summary, old_change, orig_qty[:3], change[:3], orig_qty[:3],
+                             change, orig_qty)
+
+    assert np.isclose(updated.std_change, np.std(change, ddof=1), rtol=1e-9)